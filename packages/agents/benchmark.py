@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mock_openai_server import (
+    LATENCY_DISTRIBUTIONS,
+    MockOpenAIState,
+    start_mock_openai_server,
+)
+from stub_db_api import StubQueueState, start_stub_db_api, synthetic_item
+
+AGENT_QUEUES = {"filter_agent": "ingested", "comment_agent": "drafting_queue"}
+
+
+def load_agent(agent: str) -> ModuleType:
+    path = Path(__file__).resolve().parent / agent / "src" / "main.py"
+    spec = importlib.util.spec_from_file_location(f"{agent}_main", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def percentile_ms(ordered: list[float], fraction: float) -> float | None:
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000, 2)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Drain a seeded stub queue through an agent against a mock OpenAI API.")
+    parser.add_argument("--agent", choices=sorted(AGENT_QUEUES), default="filter_agent")
+    parser.add_argument("--items", type=int, default=200, help="Queue items to seed (N).")
+    parser.add_argument("--limit", type=int, default=25, help="Items read per cycle.")
+    parser.add_argument("--max-cycles", type=int, default=1000)
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    parser.add_argument("--filter-batch-size", type=int, default=5, help="Items per filter prompt; 1 disables batching.")
+    parser.add_argument("--llm-latency-ms", type=float, default=400.0)
+    parser.add_argument("--llm-latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="exponential")
+    parser.add_argument("--llm-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after-seconds", type=float, default=0.2)
+    parser.add_argument("--db-latency-ms", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    mock_state = MockOpenAIState(
+        latency_seconds=args.llm_latency_ms / 1000,
+        latency_distribution=args.llm_latency_distribution,
+        jitter_seconds=args.llm_jitter_ms / 1000,
+        error_rate=args.llm_error_rate,
+        rate_limit_rate=args.llm_rate_limit_rate,
+        retry_after_seconds=args.retry_after_seconds,
+        seed=args.seed,
+    )
+    mock_server = start_mock_openai_server(mock_state)
+    stub_state = StubQueueState(
+        [synthetic_item(index, state=AGENT_QUEUES[args.agent]) for index in range(args.items)],
+        latency_seconds=args.db_latency_ms / 1000,
+    )
+    stub_server = start_stub_db_api(stub_state)
+
+    # The environment wins over packages/agents/.env, so a benchmark never touches real services.
+    os.environ.update(
+        {
+            "OPENAI_API_KEY": "benchmark",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{mock_server.server_port}/v1",
+            "DB_API_BASE_URL": f"http://127.0.0.1:{stub_server.server_port}",
+            "DB_API_SERVICE_TOKEN": "benchmark",
+            "AGENT_LLM_CACHE": "off",
+            "AGENT_MAX_IN_FLIGHT": str(args.max_in_flight),
+            "AGENT_LLM_RETRY_BASE_SECONDS": "0.05",
+            "FILTER_AGENT_BATCH_SIZE": str(args.filter_batch_size),
+            "FILTER_PRECLASSIFIER": "off",
+        }
+    )
+    os.environ.pop("AGENT_PARTITION", None)
+    _, cycle = load_agent(args.agent).cycle_factory()
+
+    totals: dict[str, float] = {}
+    cycles = 0
+    started = time.perf_counter()
+    while stub_state.pending() and cycles < args.max_cycles:
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = cycle(limit=args.limit)
+        cycles += 1
+        for key, value in stats.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                totals[key] = totals.get(key, 0) + value
+        if not stats.get("fetched"):
+            break
+    elapsed = time.perf_counter() - started
+    mock_server.shutdown()
+    stub_server.shutdown()
+
+    latencies = sorted(stub_state.item_latencies())
+    finished = len(latencies)
+    print(
+        json.dumps(
+            {
+                "agent": args.agent,
+                "items": args.items,
+                "finished": finished,
+                "cycles": cycles,
+                "elapsed_s": round(elapsed, 3),
+                "items_per_sec": round(finished / elapsed, 2) if elapsed else None,
+                "item_latency_ms": {
+                    "p50": percentile_ms(latencies, 0.5),
+                    "p95": percentile_ms(latencies, 0.95),
+                    "p99": percentile_ms(latencies, 0.99),
+                    "mean": round(statistics.fmean(latencies) * 1000, 2) if latencies else None,
+                },
+                "db_api_requests": stub_state.requests,
+                "db_api_calls_per_item": round(stub_state.requests / finished, 3) if finished else None,
+                "llm": mock_state.stats(),
+                "llm_calls_per_item": round(mock_state.requests / finished, 3) if finished else None,
+                "final_states": stub_state.state_counts(),
+                "agent_stats": totals,
+            },
+            indent=2,
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
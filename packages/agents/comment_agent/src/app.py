@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+import sys
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
 from typing import Any
 
 from fastapi import FastAPI
@@ -7,14 +11,30 @@ from pydantic import BaseModel, Field
 
 from src.main import cycle_factory
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from job_runner import JobRunner, job_routes
+
 
 class RunRequest(BaseModel):
     cycles: int = Field(default=5, ge=1, le=5)
     limit: int = Field(default=10, ge=1, le=100)
 
 
+class SettingsRequest(BaseModel):
+    max_in_flight: int | None = Field(default=None, ge=1, le=64)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    yield
+    jobs.shutdown()
+
+
 runtime_config, cycle = cycle_factory()
-app = FastAPI(title="Comment Agent API", version="0.1.0")
+jobs = JobRunner()
+app = FastAPI(title="Comment Agent API", version="0.1.0", lifespan=lifespan)
+app.include_router(job_routes(jobs))
 
 
 @app.get("/health")
@@ -22,13 +42,26 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
-@app.post("/run")
+@app.get("/settings")
+def read_settings() -> dict[str, Any]:
+    return {"max_in_flight": runtime_config.max_in_flight}
+
+
+@app.patch("/settings")
+def update_settings(request: SettingsRequest) -> dict[str, Any]:
+    """Change runtime knobs; the next cycle, including one already queued as a job, uses them."""
+    if request.max_in_flight is not None:
+        runtime_config.max_in_flight = request.max_in_flight
+    return read_settings()
+
+
+@app.post("/run", status_code=202)
 def run_agent(request: RunRequest) -> dict[str, Any]:
-    results: list[dict[str, Any] | None] = []
-    for _ in range(request.cycles):
-        results.append(cycle(limit=request.limit))
-    return {
-        "agent": "comment_agent",
-        "cycles_requested": request.cycles,
-        "results": results,
-    }
+    job, created = jobs.submit(
+        "comment_agent",
+        lambda: cycle(limit=request.limit),
+        cycles=request.cycles,
+        params=request.model_dump(),
+    )
+    return {**job, "deduplicated": not created}
+
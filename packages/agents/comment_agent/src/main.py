@@ -7,7 +7,21 @@ from typing import Any
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-from shared_utils import DBAPIClient, OpenAIResponsesClient, load_agent_env, load_runtime_config, parse_common_args, run_loop
+from shared_utils import AgentError, BatchRequest, DBAPIClient, OpenAIBatchRunner, OpenAIResponsesClient, ProviderUnavailableError, QueueWakeHook, fit_item_to_budget, get_env_var, load_agent_env, load_runtime_config, map_concurrently, parse_common_args, report_item_failure, run_loop, run_supervisor
+
+PROMPT_VERSION = "v1"
+COMMENT_INSTRUCTIONS = (
+    "You are the comment agent for Wealthsimple-related community engagement. "
+    "Return JSON only. Generate a single concise draft comment. "
+    "The comment must sound human, calm, and conversational, not like a corporate script. "
+    "Keep the draft to 1-2 sentences total. "
+    "Do not provide personalized financial advice, security recommendations, or portfolio instructions. "
+    "Prefer clarifying questions, light educational framing, or acknowledging the user's frustration when appropriate. "
+    "When it naturally fits, lightly reference a relevant Wealthsimple offering such as self-directed investing, managed investing, cash, account transfers, or account types, but do not force a mention if it would sound unnatural. "
+    "Avoid hype, emojis, exclamation-heavy copy, and hard sells. "
+    "Return an object with keys: draft_text, safety_flags, rationale. "
+    "safety_flags must be an object and include financial_advice and compliance_review_needed booleans."
+)
 
 
 def build_input_text(item: dict[str, Any]) -> str:
@@ -28,20 +42,20 @@ def build_input_text(item: dict[str, Any]) -> str:
     )
 
 
-def generate_comment(llm: OpenAIResponsesClient, *, model: str, item: dict[str, Any]) -> dict[str, Any]:
-    instructions = (
-        "You are the comment agent for Wealthsimple-related community engagement. "
-        "Return JSON only. Generate a single concise draft comment. "
-        "The comment must sound human, calm, and conversational, not like a corporate script. "
-        "Keep the draft to 1-2 sentences total. "
-        "Do not provide personalized financial advice, security recommendations, or portfolio instructions. "
-        "Prefer clarifying questions, light educational framing, or acknowledging the user's frustration when appropriate. "
-        "When it naturally fits, lightly reference a relevant Wealthsimple offering such as self-directed investing, managed investing, cash, account transfers, or account types, but do not force a mention if it would sound unnatural. "
-        "Avoid hype, emojis, exclamation-heavy copy, and hard sells. "
-        "Return an object with keys: draft_text, safety_flags, rationale. "
-        "safety_flags must be an object and include financial_advice and compliance_review_needed booleans."
+def generate_comment(
+    llm: OpenAIResponsesClient, *, model: str, item: dict[str, Any], use_cache: bool = True
+) -> dict[str, Any]:
+    return llm.json_completion(
+        model=model,
+        instructions=COMMENT_INSTRUCTIONS,
+        input_text=build_input_text(item),
+        prompt_version=PROMPT_VERSION,
+        use_cache=use_cache,
+        validate=validate_comment_result,
     )
-    result = llm.json_completion(model=model, instructions=instructions, input_text=build_input_text(item))
+
+
+def parse_comment_result(result: dict[str, Any]) -> dict[str, Any]:
     safety_flags = result.get("safety_flags") if isinstance(result.get("safety_flags"), dict) else {}
     return {
         "draft_text": str(result.get("draft_text") or "").strip(),
@@ -53,30 +67,55 @@ def generate_comment(llm: OpenAIResponsesClient, *, model: str, item: dict[str,
     }
 
 
+def validate_comment_result(result: Any) -> dict[str, Any]:
+    if not isinstance(result, dict):
+        raise AgentError("Comment result was not an object")
+    parsed = parse_comment_result(result)
+    if not parsed["draft_text"]:
+        raise AgentError("Generated empty draft_text")
+    return parsed
+
+
 def cycle_factory() -> callable:
     runtime_config = load_runtime_config()
     env = load_agent_env()
     model = env.get("COMMENT_AGENT_MODEL", "gpt-4o-mini")
+    input_token_budget = int(get_env_var(env, "COMMENT_AGENT_INPUT_TOKEN_BUDGET", "2000") or "2000")
     db_api = DBAPIClient(runtime_config)
     llm = OpenAIResponsesClient(runtime_config)
 
-    def cycle(*, limit: int) -> None:
+    def cycle(*, limit: int, batch: bool = False) -> None:
         queue = db_api.get_queue("/v1/queues/drafting", limit=limit)
         items = queue.get("items", [])
-        stats = {"processed": 0, "generated": 0, "errors": 0}
-
+        stats = {
+            "fetched": len(items),
+            "processed": 0,
+            "generated": 0,
+            "errors": 0,
+            "quarantined": 0,
+            "provider_paused": 0,
+            "input_tokens_saved": 0,
+        }
+        fitted_items = []
         for item in items:
+            fitted, saved = fit_item_to_budget(item, max_tokens=input_token_budget)
+            fitted_items.append(fitted)
+            stats["input_tokens_saved"] += saved
+        items = fitted_items
+
+        def record(item_id: str, result: dict[str, Any] | None, error: Exception | None) -> None:
             try:
-                result = generate_comment(llm, model=model, item=item)
+                if error is not None:
+                    raise error
                 if not result["draft_text"]:
                     raise RuntimeError("Generated empty draft_text")
                 db_api.post(
-                    f"/v1/queues/drafting/{item['id']}/generate-comment",
+                    f"/v1/queues/drafting/{item_id}/generate-comment",
                     {
                         "draft_text": result["draft_text"],
                         "model_name": model,
                         "model_temperature": 0.2,
-                        "prompt_version": "v1",
+                        "prompt_version": PROMPT_VERSION,
                         "safety_flags": {
                             **result["safety_flags"],
                             "rationale": result["rationale"],
@@ -88,10 +127,38 @@ def cycle_factory() -> callable:
                 )
                 stats["processed"] += 1
                 stats["generated"] += 1
+            except ProviderUnavailableError:
+                stats["provider_paused"] += 1
             except Exception as exc:
                 stats["errors"] += 1
-                print(f"[error] comment_agent item {item.get('id')}: {exc}", file=sys.stderr)
-
+                print(f"[error] comment_agent item {item_id}: {exc}", file=sys.stderr)
+                if report_item_failure(
+                    db_api, queue="drafting", item_id=item_id, error=exc, actor_label="comment-agent"
+                ):
+                    stats["quarantined"] += 1
+
+        if batch:
+            requests = [
+                BatchRequest(
+                    custom_id=str(item["id"]),
+                    model=model,
+                    instructions=COMMENT_INSTRUCTIONS,
+                    input_text=build_input_text(item),
+                )
+                for item in items
+            ]
+            for item_id, result, error in OpenAIBatchRunner(runtime_config, name="comment_agent").run(requests):
+                record(item_id, parse_comment_result(result) if error is None else None, error)
+        else:
+            generated = map_concurrently(
+                lambda item: generate_comment(llm, model=model, item=item, use_cache=not item.get("failure_count")),
+                items,
+                max_in_flight=runtime_config.max_in_flight,
+            )
+            for item, result, error in generated:
+                record(item["id"], result, error)
+
+        stats.update(llm.take_stats())
         print(json.dumps(stats))
         return stats
 
@@ -99,9 +166,15 @@ def cycle_factory() -> callable:
 
 
 def main() -> int:
-    args = parse_common_args("Generate comments for drafting queue items.")
+    args = parse_common_args("Generate comments for drafting queue items.", batch_mode=True, workers=True)
+    if args.workers > 1 and not args.batch:
+        return run_supervisor(script=Path(__file__), workers=args.workers)
     runtime_config, cycle = cycle_factory()
-    return run_loop(args=args, runtime_config=runtime_config, cycle_fn=cycle)
+    if args.batch:
+        cycle(limit=args.limit, batch=True)
+        return 0
+    wake = QueueWakeHook(DBAPIClient(runtime_config), "drafting")
+    return run_loop(args=args, runtime_config=runtime_config, cycle_fn=cycle, wake=wake)
 
 
 if __name__ == "__main__":
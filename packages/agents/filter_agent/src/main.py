@@ -2,17 +2,48 @@ from __future__ import annotations
 
 import json
 import sys
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
 
-from shared_utils import AgentError, DBAPIClient, OpenAIResponsesClient, load_agent_env, load_runtime_config, parse_common_args, run_loop
+from shared_utils import AgentError, BatchRequest, DBAPIClient, OpenAIBatchRunner, OpenAIResponsesClient, ProviderUnavailableError, QueueWakeHook, estimate_tokens, fit_item_to_budget, get_env_var, load_agent_env, load_runtime_config, map_concurrently, parse_common_args, report_item_failure, run_loop, run_supervisor
+from pre_classifier import PRE_CLASSIFIER_LABEL, PreClassifier, local_decision
 
-MAX_MOVES_PER_CYCLE = 5
+PROMPT_VERSION = "v1"
+BATCH_PROMPT_VERSION = "v1-batch"
+FILTER_DECISIONS = {"move_to_opportunity_review", "trash"}
 
+FILTER_GUIDANCE = (
+    "You are the filter agent for a Wealthsimple workflow. "
+    "Return JSON only. Decide whether content should move to opportunity review or be trashed. "
+    "You are not a financial advisor and this workflow is for product marketing and community engagement, not portfolio coaching. "
+    "Favor move_to_opportunity_review only for content clearly relevant to personal finance, investing basics, broker comparisons, product friction, transfer questions, account issues, platform choice, fees, account types, or adjacent Wealthsimple opportunities where a brand can respond safely. "
+    "Prefer trash for posts asking what the user should buy, sell, hold, allocate, borrow, refinance, time, rebalance, or otherwise do with their specific money. "
+    "Also trash memes, low-signal posts, off-topic content, tax optimization requests tailored to one person, retirement planning requests tailored to one person, and anything that would require individualized financial advice or regulated recommendations. "
+    "Good opportunities usually let Wealthsimple participate by clarifying a product category, acknowledging platform friction, mentioning self-directed investing, managed investing, cash, transfers, fees, account types, or pointing the user toward general educational next steps without telling them what to do. "
+)
+DECISION_RULES = (
+    "decision must be exactly one of: move_to_opportunity_review, trash. "
+    "confidence must be a number between 0 and 1. "
+    "summary must be a short 1-2 sentence human-readable explanation of why this content is or is not a good engagement opportunity. "
+    "tags must be an array of short strings."
+)
+FILTER_INSTRUCTIONS = FILTER_GUIDANCE + "Return an object with keys: decision, confidence, reason, summary, tags. " + DECISION_RULES
+BATCH_FILTER_INSTRUCTIONS = (
+    FILTER_GUIDANCE
+    + "The input is an object whose items array holds several pieces of content, each with a content_id. "
+    "Judge every item on its own merits; do not let one item influence another. "
+    "Return an object with key decisions: an array with exactly one entry per input item, "
+    "each with keys: content_id, decision, confidence, reason, summary, tags. "
+    "content_id must be copied exactly from the input item. "
+    + DECISION_RULES
+)
 
-def build_input_text(item: dict[str, Any]) -> str:
+
+def build_input_payload(item: dict[str, Any]) -> dict[str, Any]:
     payload = item.get("raw_payload") or {}
     comments = payload.get("top_level_comments") or []
     compact_comments = []
@@ -25,51 +56,257 @@ def build_input_text(item: dict[str, Any]) -> str:
             }
         )
 
-    return json.dumps(
-        {
-            "source": item.get("source"),
-            "source_url": item.get("source_url"),
-            "title": item.get("title"),
-            "body_text": item.get("body_text"),
-            "subreddit": payload.get("subreddit"),
-            "score": payload.get("score"),
-            "num_comments": payload.get("num_comments"),
-            "top_level_comments": compact_comments,
-        },
-        ensure_ascii=True,
-    )
+    return {
+        "source": item.get("source"),
+        "source_url": item.get("source_url"),
+        "title": item.get("title"),
+        "body_text": item.get("body_text"),
+        "subreddit": payload.get("subreddit"),
+        "score": payload.get("score"),
+        "num_comments": payload.get("num_comments"),
+        "top_level_comments": compact_comments,
+    }
 
 
-def classify_item(llm: OpenAIResponsesClient, *, model: str, item: dict[str, Any]) -> dict[str, Any]:
-    instructions = (
-        "You are the filter agent for a Wealthsimple workflow. "
-        "Return JSON only. Decide whether content should move to opportunity review or be trashed. "
-        "You are not a financial advisor and this workflow is for product marketing and community engagement, not portfolio coaching. "
-        "Favor move_to_opportunity_review only for content clearly relevant to personal finance, investing basics, broker comparisons, product friction, transfer questions, account issues, platform choice, fees, account types, or adjacent Wealthsimple opportunities where a brand can respond safely. "
-        "Prefer trash for posts asking what the user should buy, sell, hold, allocate, borrow, refinance, time, rebalance, or otherwise do with their specific money. "
-        "Also trash memes, low-signal posts, off-topic content, tax optimization requests tailored to one person, retirement planning requests tailored to one person, and anything that would require individualized financial advice or regulated recommendations. "
-        "Good opportunities usually let Wealthsimple participate by clarifying a product category, acknowledging platform friction, mentioning self-directed investing, managed investing, cash, transfers, fees, account types, or pointing the user toward general educational next steps without telling them what to do. "
-        "Return an object with keys: decision, confidence, reason, summary, tags. "
-        "decision must be exactly one of: move_to_opportunity_review, trash. "
-        "confidence must be a number between 0 and 1. "
-        "summary must be a short 1-2 sentence human-readable explanation of why this content is or is not a good engagement opportunity. "
-        "tags must be an array of short strings."
-    )
-    result = llm.json_completion(model=model, instructions=instructions, input_text=build_input_text(item))
+def build_input_text(item: dict[str, Any]) -> str:
+    return json.dumps(build_input_payload(item), ensure_ascii=True)
+
+
+def validate_decision(result: Any) -> dict[str, Any]:
+    if not isinstance(result, dict):
+        raise AgentError("Filter decision was not an object")
     decision = result.get("decision")
-    if decision not in {"move_to_opportunity_review", "trash"}:
+    if decision not in FILTER_DECISIONS:
         raise AgentError(f"Unexpected filter decision: {decision}")
     confidence = result.get("confidence", 0)
     try:
         confidence = float(confidence)
     except (TypeError, ValueError) as exc:
         raise AgentError("Filter confidence was not numeric") from exc
+    tags = result.get("tags") or []
+    if not isinstance(tags, list):
+        raise AgentError("Filter tags were not an array")
     return {
         "decision": decision,
         "confidence": max(0.0, min(1.0, confidence)),
         "reason": str(result.get("reason") or ""),
         "summary": str(result.get("summary") or ""),
-        "tags": [str(tag) for tag in (result.get("tags") or [])][:10],
+        "tags": [str(tag) for tag in tags][:10],
+    }
+
+
+def is_retry(item: dict[str, Any]) -> bool:
+    """True for an item an earlier attempt failed on; its retry should not replay a cached answer."""
+    return bool(item.get("failure_count"))
+
+
+def classify_item(
+    llm: OpenAIResponsesClient,
+    *,
+    model: str,
+    item: dict[str, Any],
+    use_cache: bool = True,
+    tier: str = "fast",
+) -> dict[str, Any]:
+    return llm.json_completion(
+        model=model,
+        instructions=FILTER_INSTRUCTIONS,
+        input_text=build_input_text(item),
+        prompt_version=PROMPT_VERSION,
+        use_cache=use_cache,
+        tier=tier,
+        validate=validate_decision,
+    )
+
+
+@dataclass(slots=True)
+class ModelRouting:
+    fast_model: str
+    strong_model: str | None = None
+    escalate_below: float = 0.0
+
+
+def _routing_entry(model: str, decision: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "model": model,
+        "decision": decision["decision"],
+        "confidence": decision["confidence"],
+        "reason": decision["reason"],
+    }
+
+
+def escalate_if_uncertain(
+    llm: OpenAIResponsesClient, *, routing: ModelRouting, item: dict[str, Any], decision: dict[str, Any]
+) -> dict[str, Any]:
+    """Re-run a low-confidence fast-model decision on the strong model and record both.
+
+    If the strong model fails, the fast decision stands with the error noted.
+    """
+    fast = _routing_entry(routing.fast_model, decision)
+    if not routing.strong_model or decision["confidence"] >= routing.escalate_below:
+        return {**decision, "model": routing.fast_model, "routing": {"escalated": False, "fast": fast}}
+
+    route = {"escalated": True, "threshold": routing.escalate_below, "fast": fast}
+    try:
+        strong_decision = classify_item(
+            llm, model=routing.strong_model, item=item, use_cache=not is_retry(item), tier="strong"
+        )
+    except (AgentError, json.JSONDecodeError) as exc:
+        print(f"[warn] filter_agent escalation for {item.get('id')} failed; keeping fast decision: {exc}", file=sys.stderr)
+        return {**decision, "model": routing.fast_model, "routing": {**route, "error": str(exc)}}
+    route["strong"] = _routing_entry(routing.strong_model, strong_decision)
+    return {**strong_decision, "model": routing.strong_model, "routing": route}
+
+
+def classify_batch(
+    llm: OpenAIResponsesClient,
+    *,
+    model: str,
+    items: list[dict[str, Any]],
+    use_cache: bool = True,
+    tier: str = "fast",
+) -> dict[str, dict[str, Any]]:
+    """Classify several items in one request.
+
+    Returns validated decisions keyed by content id. Items the model skipped,
+    duplicated, or answered with a malformed decision are simply absent so the
+    caller can rerun them one at a time.
+    """
+    wanted = {str(item["id"]) for item in items}
+    return llm.json_completion(
+        model=model,
+        instructions=BATCH_FILTER_INSTRUCTIONS,
+        input_text=json.dumps(
+            {"items": [{"content_id": str(item["id"]), **build_input_payload(item)} for item in items]},
+            ensure_ascii=True,
+        ),
+        prompt_version=BATCH_PROMPT_VERSION,
+        use_cache=use_cache,
+        tier=tier,
+        validate=lambda result: validate_batch(result, wanted),
+    )
+
+
+def validate_batch(result: Any, wanted: set[str]) -> dict[str, dict[str, Any]]:
+    """Validated decisions keyed by content id; raises when the answer holds none, so it is not cached."""
+    raw_decisions = result.get("decisions") if isinstance(result, dict) else None
+    if isinstance(raw_decisions, dict):
+        entries = [{**value, "content_id": key} for key, value in raw_decisions.items() if isinstance(value, dict)]
+    elif isinstance(raw_decisions, list):
+        entries = [entry for entry in raw_decisions if isinstance(entry, dict)]
+    else:
+        raise AgentError("Batch filter response did not contain a decisions array")
+
+    decisions: dict[str, dict[str, Any]] = {}
+    seen: set[str] = set()
+    for entry in entries:
+        content_id = str(entry.get("content_id") or "")
+        if content_id not in wanted:
+            continue
+        if content_id in seen:
+            # Conflicting answers for one item: trust neither.
+            decisions.pop(content_id, None)
+            continue
+        seen.add(content_id)
+        try:
+            decisions[content_id] = validate_decision(entry)
+        except AgentError:
+            continue
+    if not decisions:
+        raise AgentError("Batch filter response held no valid decision")
+    return decisions
+
+
+def pack_batches(
+    items: list[dict[str, Any]], *, max_items: int, token_budget: int
+) -> list[list[dict[str, Any]]]:
+    """Greedily group items into batches of at most `max_items` and `token_budget` input tokens."""
+    batches: list[list[dict[str, Any]]] = []
+    current: list[dict[str, Any]] = []
+    current_tokens = 0
+    for item in items:
+        tokens = estimate_tokens(build_input_text(item))
+        if current and (len(current) >= max_items or current_tokens + tokens > token_budget):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def classify_chunk(
+    llm: OpenAIResponsesClient, *, routing: ModelRouting, chunk: list[dict[str, Any]]
+) -> list[tuple[dict[str, Any], dict[str, Any] | None, Exception | None, bool]]:
+    """Classify a packed batch on the fast model, rerunning anything the batch answer
+    missed individually and escalating low-confidence decisions to the strong model.
+
+    Items that failed before skip the cache read, so a retry always asks the model again.
+    Returns `(item, decision, error, fell_back)` for every item in the chunk.
+    """
+    model = routing.fast_model
+    decisions: dict[str, dict[str, Any]] = {}
+    if len(chunk) > 1:
+        try:
+            decisions = classify_batch(llm, model=model, items=chunk, use_cache=not any(map(is_retry, chunk)))
+        except (AgentError, json.JSONDecodeError) as exc:
+            print(f"[warn] filter_agent batch of {len(chunk)} failed; retrying individually: {exc}", file=sys.stderr)
+
+    outcomes = []
+    for item in chunk:
+        decision = decisions.get(str(item["id"]))
+        fell_back = decision is None and len(chunk) > 1
+        try:
+            if decision is None:
+                decision = classify_item(llm, model=model, item=item, use_cache=not is_retry(item))
+            decision = escalate_if_uncertain(llm, routing=routing, item=item, decision=decision)
+            outcomes.append((item, decision, None, fell_back))
+        except (AgentError, json.JSONDecodeError) as exc:
+            outcomes.append((item, None, exc, fell_back))
+    return outcomes
+
+
+def load_pre_classifier(env: dict[str, str]) -> PreClassifier | None:
+    if (get_env_var(env, "FILTER_PRECLASSIFIER", "on") or "on").lower() in {"0", "off", "false"}:
+        return None
+    path = Path(get_env_var(env, "FILTER_PRECLASSIFIER_PATH", str(Path(__file__).resolve().parents[1] / "pre_classifier.json")))
+    if not path.exists():
+        return None
+    return PreClassifier.load(path)
+
+
+def review_capacity(
+    db_api: DBAPIClient, *, target_depth: int, partition_index: int = 0, partition_count: int = 1
+) -> int | None:
+    """This worker's share of the free slots below the opportunity_review target depth,
+    or None when back-pressure is off.
+
+    Supervised workers split the free slots evenly, with the remainder going to
+    partition 0, so together they never overfill the queue. If the depth cannot be
+    read, report no capacity so moves are deferred, never lost.
+    """
+    if target_depth <= 0:
+        return None
+    try:
+        depths = db_api.get("/v1/queues/depths", params={"states": "opportunity_review"})["depths"]
+        depth = int(depths["opportunity_review"])
+    except (AgentError, KeyError, TypeError, ValueError) as exc:
+        print(f"[warn] filter_agent could not read opportunity_review depth; deferring moves: {exc}", file=sys.stderr)
+        return 0
+    free = max(0, target_depth - depth)
+    share, remainder = divmod(free, max(1, partition_count))
+    return share + (remainder if partition_index == 0 else 0)
+
+
+def deferred_move(item: dict[str, Any]) -> dict[str, Any]:
+    """The move decision for an item the filter already approved but held back."""
+    return {
+        "decision": "move_to_opportunity_review",
+        "confidence": item.get("ai_confidence"),
+        "reason": "Deferred move released: opportunity_review is below its target depth.",
+        "summary": item.get("agent_summary") or "",
+        "tags": ["deferred"],
     }
 
 
@@ -77,51 +314,167 @@ def cycle_factory() -> callable:
     runtime_config = load_runtime_config()
     env = load_agent_env()
     model = env.get("FILTER_AGENT_MODEL", "gpt-4o-mini")
+    routing = ModelRouting(
+        fast_model=model,
+        strong_model=get_env_var(env, "FILTER_AGENT_STRONG_MODEL") or None,
+        escalate_below=float(get_env_var(env, "FILTER_AGENT_ESCALATE_BELOW", "0.7") or "0.7"),
+    )
+    batch_size = max(1, int(get_env_var(env, "FILTER_AGENT_BATCH_SIZE", "5") or "5"))
+    batch_token_budget = max(1, int(get_env_var(env, "FILTER_AGENT_BATCH_TOKEN_BUDGET", "6000") or "6000"))
+    input_token_budget = int(get_env_var(env, "FILTER_AGENT_INPUT_TOKEN_BUDGET", "1500") or "1500")
+    pre_classifier = load_pre_classifier(env)
+    move_above = float(get_env_var(env, "FILTER_PRECLASSIFIER_MOVE_ABOVE", "0.97") or "0.97")
+    trash_below = float(get_env_var(env, "FILTER_PRECLASSIFIER_TRASH_BELOW", "0.05") or "0.05")
+    review_target_depth = int(get_env_var(env, "FILTER_AGENT_REVIEW_TARGET_DEPTH", "50") or "50")
     db_api = DBAPIClient(runtime_config)
     llm = OpenAIResponsesClient(runtime_config)
 
-    def cycle(*, limit: int) -> None:
+    def cycle(*, limit: int, batch: bool = False) -> None:
         queue = db_api.get_queue("/v1/queues/ingested", limit=limit)
         items = queue.get("items", [])
-        stats = {"processed": 0, "moved": 0, "trashed": 0, "errors": 0}
-        moves_remaining = MAX_MOVES_PER_CYCLE
+        stats = {
+            "fetched": len(items),
+            "processed": 0,
+            "moved": 0,
+            "trashed": 0,
+            "deferred": 0,
+            "drained": 0,
+            "errors": 0,
+            "quarantined": 0,
+            "provider_paused": 0,
+            "pre_classified": 0,
+            "input_tokens_saved": 0,
+            "llm_batches": 0,
+            "batch_fallbacks": 0,
+        }
+        capacity = review_capacity(
+            db_api,
+            target_depth=review_target_depth,
+            partition_index=runtime_config.partition_index,
+            partition_count=runtime_config.partition_count,
+        )
+        if capacity is not None:
+            stats["review_capacity"] = capacity
 
-        for item in items:
+        def record(
+            item_id: str,
+            decision: dict[str, Any] | None,
+            error: Exception | None,
+            *,
+            actor_label: str = "filter-agent",
+            drained: bool = False,
+        ) -> None:
+            nonlocal capacity
             try:
-                decision = classify_item(llm, model=model, item=item)
+                if error is not None:
+                    raise error
                 decision_value = decision["decision"]
-                if decision_value == "move_to_opportunity_review" and moves_remaining <= 0:
-                    decision_value = "trash"
-                    decision["reason"] = (
-                        "move_limit_reached_for_cycle; deferred by filter-agent operating cap"
-                    )
-                    decision["tags"] = [*decision["tags"], "move-limit-reached"][:10]
+                if decision_value == "move_to_opportunity_review" and capacity is not None and capacity <= 0:
+                    decision_value = "defer"
 
                 db_api.post(
-                    f"/v1/queues/ingested/{item['id']}/classify",
+                    f"/v1/queues/ingested/{item_id}/classify",
                     {
                         "decision": decision_value,
                         "actor": "agent",
-                        "actor_label": "filter-agent",
+                        "actor_label": actor_label,
                         "details": {
                             "confidence": decision["confidence"],
                             "reason": decision["reason"],
                             "summary": decision["summary"],
                             "tags": decision["tags"],
+                            **{key: decision[key] for key in ("model", "routing") if key in decision},
                         },
                         "reason": decision["reason"] if decision_value == "trash" else None,
                     },
                 )
+                if decision_value == "move_to_opportunity_review" and capacity is not None:
+                    capacity -= 1
+                if drained:
+                    stats["drained"] += int(decision_value != "defer")
+                    return
                 stats["processed"] += 1
                 if decision_value == "trash":
                     stats["trashed"] += 1
+                elif decision_value == "defer":
+                    stats["deferred"] += 1
                 else:
                     stats["moved"] += 1
-                    moves_remaining -= 1
+            except ProviderUnavailableError:
+                stats["provider_paused"] += 1
             except Exception as exc:
                 stats["errors"] += 1
-                print(f"[error] filter_agent item {item.get('id')}: {exc}", file=sys.stderr)
+                print(f"[error] filter_agent item {item_id}: {exc}", file=sys.stderr)
+                if report_item_failure(
+                    db_api, queue="ingested", item_id=item_id, error=exc, actor_label="filter-agent"
+                ):
+                    stats["quarantined"] += 1
+
+        if capacity != 0:
+            deferred = db_api.get_queue(
+                "/v1/queues/ingested", limit=min(limit, capacity or limit), params={"deferred": "true"}
+            )
+            for item in deferred.get("items", []):
+                record(item["id"], deferred_move(item), None, actor_label="filter-agent/back-pressure", drained=True)
+
+        if pre_classifier is not None:
+            escalated = []
+            for item in items:
+                decision = local_decision(pre_classifier, item, move_above=move_above, trash_below=trash_below)
+                if decision is None:
+                    escalated.append(item)
+                    continue
+                stats["pre_classified"] += 1
+                record(item["id"], decision, None, actor_label=f"{PRE_CLASSIFIER_LABEL}:{pre_classifier.version}")
+            items = escalated
+
+        fitted_items = []
+        for item in items:
+            fitted, saved = fit_item_to_budget(item, max_tokens=input_token_budget)
+            fitted_items.append(fitted)
+            stats["input_tokens_saved"] += saved
+        items = fitted_items
+
+        if batch:
+            items_by_id = {str(item["id"]): item for item in items}
+            requests = [
+                BatchRequest(
+                    custom_id=str(item["id"]),
+                    model=model,
+                    instructions=FILTER_INSTRUCTIONS,
+                    input_text=build_input_text(item),
+                )
+                for item in items
+            ]
+            for item_id, result, error in OpenAIBatchRunner(runtime_config, name="filter_agent").run(requests):
+                decision = None
+                if error is None:
+                    try:
+                        decision = validate_decision(result)
+                        if item_id in items_by_id:
+                            decision = escalate_if_uncertain(
+                                llm, routing=routing, item=items_by_id[item_id], decision=decision
+                            )
+                    except AgentError as exc:
+                        error = exc
+                record(item_id, decision, error)
+        else:
+            chunks = pack_batches(items, max_items=batch_size, token_budget=batch_token_budget)
+            classified = map_concurrently(
+                lambda chunk: classify_chunk(llm, routing=routing, chunk=chunk),
+                chunks,
+                max_in_flight=runtime_config.max_in_flight,
+            )
+            for chunk, outcomes, chunk_error in classified:
+                if len(chunk) > 1:
+                    stats["llm_batches"] += 1
+                if chunk_error is not None:
+                    outcomes = [(item, None, chunk_error, False) for item in chunk]
+                for item, decision, error, fell_back in outcomes:
+                    stats["batch_fallbacks"] += int(fell_back)
+                    record(item["id"], decision, error)
 
+        stats.update(llm.take_stats())
         print(json.dumps(stats))
         return stats
 
@@ -129,9 +482,15 @@ def cycle_factory() -> callable:
 
 
 def main() -> int:
-    args = parse_common_args("Filter ingested queue items and classify them.")
+    args = parse_common_args("Filter ingested queue items and classify them.", batch_mode=True, workers=True)
+    if args.workers > 1 and not args.batch:
+        return run_supervisor(script=Path(__file__), workers=args.workers)
     runtime_config, cycle = cycle_factory()
-    return run_loop(args=args, runtime_config=runtime_config, cycle_fn=cycle)
+    if args.batch:
+        cycle(limit=args.limit, batch=True)
+        return 0
+    wake = QueueWakeHook(DBAPIClient(runtime_config), "ingested")
+    return run_loop(args=args, runtime_config=runtime_config, cycle_fn=cycle, wake=wake)
 
 
 if __name__ == "__main__":
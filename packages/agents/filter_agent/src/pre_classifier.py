@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from itertools import pairwise
+from pathlib import Path
+from typing import Any
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9$%']+")
+MOVE_DECISION = "move_to_opportunity_review"
+TRASH_DECISION = "trash"
+PRE_CLASSIFIER_LABEL = "filter-agent/pre-classifier"
+
+
+def _bucket(feature: str, n_features: int) -> tuple[int, float]:
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "big")
+    return value % n_features, 1.0 if value >> 63 else -1.0
+
+
+def hashed_features(item: dict[str, Any], *, n_features: int) -> dict[int, float]:
+    """Signed hashed word unigrams and bigrams of title + body, L2-normalised.
+
+    Title words and the subreddit get their own namespaces because a meme title or a
+    particular community says more about the decision than the same word in the body.
+    """
+    payload = item.get("raw_payload") or {}
+    subreddit = item.get("subreddit") or payload.get("subreddit")
+    title_tokens = TOKEN_PATTERN.findall(str(item.get("title") or "").lower())
+    tokens = title_tokens + TOKEN_PATTERN.findall(str(item.get("body_text") or "").lower())
+
+    counts: dict[str, int] = {}
+    features = [f"w:{token}" for token in tokens]
+    features += [f"b:{left} {right}" for left, right in pairwise(tokens)]
+    features += [f"t:{token}" for token in title_tokens]
+    if subreddit:
+        features.append(f"sr:{str(subreddit).lower()}")
+    for feature in features:
+        counts[feature] = counts.get(feature, 0) + 1
+
+    vector: dict[int, float] = {}
+    for feature, count in counts.items():
+        index, sign = _bucket(feature, n_features)
+        vector[index] = vector.get(index, 0.0) + sign * (1.0 + math.log(count))
+    norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+    return {index: value / norm for index, value in vector.items() if value}
+
+
+def _sigmoid(value: float) -> float:
+    if value >= 0:
+        return 1.0 / (1.0 + math.exp(-value))
+    exp_value = math.exp(value)
+    return exp_value / (1.0 + exp_value)
+
+
+@dataclass(slots=True)
+class PreClassifier:
+    """Logistic regression over hashed n-grams giving P(move_to_opportunity_review)."""
+
+    n_features: int = 2**18
+    bias: float = 0.0
+    weights: dict[int, float] = field(default_factory=dict)
+    version: str = ""
+    trained_examples: int = 0
+
+    def predict_move_probability(self, item: dict[str, Any]) -> float:
+        vector = hashed_features(item, n_features=self.n_features)
+        return _sigmoid(self.bias + sum(self.weights.get(index, 0.0) * value for index, value in vector.items()))
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {
+                    "n_features": self.n_features,
+                    "bias": self.bias,
+                    "version": self.version,
+                    "trained_examples": self.trained_examples,
+                    "weights": {str(index): round(weight, 6) for index, weight in self.weights.items() if weight},
+                }
+            ),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> PreClassifier:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return cls(
+            n_features=int(data["n_features"]),
+            bias=float(data["bias"]),
+            weights={int(index): float(weight) for index, weight in data["weights"].items()},
+            version=str(data.get("version") or ""),
+            trained_examples=int(data.get("trained_examples") or 0),
+        )
+
+
+def train(
+    examples: list[tuple[dict[str, Any], str]],
+    *,
+    n_features: int = 2**18,
+    epochs: int = 8,
+    learning_rate: float = 0.5,
+    l2: float = 1e-6,
+    seed: int = 7,
+) -> PreClassifier:
+    """Fit class-balanced logistic regression with plain SGD on sparse vectors."""
+    rows = [
+        (hashed_features(item, n_features=n_features), 1.0 if decision == MOVE_DECISION else 0.0)
+        for item, decision in examples
+    ]
+    positives = sum(label for _, label in rows)
+    negatives = len(rows) - positives
+    class_weight = {
+        1.0: len(rows) / (2 * positives) if positives else 1.0,
+        0.0: len(rows) / (2 * negatives) if negatives else 1.0,
+    }
+
+    model = PreClassifier(n_features=n_features, trained_examples=len(rows))
+    weights = model.weights
+    rng = random.Random(seed)
+    for epoch in range(epochs):
+        rng.shuffle(rows)
+        rate = learning_rate / math.sqrt(1 + epoch)
+        for vector, label in rows:
+            margin = model.bias + sum(weights.get(index, 0.0) * value for index, value in vector.items())
+            gradient = (_sigmoid(margin) - label) * class_weight[label]
+            model.bias -= rate * gradient
+            for index, value in vector.items():
+                weight = weights.get(index, 0.0)
+                weights[index] = weight - rate * (gradient * value + l2 * weight)
+
+    model.version = f"{time.strftime('%Y%m%d', time.gmtime())}-{len(rows)}"
+    return model
+
+
+def evaluate(
+    model: PreClassifier,
+    examples: list[tuple[dict[str, Any], str]],
+    *,
+    move_above: float,
+    trash_below: float,
+) -> dict[str, Any]:
+    """Accuracy overall, plus how many items the thresholds decide locally and how well."""
+    correct = local = local_correct = 0
+    for item, decision in examples:
+        probability = model.predict_move_probability(item)
+        predicted = MOVE_DECISION if probability >= 0.5 else TRASH_DECISION
+        correct += predicted == decision
+        if probability >= move_above or probability <= trash_below:
+            local += 1
+            local_correct += predicted == decision
+    total = len(examples)
+    return {
+        "examples": total,
+        "accuracy": round(correct / total, 4) if total else None,
+        "local_coverage": round(local / total, 4) if total else None,
+        "local_accuracy": round(local_correct / local, 4) if local else None,
+    }
+
+
+def local_decision(
+    model: PreClassifier, item: dict[str, Any], *, move_above: float, trash_below: float
+) -> dict[str, Any] | None:
+    """A filter decision when the model is confident enough, otherwise None to escalate."""
+    probability = model.predict_move_probability(item)
+    if probability >= move_above:
+        decision, confidence = MOVE_DECISION, probability
+    elif probability <= trash_below:
+        decision, confidence = TRASH_DECISION, 1.0 - probability
+    else:
+        return None
+    return {
+        "decision": decision,
+        "confidence": round(confidence, 4),
+        "reason": f"local pre-classifier {model.version}: p(move)={probability:.4f}",
+        "summary": "Decided by the local pre-classifier without an LLM call.",
+        "tags": ["pre-classified"],
+    }
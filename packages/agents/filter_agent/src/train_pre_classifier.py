@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from pre_classifier import PRE_CLASSIFIER_LABEL, evaluate, train
+from shared_utils import DBAPIClient, load_runtime_config
+
+DEFAULT_MODEL_PATH = Path(__file__).resolve().parents[1] / "pre_classifier.json"
+
+
+def fetch_examples(db_api: DBAPIClient, *, page_size: int, max_examples: int) -> list[tuple[dict[str, Any], str]]:
+    """Latest LLM or human classification per content item, skipping the pre-classifier's own labels.
+
+    Pages newest-first, so the first decision seen for an item is its latest and a capped
+    run trains on the most recent history.
+    """
+    latest: dict[str, tuple[dict[str, Any], str]] = {}
+    params: dict[str, Any] = {"limit": page_size, "newest_first": "true"}
+    while len(latest) < max_examples:
+        page = db_api.get("/v1/transactions/classified", params=params)
+        for row in page.get("items", []):
+            if str(row.get("actor_label") or "").startswith(PRE_CLASSIFIER_LABEL):
+                continue
+            content_id = str(row["content_id"])
+            if content_id in latest:
+                continue
+            latest[content_id] = (row, row["decision"])
+            if len(latest) >= max_examples:
+                break
+        if page.get("next_before_id") is None:
+            break
+        params["before_id"] = int(page["next_before_id"])
+    return list(latest.values())[::-1]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Train the filter agent's local pre-classifier from classification history.")
+    parser.add_argument("--output", type=str, default=str(DEFAULT_MODEL_PATH))
+    parser.add_argument("--max-examples", type=int, default=50000)
+    parser.add_argument("--min-examples", type=int, default=200, help="Refuse to save a model trained on fewer examples.")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction of examples held out for the report.")
+    parser.add_argument("--epochs", type=int, default=8)
+    parser.add_argument("--move-above", type=float, default=0.97)
+    parser.add_argument("--trash-below", type=float, default=0.05)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    runtime_config = load_runtime_config()
+    examples = fetch_examples(DBAPIClient(runtime_config), page_size=1000, max_examples=args.max_examples)
+    random.Random(7).shuffle(examples)
+    holdout_size = int(len(examples) * args.holdout)
+    holdout, training = examples[:holdout_size], examples[holdout_size:]
+
+    model = train(training, epochs=args.epochs)
+    report = {
+        "version": model.version,
+        "trained_examples": len(training),
+        "holdout": evaluate(model, holdout, move_above=args.move_above, trash_below=args.trash_below),
+    }
+    if len(training) < args.min_examples:
+        report["saved"] = False
+        print(json.dumps(report))
+        print(f"[error] only {len(training)} training examples; need {args.min_examples}", file=sys.stderr)
+        return 1
+
+    model.save(Path(args.output))
+    report["saved"] = args.output
+    print(json.dumps(report))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,163 @@
+# Kept identical to the copy in the other package: each Docker image copies only its own package.
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from fastapi import APIRouter, HTTPException
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_JOB_STATUSES = {"queued", "running"}
+
+
+@dataclass(slots=True)
+class Job:
+    id: str
+    key: str
+    cycles: int
+    params: dict[str, Any]
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    results: list[Any] = field(default_factory=list)
+    error: str | None = None
+    cancel_requested: bool = False
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "agent": self.key,
+            "status": self.status,
+            "params": self.params,
+            "cycles_requested": self.cycles,
+            "cycles_completed": len(self.results),
+            "cancel_requested": self.cancel_requested,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "results": list(self.results),
+            "error": self.error,
+        }
+
+
+class JobRunner:
+    """Runs `/run` requests on background threads so the HTTP call returns a job id at once.
+
+    At most one job per key is queued or running; submitting again returns that job
+    instead of starting an overlapping run. Cancelling is cooperative: the job stops
+    before its next cycle, never in the middle of one. Jobs live in this process only
+    and the newest `max_finished` finished jobs are kept for polling.
+    """
+
+    def __init__(self, *, max_concurrent: int = 1, max_finished: int = 100) -> None:
+        self.max_finished = max(1, max_finished)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_concurrent), thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs: dict[str, Job] = {}
+
+    def submit(
+        self, key: str, run_cycle: Callable[[], Any], *, cycles: int, params: dict[str, Any] | None = None
+    ) -> tuple[dict[str, Any], bool]:
+        """Queue `cycles` calls of `run_cycle`; returns (job, created) where created is False for a duplicate."""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.key == key and job.status in ACTIVE_JOB_STATUSES:
+                    return job.to_dict(), False
+            job = Job(id=uuid.uuid4().hex, key=key, cycles=cycles, params=dict(params or {}))
+            self._jobs[job.id] = job
+            self._prune()
+            snapshot = job.to_dict()
+        self._executor.submit(self._run, job, run_cycle)
+        return snapshot, True
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def list_jobs(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [job.to_dict() for job in sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)]
+
+    def cancel(self, job_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status == "queued":
+                job.status = "cancelled"
+                job.finished_at = time.time()
+            elif job.status == "running":
+                job.cancel_requested = True
+            return job.to_dict()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for job in self._jobs.values():
+                if job.status in ACTIVE_JOB_STATUSES:
+                    job.cancel_requested = True
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _run(self, job: Job, run_cycle: Callable[[], Any]) -> None:
+        with self._lock:
+            if job.status != "queued":
+                return
+            job.status = "running"
+            job.started_at = time.time()
+        status, error = "succeeded", None
+        try:
+            for _ in range(job.cycles):
+                with self._lock:
+                    if job.cancel_requested:
+                        status = "cancelled"
+                        break
+                result = run_cycle()
+                with self._lock:
+                    job.results.append(result)
+        except Exception as exc:
+            # A job thread is the last stop for a cycle's error: record it on the job for pollers.
+            status, error = "failed", f"{type(exc).__name__}: {exc}"
+            logger.exception("job %s (%s) failed", job.id, job.key)
+        with self._lock:
+            job.status = status
+            job.error = error
+            job.finished_at = time.time()
+
+    def _prune(self) -> None:
+        finished = [job for job in self._jobs.values() if job.status not in ACTIVE_JOB_STATUSES]
+        finished.sort(key=lambda job: job.finished_at or job.created_at)
+        for job in finished[: max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.id]
+
+
+def job_routes(runner: JobRunner) -> APIRouter:
+    """The `/jobs` polling and cancel endpoints over `runner`, for an app to `include_router`."""
+    router = APIRouter()
+
+    @router.get("/jobs")
+    def list_jobs() -> dict[str, Any]:
+        return {"items": runner.list_jobs()}
+
+    @router.get("/jobs/{job_id}")
+    def get_job(job_id: str) -> dict[str, Any]:
+        job = runner.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
+
+    @router.delete("/jobs/{job_id}")
+    def cancel_job(job_id: str) -> dict[str, Any]:
+        job = runner.cancel(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
+
+    return router
@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+def _input_object(body: dict[str, Any]) -> Any:
+    text = str(body.get("input") or "")
+    _, _, payload = text.partition("\n\n")
+    try:
+        return json.loads(payload or text)
+    except ValueError:
+        return {}
+
+
+def _stable_fraction(value: Any) -> float:
+    digest = hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64
+
+
+def _filter_decision(item: Any) -> dict[str, Any]:
+    score = _stable_fraction(item)
+    decision = "move_to_opportunity_review" if score >= 0.5 else "trash"
+    return {
+        "decision": decision,
+        "confidence": round(0.5 + abs(score - 0.5), 3),
+        "reason": "mock decision",
+        "summary": "Deterministic mock classification.",
+        "tags": ["mock"],
+    }
+
+
+def mock_output(body: dict[str, Any]) -> dict[str, Any]:
+    """Deterministic JSON answer for an agent prompt, chosen from the keys its instructions ask for."""
+    instructions = str(body.get("instructions") or "")
+    payload = _input_object(body)
+    if "key decisions" in instructions and isinstance(payload, dict):
+        return {
+            "decisions": [
+                {"content_id": item.get("content_id"), **_filter_decision(item)}
+                for item in payload.get("items", [])
+                if isinstance(item, dict)
+            ]
+        }
+    if "draft_text" in instructions:
+        title = payload.get("title") if isinstance(payload, dict) else None
+        return {
+            "draft_text": f"Mock draft reply about {title or 'this post'}.",
+            "safety_flags": {"financial_advice": False, "compliance_review_needed": False},
+            "rationale": "mock draft",
+        }
+    return _filter_decision(payload)
+
+
+def mock_response(body: dict[str, Any], *, cached_tokens: int = 0) -> dict[str, Any]:
+    text = json.dumps(mock_output(body))
+    input_tokens = (len(str(body.get("instructions") or "")) + len(str(body.get("input") or ""))) // 4
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "status": "completed",
+        "model": body.get("model"),
+        "output": [{"type": "message", "role": "assistant", "content": [{"type": "output_text", "text": text}]}],
+        "usage": {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": min(cached_tokens, input_tokens)},
+            "output_tokens": len(text) // 4,
+        },
+    }
+
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "exponential")
+CACHE_INCREMENT_TOKENS = 128
+
+
+class MockOpenAIState:
+    """In-memory stand-in for the Responses and Batch endpoints the agents call.
+
+    Each request waits for a latency drawn from `latency_distribution` around
+    `latency_seconds` (`jitter_seconds` is the half-width for uniform and the standard
+    deviation for normal). `/v1/responses` calls fail with a 429 carrying `Retry-After`
+    at `rate_limit_rate` and with a 500 at `error_rate`. A seeded RNG makes a run's
+    latencies and faults repeatable. Like the real provider, a prompt prefix of at least
+    `cache_min_tokens` is reported as cached, in 128-token steps, once it has been seen.
+    """
+
+    def __init__(
+        self,
+        *,
+        completion_delay_seconds: float = 2.0,
+        latency_seconds: float = 0.0,
+        latency_distribution: str = "fixed",
+        jitter_seconds: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after_seconds: float = 1.0,
+        cache_min_tokens: int = 1024,
+        seed: int | None = None,
+    ) -> None:
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency_distribution must be one of {', '.join(LATENCY_DISTRIBUTIONS)}")
+        self.completion_delay_seconds = max(0.0, completion_delay_seconds)
+        self.latency_seconds = max(0.0, latency_seconds)
+        self.latency_distribution = latency_distribution
+        self.jitter_seconds = max(0.0, jitter_seconds)
+        self.error_rate = min(1.0, max(0.0, error_rate))
+        self.rate_limit_rate = min(1.0, max(0.0, rate_limit_rate))
+        self.retry_after_seconds = max(0.0, retry_after_seconds)
+        self.cache_min_tokens = max(0, cache_min_tokens)
+        self.files: dict[str, bytes] = {}
+        self.batches: dict[str, dict[str, Any]] = {}
+        self.requests = 0
+        self.responses = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.cached_tokens = 0
+        self._prefixes: set[str] = set()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample_latency(self) -> float:
+        with self._lock:
+            if self.latency_distribution == "uniform":
+                latency = self._random.uniform(
+                    self.latency_seconds - self.jitter_seconds, self.latency_seconds + self.jitter_seconds
+                )
+            elif self.latency_distribution == "normal":
+                latency = self._random.gauss(self.latency_seconds, self.jitter_seconds)
+            elif self.latency_distribution == "exponential" and self.latency_seconds:
+                latency = self._random.expovariate(1 / self.latency_seconds)
+            else:
+                latency = self.latency_seconds
+        return max(0.0, latency)
+
+    def inject_fault(self) -> int | None:
+        """Status code to fail this `/v1/responses` call with, or None to answer it."""
+        with self._lock:
+            roll = self._random.random()
+            if roll < self.rate_limit_rate:
+                self.rate_limited += 1
+                return 429
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.errors += 1
+                return 500
+            self.responses += 1
+            return None
+
+    def respond(self, body: dict[str, Any]) -> dict[str, Any]:
+        prefix = f"{body.get('model')}\0{body.get('instructions') or ''}"
+        prefix_tokens = len(str(body.get("instructions") or "")) // 4
+        cached = 0
+        with self._lock:
+            if prefix_tokens >= self.cache_min_tokens and prefix in self._prefixes:
+                cached = prefix_tokens // CACHE_INCREMENT_TOKENS * CACHE_INCREMENT_TOKENS
+                self.cached_tokens += cached
+            self._prefixes.add(prefix)
+        return mock_response(body, cached_tokens=cached)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "responses": self.responses,
+                "rate_limited": self.rate_limited,
+                "errors": self.errors,
+                "cached_tokens": self.cached_tokens,
+            }
+
+    def add_file(self, content: bytes) -> dict[str, Any]:
+        file_id = f"file-{uuid.uuid4().hex}"
+        with self._lock:
+            self.files[file_id] = content
+        return {"id": file_id, "object": "file", "bytes": len(content), "purpose": "batch"}
+
+    def create_batch(self, body: dict[str, Any]) -> dict[str, Any] | None:
+        if body.get("input_file_id") not in self.files:
+            return None
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        batch = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body.get("endpoint"),
+            "input_file_id": body["input_file_id"],
+            "completion_window": body.get("completion_window"),
+            "status": "in_progress",
+            "created_at": time.time(),
+            "output_file_id": None,
+            "error_file_id": None,
+        }
+        with self._lock:
+            self.batches[batch_id] = batch
+        return dict(batch)
+
+    def get_batch(self, batch_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            batch = self.batches.get(batch_id)
+            if batch is None:
+                return None
+            if batch["status"] == "in_progress" and time.time() - batch["created_at"] >= self.completion_delay_seconds:
+                self._complete(batch)
+            return dict(batch)
+
+    def _complete(self, batch: dict[str, Any]) -> None:
+        lines = []
+        for raw_line in self.files[batch["input_file_id"]].decode("utf-8").splitlines():
+            if not raw_line.strip():
+                continue
+            request = json.loads(raw_line)
+            lines.append(
+                json.dumps(
+                    {
+                        "id": f"batch_req_{uuid.uuid4().hex}",
+                        "custom_id": request.get("custom_id"),
+                        "response": {"status_code": 200, "body": mock_response(request.get("body") or {})},
+                        "error": None,
+                    }
+                )
+            )
+        output_id = f"file-{uuid.uuid4().hex}"
+        self.files[output_id] = ("\n".join(lines) + "\n").encode("utf-8")
+        batch["status"] = "completed"
+        batch["output_file_id"] = output_id
+        batch["completed_at"] = time.time()
+
+
+def _multipart_file(content_type: str, body: bytes) -> bytes | None:
+    boundary = content_type.partition("boundary=")[2].strip('"')
+    if not boundary:
+        return None
+    for part in body.split(f"--{boundary}".encode()):
+        headers, _, content = part.partition(b"\r\n\r\n")
+        if b'name="file"' in headers:
+            return content[:-2] if content.endswith(b"\r\n") else content
+    return None
+
+
+def make_handler(state: MockOpenAIState) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(
+            self,
+            status: int,
+            payload: Any,
+            *,
+            content_type: str = "application/json",
+            headers: dict[str, str] | None = None,
+        ) -> None:
+            body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _begin(self) -> bytes:
+            with state._lock:
+                state.requests += 1
+            latency = state.sample_latency()
+            if latency:
+                time.sleep(latency)
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def do_GET(self) -> None:
+            self._begin()
+            parts = self.path.strip("/").split("/")
+            if parts[:2] == ["v1", "batches"] and len(parts) == 3:
+                batch = state.get_batch(parts[2])
+                if batch is None:
+                    self._send(404, {"error": {"message": "No such batch"}})
+                else:
+                    self._send(200, batch)
+            elif parts[:2] == ["v1", "files"] and len(parts) == 4 and parts[3] == "content":
+                content = state.files.get(parts[2])
+                if content is None:
+                    self._send(404, {"error": {"message": "No such file"}})
+                else:
+                    self._send(200, content, content_type="application/jsonl")
+            elif self.path == "/health":
+                self._send(200, {"status": "ok"})
+            else:
+                self._send(404, {"error": {"message": "Not Found"}})
+
+        def do_POST(self) -> None:
+            raw = self._begin()
+            if self.path == "/v1/responses":
+                status = state.inject_fault()
+                if status == 429:
+                    self._send(
+                        429,
+                        {"error": {"type": "rate_limit_exceeded", "message": "Mock rate limit"}},
+                        headers={"Retry-After": f"{state.retry_after_seconds:g}"},
+                    )
+                elif status is not None:
+                    self._send(status, {"error": {"type": "server_error", "message": "Mock server error"}})
+                else:
+                    self._send(200, state.respond(json.loads(raw or b"{}")))
+            elif self.path == "/v1/files":
+                content = _multipart_file(self.headers.get("Content-Type") or "", raw)
+                if content is None:
+                    self._send(400, {"error": {"message": "Expected a multipart file upload"}})
+                else:
+                    self._send(200, state.add_file(content))
+            elif self.path == "/v1/batches":
+                batch = state.create_batch(json.loads(raw or b"{}"))
+                if batch is None:
+                    self._send(400, {"error": {"message": "Unknown input_file_id"}})
+                else:
+                    self._send(200, batch)
+            else:
+                self._send(404, {"error": {"message": "Not Found"}})
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return
+
+    return Handler
+
+
+def start_mock_openai_server(state: MockOpenAIState, *, port: int = 0) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the OpenAI Responses and Batch APIs.")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--completion-delay-seconds", type=float, default=2.0)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mean (or fixed) latency per request.")
+    parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Half-width for uniform, standard deviation for normal.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of /v1/responses calls that return 500.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of /v1/responses calls that return 429.")
+    parser.add_argument("--retry-after-seconds", type=float, default=1.0)
+    parser.add_argument("--cache-min-tokens", type=int, default=1024)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    state = MockOpenAIState(
+        completion_delay_seconds=args.completion_delay_seconds,
+        latency_seconds=args.latency_ms / 1000,
+        latency_distribution=args.latency_distribution,
+        jitter_seconds=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after_seconds=args.retry_after_seconds,
+        cache_min_tokens=args.cache_min_tokens,
+        seed=args.seed,
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(state))
+    print(f"mock OpenAI API listening on http://127.0.0.1:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,15 +1,31 @@
 from __future__ import annotations
 
 import argparse
+import email.utils
+import hashlib
+import http.client
 import json
+import logging
 import os
+import random
+import shutil
+import signal
+import sqlite3
+import subprocess
+import sys
+import threading
 import time
-from dataclasses import dataclass
+import uuid
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
-from urllib.error import HTTPError, URLError
-from urllib.parse import urlencode
-from urllib.request import Request, urlopen
+from urllib.error import HTTPError
+from urllib.parse import urlencode, urljoin, urlsplit
+from urllib.request import Request, getproxies, proxy_bypass, urlopen
+
+logger = logging.getLogger(__name__)
 
 
 def load_dotenv(dotenv_path: Path) -> dict[str, str]:
@@ -42,6 +58,19 @@ class AgentError(RuntimeError):
     pass
 
 
+class HTTPStatusError(AgentError):
+    """A failed HTTP call; `status` is None when no response arrived (network error or timeout)."""
+
+    def __init__(self, message: str, *, status: int | None, headers: dict[str, str] | None = None) -> None:
+        super().__init__(message)
+        self.status = status
+        self.headers = {key.lower(): value for key, value in (headers or {}).items()}
+
+
+class ProviderUnavailableError(AgentError):
+    """Raised without calling the model provider while its circuit breaker is open."""
+
+
 @dataclass(slots=True)
 class AgentRuntimeConfig:
     openai_api_key: str
@@ -49,6 +78,27 @@ class AgentRuntimeConfig:
     db_api_service_token: str
     poll_interval_seconds: int
     request_timeout_seconds: int
+    max_in_flight: int = 4
+    llm_cache_path: str | None = None
+    llm_cache_max_entries: int = 5000
+    llm_cache_max_age_seconds: int = 7 * 24 * 3600
+    openai_base_url: str = "https://api.openai.com/v1"
+    batch_dir: str = field(default_factory=lambda: str(Path(__file__).resolve().parent / ".batches"))
+    batch_poll_interval_seconds: int = 30
+    batch_max_wait_seconds: int = 24 * 3600
+    llm_requests_per_minute: int = 500
+    llm_tokens_per_minute: int = 200_000
+    llm_max_retries: int = 4
+    llm_retry_base_seconds: float = 1.0
+    llm_retry_max_seconds: float = 60.0
+    llm_breaker_failure_threshold: int = 5
+    llm_breaker_cooldown_seconds: float = 60.0
+    http_pool_size: int = 10
+    connect_timeout_seconds: float = 10.0
+    idle_backoff_min_seconds: float = 1.0
+    partition_index: int = 0
+    partition_count: int = 1
+    llm_prompt_cache_keys: bool = True
 
 
 def load_runtime_config(*, poll_interval_default: int = 60) -> AgentRuntimeConfig:
@@ -60,16 +110,47 @@ def load_runtime_config(*, poll_interval_default: int = 60) -> AgentRuntimeConfi
     if not db_api_service_token:
         raise AgentError("Missing DB_API_SERVICE_TOKEN in packages/agents/.env or packages/db_api/.env")
 
+    partition_index, _, partition_count = (get_env_var(env, "AGENT_PARTITION", "0/1") or "0/1").partition("/")
+    partition_count = max(1, int(partition_count or "1"))
+    # Each worker of a supervised agent gets an equal share of the provider limits.
+    llm_requests_per_minute = max(1, int(get_env_var(env, "AGENT_LLM_RPM", "500") or "500") // partition_count)
+    llm_tokens_per_minute = max(1, int(get_env_var(env, "AGENT_LLM_TPM", "200000") or "200000") // partition_count)
+
     return AgentRuntimeConfig(
         openai_api_key=openai_api_key,
         db_api_base_url=(get_env_var(env, "DB_API_BASE_URL", "http://127.0.0.1:8000") or "http://127.0.0.1:8000").rstrip("/"),
         db_api_service_token=db_api_service_token,
         poll_interval_seconds=int(get_env_var(env, "AGENT_POLL_INTERVAL_SECONDS", str(poll_interval_default)) or str(poll_interval_default)),
         request_timeout_seconds=int(get_env_var(env, "AGENT_REQUEST_TIMEOUT_SECONDS", "60") or "60"),
+        max_in_flight=max(1, int(get_env_var(env, "AGENT_MAX_IN_FLIGHT", "4") or "4")),
+        llm_cache_path=(
+            None
+            if (get_env_var(env, "AGENT_LLM_CACHE", "on") or "on").lower() in {"0", "off", "false"}
+            else get_env_var(env, "AGENT_LLM_CACHE_PATH", str(Path(__file__).resolve().parent / ".llm_cache.sqlite3"))
+        ),
+        llm_cache_max_entries=int(get_env_var(env, "AGENT_LLM_CACHE_MAX_ENTRIES", "5000") or "5000"),
+        llm_cache_max_age_seconds=int(float(get_env_var(env, "AGENT_LLM_CACHE_MAX_AGE_HOURS", "168") or "168") * 3600),
+        openai_base_url=(get_env_var(env, "OPENAI_BASE_URL", "https://api.openai.com/v1") or "https://api.openai.com/v1").rstrip("/"),
+        batch_dir=get_env_var(env, "AGENT_BATCH_DIR", str(Path(__file__).resolve().parent / ".batches")),
+        batch_poll_interval_seconds=int(get_env_var(env, "AGENT_BATCH_POLL_SECONDS", "30") or "30"),
+        batch_max_wait_seconds=int(float(get_env_var(env, "AGENT_BATCH_MAX_WAIT_HOURS", "24") or "24") * 3600),
+        llm_requests_per_minute=llm_requests_per_minute,
+        llm_tokens_per_minute=llm_tokens_per_minute,
+        llm_max_retries=int(get_env_var(env, "AGENT_LLM_MAX_RETRIES", "4") or "4"),
+        llm_retry_base_seconds=float(get_env_var(env, "AGENT_LLM_RETRY_BASE_SECONDS", "1") or "1"),
+        llm_retry_max_seconds=float(get_env_var(env, "AGENT_LLM_RETRY_MAX_SECONDS", "60") or "60"),
+        llm_breaker_failure_threshold=int(get_env_var(env, "AGENT_LLM_BREAKER_FAILURES", "5") or "5"),
+        llm_breaker_cooldown_seconds=float(get_env_var(env, "AGENT_LLM_BREAKER_COOLDOWN_SECONDS", "60") or "60"),
+        http_pool_size=max(1, int(get_env_var(env, "AGENT_HTTP_POOL_SIZE", "10") or "10")),
+        connect_timeout_seconds=float(get_env_var(env, "AGENT_CONNECT_TIMEOUT_SECONDS", "10") or "10"),
+        idle_backoff_min_seconds=float(get_env_var(env, "AGENT_IDLE_BACKOFF_MIN_SECONDS", "1") or "1"),
+        partition_index=int(partition_index or "0"),
+        partition_count=partition_count,
+        llm_prompt_cache_keys=(get_env_var(env, "AGENT_LLM_PROMPT_CACHE_KEY", "on") or "on").lower() not in {"0", "off", "false"},
     )
 
 
-def parse_common_args(description: str) -> argparse.Namespace:
+def parse_common_args(description: str, *, batch_mode: bool = False, workers: bool = False) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description=description)
     parser.add_argument("--once", action="store_true", help="Run one cycle and exit.")
     parser.add_argument(
@@ -81,7 +162,7 @@ def parse_common_args(description: str) -> argparse.Namespace:
         "--interval-seconds",
         type=int,
         default=None,
-        help="Override the polling interval.",
+        help="Override the longest idle wait between cycles.",
     )
     parser.add_argument(
         "--limit",
@@ -89,69 +170,527 @@ def parse_common_args(description: str) -> argparse.Namespace:
         default=10,
         help="Maximum queue items to fetch per cycle.",
     )
+    if batch_mode:
+        parser.add_argument(
+            "--batch",
+            action="store_true",
+            help="Send one cycle through the asynchronous Batch API, wait for it to finish, and exit.",
+        )
+    if workers:
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Run this many worker processes, each owning a disjoint slice of content ids.",
+        )
     return parser.parse_args()
 
 
+def next_cycle_delay(
+    stats: Any,
+    *,
+    limit: int,
+    backoff_seconds: float,
+    min_seconds: float,
+    max_seconds: float,
+) -> tuple[float, float]:
+    """Return `(delay, next_backoff)` for the cycle that produced `stats`.
+
+    A full page that made progress means more work is waiting, so the next cycle runs
+    at once. A partial page drained the queue, so wait the minimum. A cycle that made
+    no progress (empty queue, or every item failed or was paused) waits the current
+    backoff and doubles it up to `max_seconds`. Cycles whose stats carry no `fetched`
+    count keep the fixed `max_seconds` cadence.
+    """
+    if not isinstance(stats, dict) or "fetched" not in stats:
+        return max_seconds, min_seconds
+    if not stats.get("processed"):
+        return backoff_seconds, min(max_seconds, backoff_seconds * 2)
+    if stats["fetched"] >= limit:
+        return 0.0, min_seconds
+    return min_seconds, min_seconds
+
+
 def run_loop(
     *,
     args: argparse.Namespace,
     runtime_config: AgentRuntimeConfig,
-    cycle_fn: callable,
+    cycle_fn: Callable[..., dict[str, Any]],
+    wake: QueueWakeHook | None = None,
 ) -> int:
+    """Run cycles back to back while there is a backlog and back off while idle.
+
+    With a `wake` hook, idle waits long-poll the DB API and end as soon as new work
+    arrives in the agent's queue, instead of sleeping out the whole backoff.
+    """
     if args.once:
         cycle_fn(limit=args.limit)
         return 0
+    if wake is not None:
+        # Read the queue version before the first cycle, so work that lands during it still wakes the next wait.
+        wake.prime()
 
-    interval_seconds = args.interval_seconds or runtime_config.poll_interval_seconds
+    max_seconds = float(args.interval_seconds or runtime_config.poll_interval_seconds)
+    min_seconds = min(runtime_config.idle_backoff_min_seconds, max_seconds)
+    backoff_seconds = min_seconds
     max_cycles = None if args.run_forever else 5
     cycles_completed = 0
 
     while max_cycles is None or cycles_completed < max_cycles:
-        cycle_fn(limit=args.limit)
+        stats = cycle_fn(limit=args.limit)
         cycles_completed += 1
         if max_cycles is not None and cycles_completed >= max_cycles:
             break
-        time.sleep(interval_seconds)
+        delay, backoff_seconds = next_cycle_delay(
+            stats,
+            limit=args.limit,
+            backoff_seconds=backoff_seconds,
+            min_seconds=min_seconds,
+            max_seconds=max_seconds,
+        )
+        if delay <= 0:
+            continue
+        if wake is None:
+            time.sleep(delay)
+        elif wake.wait(delay):
+            backoff_seconds = min_seconds
+    return 0
+
+
+def _raise_keyboard_interrupt(signum: int, frame: Any) -> None:
+    raise KeyboardInterrupt
+
+
+def run_supervisor(*, script: Path, workers: int, report_interval_seconds: float = 60.0) -> int:
+    """Run `workers` copies of an agent script, each owning one content-id partition.
+
+    Worker `i` gets `AGENT_PARTITION=i/N` and the supervisor's own loop flags, so its
+    queue reads only return its slice of the queue. Workers that exit non-zero are
+    restarted with exponential backoff; workers that finish their cycles are not. The
+    stats lines the workers print are summed into one JSON line at most every
+    `report_interval_seconds`, and once more when all workers are done.
+    """
+    command = [sys.executable, str(script), *sys.argv[1:], "--workers", "1"]
+    totals: dict[str, float] = {}
+    counters = {"cycles": 0, "restarts": 0}
+    lock = threading.Lock()
+    readers: list[threading.Thread] = []
+
+    def collect(index: int, stream: Any) -> None:
+        for line in stream:
+            try:
+                stats = json.loads(line)
+            except ValueError:
+                stats = None
+            if not isinstance(stats, dict):
+                print(f"[worker {index}] {line.rstrip()}", flush=True)
+                continue
+            with lock:
+                counters["cycles"] += 1
+                for key, value in stats.items():
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        totals[key] = totals.get(key, 0) + value
+
+    def start(index: int) -> subprocess.Popen:
+        env = {**os.environ, "AGENT_PARTITION": f"{index}/{workers}", "PYTHONUNBUFFERED": "1"}
+        process = subprocess.Popen(command, env=env, stdout=subprocess.PIPE, text=True)
+        reader = threading.Thread(target=collect, args=(index, process.stdout), daemon=True)
+        reader.start()
+        readers.append(reader)
+        return process
+
+    def report() -> None:
+        with lock:
+            print(json.dumps({"workers": workers, **counters, **totals}), flush=True)
+
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    processes = {index: start(index) for index in range(workers)}
+    started_at = dict.fromkeys(processes, time.monotonic())
+    restart_delay = dict.fromkeys(processes, 1.0)
+    restart_at: dict[int, float] = {}
+    last_report = time.monotonic()
+    try:
+        while processes or restart_at:
+            time.sleep(0.5)
+            now = time.monotonic()
+            for index, process in list(processes.items()):
+                code = process.poll()
+                if code is None:
+                    continue
+                del processes[index]
+                if code == 0:
+                    continue
+                if now - started_at[index] > 60:
+                    restart_delay[index] = 1.0
+                print(
+                    f"[warn] worker {index}/{workers} exited with {code}; restarting in {restart_delay[index]:.0f}s",
+                    file=sys.stderr,
+                )
+                restart_at[index] = now + restart_delay[index]
+                restart_delay[index] = min(60.0, restart_delay[index] * 2)
+            for index, due in list(restart_at.items()):
+                if due <= now:
+                    del restart_at[index]
+                    processes[index] = start(index)
+                    started_at[index] = now
+                    counters["restarts"] += 1
+            if now - last_report >= report_interval_seconds:
+                report()
+                last_report = now
+    except KeyboardInterrupt:
+        for process in processes.values():
+            process.terminate()
+        for process in processes.values():
+            process.wait()
+    for reader in readers:
+        reader.join(timeout=5)
+    report()
     return 0
 
 
+def map_concurrently(
+    fn: Callable[[Any], Any],
+    items: Iterable[Any],
+    *,
+    max_in_flight: int,
+) -> Iterator[tuple[Any, Any, Exception | None]]:
+    """Run `fn` over items with at most `max_in_flight` calls outstanding.
+
+    Yields `(item, result, error)` in completion order so callers can post each
+    result as soon as it is ready. An exception from one item is logged with its
+    traceback, returned as its `error`, and never affects the others.
+    """
+    items = list(items)
+    if max_in_flight <= 1 or len(items) <= 1:
+        for item in items:
+            try:
+                result = fn(item)
+            except Exception as exc:
+                logger.exception("concurrent call failed for one item")
+                yield item, None, exc
+            else:
+                yield item, result, None
+        return
+
+    with ThreadPoolExecutor(max_workers=min(max_in_flight, len(items))) as pool:
+        futures = {pool.submit(fn, item): item for item in items}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as exc:
+                logger.exception("concurrent call failed for one item")
+                yield futures[future], None, exc
+            else:
+                yield futures[future], result, None
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting prompts (about four characters per token)."""
+    return max(1, (len(text) + 3) // 4)
+
+
+TRUNCATION_MARKER = " ...[truncated]"
+BODY_BUDGET_SHARE = 0.7
+MIN_COMMENT_TOKENS = 32
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep the head of `text` within about `max_tokens`, cutting on a word boundary."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max(0, max_tokens * 4 - len(TRUNCATION_MARKER))
+    head = text[:limit]
+    boundary = head.rfind(" ")
+    if boundary >= limit - 40:
+        head = head[:boundary]
+    return head.rstrip() + TRUNCATION_MARKER
+
+
+def fit_item_to_budget(item: dict[str, Any], *, max_tokens: int, max_comments: int = 5) -> tuple[dict[str, Any], int]:
+    """Copy of a queue item whose title, body and sampled comments fit in about `max_tokens`.
+
+    Text is kept by priority: the title, then the head of the body, then the
+    highest-scored comments (the last one kept may be cut short). Returns the copy
+    and an estimate of the tokens removed. `max_tokens <= 0` disables the budget.
+    """
+    payload = item.get("raw_payload") or {}
+    comments = sorted(
+        (comment for comment in payload.get("top_level_comments") or [] if isinstance(comment, dict)),
+        key=lambda comment: float(comment.get("score") or 0),
+        reverse=True,
+    )[:max_comments]
+    if max_tokens <= 0:
+        return {**item, "raw_payload": {**payload, "top_level_comments": comments}}, 0
+
+    title = str(item.get("title") or "")
+    body = str(item.get("body_text") or "")
+    comment_tokens = [estimate_tokens(str(comment.get("body") or "")) for comment in comments]
+    original_tokens = estimate_tokens(title) + estimate_tokens(body) + sum(comment_tokens)
+
+    title = truncate_to_tokens(title, max(1, max_tokens // 4))
+    remaining = max_tokens - estimate_tokens(title)
+    if estimate_tokens(body) + sum(comment_tokens) > remaining:
+        body_allowance = max(remaining - sum(comment_tokens), int(remaining * BODY_BUDGET_SHARE)) if comments else remaining
+        body = truncate_to_tokens(body, max(1, body_allowance))
+    remaining -= estimate_tokens(body)
+
+    kept = []
+    for comment, tokens in zip(comments, comment_tokens):
+        if tokens <= remaining:
+            kept.append(comment)
+            remaining -= tokens
+        elif remaining >= MIN_COMMENT_TOKENS:
+            kept.append({**comment, "body": truncate_to_tokens(str(comment.get("body") or ""), remaining)})
+            break
+        else:
+            break
+
+    fitted = {
+        **item,
+        "title": title if item.get("title") is not None else None,
+        "body_text": body if item.get("body_text") is not None else None,
+        "raw_payload": {**payload, "top_level_comments": kept},
+    }
+    final_tokens = (
+        estimate_tokens(title)
+        + estimate_tokens(body)
+        + sum(estimate_tokens(str(comment.get("body") or "")) for comment in kept)
+    )
+    return fitted, max(0, original_tokens - final_tokens)
+
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+REDIRECT_METHODS = frozenset({"GET", "HEAD"})
+REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+
+
+class HTTPConnectionPool:
+    """Keep-alive HTTP(S) connections shared by every client in the process.
+
+    Idle connections are kept per `(scheme, host, port)` and reused most-recent
+    first, unless they have sat idle longer than `max_idle_seconds` (under uvicorn's
+    5s keep-alive). At most `max_per_host` requests are in flight to one host; extra
+    callers wait for a free slot. Connecting uses `connect_timeout`, and each request
+    sets its own read timeout on the socket.
+
+    A request that fails on a reused connection is resent on a fresh one only when
+    that cannot run it twice: the method is idempotent, or sending failed before the
+    server could have read the whole request. Hosts reached through a proxy
+    (`HTTPS_PROXY`/`HTTP_PROXY`, minus `NO_PROXY`) go through urllib instead.
+
+    GET and HEAD follow up to `max_redirects` redirects, dropping `Authorization` when
+    the host changes. Other methods get the 3xx response back instead of replaying
+    their body at another URL.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_per_host: int = 10,
+        connect_timeout: float = 10.0,
+        max_idle_seconds: float = 4.0,
+        max_redirects: int = 5,
+    ) -> None:
+        self.max_per_host = max(1, max_per_host)
+        self.max_redirects = max(0, max_redirects)
+        self.connect_timeout = connect_timeout
+        self.max_idle_seconds = max_idle_seconds
+        self.connections_opened = 0
+        self.requests = 0
+        self._idle: dict[tuple[str, str, int], list[tuple[http.client.HTTPConnection, float]]] = {}
+        self._slots: dict[tuple[str, str, int], threading.BoundedSemaphore] = {}
+        self._proxied: dict[tuple[str, str, int], bool] = {}
+        self._lock = threading.Lock()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: dict[str, str] | None = None,
+        body: bytes | None = None,
+        timeout: float = 60,
+    ) -> tuple[int, dict[str, str], bytes]:
+        """Send one request, following redirects for GET/HEAD, and return `(status, headers, body)`."""
+        response = self._send(method, url, headers=headers, body=body, timeout=timeout)
+        for _ in range(self.max_redirects if method.upper() in REDIRECT_METHODS else 0):
+            status, response_headers, _ = response
+            location = next((value for name, value in response_headers.items() if name.lower() == "location"), None)
+            if status not in REDIRECT_STATUSES or not location:
+                break
+            next_url = urljoin(url, location)
+            if headers and urlsplit(next_url).netloc != urlsplit(url).netloc:
+                headers = {name: value for name, value in headers.items() if name.lower() != "authorization"}
+            url = next_url
+            response = self._send(method, url, headers=headers, body=None, timeout=timeout)
+        return response
+
+    def _send(
+        self, method: str, url: str, *, headers: dict[str, str] | None, body: bytes | None, timeout: float
+    ) -> tuple[int, dict[str, str], bytes]:
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname or "", parts.port or (443 if parts.scheme == "https" else 80))
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        with self._lock:
+            slot = self._slots.setdefault(key, threading.BoundedSemaphore(self.max_per_host))
+            self.requests += 1
+            proxied = self._proxied.get(key)
+        if proxied is None:
+            proxied = bool(getproxies().get(key[0])) and not proxy_bypass(key[1])
+            with self._lock:
+                self._proxied[key] = proxied
+
+        with slot:
+            if proxied:
+                return self._request_via_proxy(method, url, headers=headers, body=body, timeout=timeout)
+            while True:
+                connection, reused = self._checkout(key)
+                sent = False
+                try:
+                    connection.sock.settimeout(timeout)
+                    connection.request(method, target, body=body, headers=headers or {})
+                    sent = True
+                    response = connection.getresponse()
+                    data = response.read()
+                except (BrokenPipeError, ConnectionResetError):
+                    connection.close()
+                    if reused and (not sent or method.upper() in IDEMPOTENT_METHODS):
+                        # The server dropped an idle keep-alive connection; retry on a fresh one.
+                        continue
+                    raise
+                except BaseException:
+                    connection.close()
+                    raise
+                if response.will_close:
+                    connection.close()
+                else:
+                    with self._lock:
+                        self._idle.setdefault(key, []).append((connection, time.monotonic()))
+                return response.status, dict(response.getheaders()), data
+
+    @staticmethod
+    def _request_via_proxy(
+        method: str, url: str, *, headers: dict[str, str] | None, body: bytes | None, timeout: float
+    ) -> tuple[int, dict[str, str], bytes]:
+        request = Request(url, method=method, headers=headers or {}, data=body)
+        try:
+            with urlopen(request, timeout=timeout) as response:
+                return response.status, dict(response.getheaders()), response.read()
+        except HTTPError as exc:
+            with exc:
+                return exc.code, dict(exc.headers.items()), exc.read()
+
+    def _checkout(self, key: tuple[str, str, int]) -> tuple[http.client.HTTPConnection, bool]:
+        stale: list[http.client.HTTPConnection] = []
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                connection, idle_since = idle.pop()
+                if time.monotonic() - idle_since <= self.max_idle_seconds:
+                    return connection, True
+                # Everything left is older still; servers have likely closed these already.
+                stale = [connection, *(older for older, _ in idle)]
+                idle.clear()
+            self.connections_opened += 1
+        for connection in stale:
+            connection.close()
+        scheme, host, port = key
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        connection = connection_class(host, port, timeout=self.connect_timeout)
+        connection.connect()
+        return connection, False
+
+
+HTTP_POOL: HTTPConnectionPool | None = None
+_HTTP_POOL_LOCK = threading.Lock()
+
+
+def get_http_pool(runtime_config: AgentRuntimeConfig | None = None) -> HTTPConnectionPool:
+    """The process-wide pool, created on first use from the first runtime config seen."""
+    global HTTP_POOL
+    with _HTTP_POOL_LOCK:
+        if HTTP_POOL is None:
+            HTTP_POOL = (
+                HTTPConnectionPool(
+                    max_per_host=runtime_config.http_pool_size,
+                    connect_timeout=runtime_config.connect_timeout_seconds,
+                )
+                if runtime_config is not None
+                else HTTPConnectionPool()
+            )
+        return HTTP_POOL
+
+
+def http_request(
+    url: str,
+    *,
+    method: str = "GET",
+    headers: dict[str, str] | None = None,
+    data: bytes | None = None,
+    timeout: float = 60,
+    on_headers: Callable[[dict[str, str]], None] | None = None,
+) -> bytes:
+    """Send a request through the shared pool and return the body of a 2xx/3xx response.
+
+    Raises `HTTPStatusError` for error statuses (with the response headers) and for
+    network failures or timeouts (with `status=None`).
+    """
+    try:
+        status, response_headers, content = get_http_pool().request(
+            method, url, headers=headers, body=data, timeout=timeout
+        )
+    except TimeoutError as exc:
+        raise HTTPStatusError(f"Timed out after {timeout}s for {url}", status=None) from exc
+    except (OSError, http.client.HTTPException) as exc:
+        raise HTTPStatusError(f"Network error for {url}: {exc}", status=None) from exc
+    if status >= 400:
+        body_text = content.decode("utf-8", errors="replace")
+        raise HTTPStatusError(f"HTTP {status} for {url}: {body_text}", status=status, headers=response_headers)
+    if on_headers is not None:
+        on_headers(response_headers)
+    return content
+
+
 def request_json(
     url: str,
     *,
     method: str = "GET",
     headers: dict[str, str] | None = None,
     body: dict[str, Any] | None = None,
-    timeout: int = 60,
+    timeout: float = 60,
+    on_headers: Callable[[dict[str, str]], None] | None = None,
 ) -> dict[str, Any] | list[dict[str, Any]]:
+    """Send a JSON request; `on_headers` receives the response headers of successful calls."""
     request_headers = headers.copy() if headers else {}
     data: bytes | None = None
     if body is not None:
         request_headers["Content-Type"] = "application/json"
         data = json.dumps(body).encode("utf-8")
 
-    request = Request(url=url, method=method, headers=request_headers, data=data)
-    try:
-        with urlopen(request, timeout=timeout) as response:
-            payload = response.read().decode("utf-8")
-            return json.loads(payload) if payload else {}
-    except HTTPError as exc:
-        body_text = exc.read().decode("utf-8", errors="replace")
-        raise AgentError(f"HTTP {exc.code} for {url}: {body_text}") from exc
-    except URLError as exc:
-        raise AgentError(f"Network error for {url}: {exc.reason}") from exc
+    payload = http_request(
+        url, method=method, headers=request_headers, data=data, timeout=timeout, on_headers=on_headers
+    ).decode("utf-8")
+    return json.loads(payload) if payload else {}
 
 
 class DBAPIClient:
     def __init__(self, runtime_config: AgentRuntimeConfig) -> None:
+        get_http_pool(runtime_config)
         self.base_url = runtime_config.db_api_base_url
         self.timeout = runtime_config.request_timeout_seconds
+        self.partition_params = (
+            {"partition": runtime_config.partition_index, "partitions": runtime_config.partition_count}
+            if runtime_config.partition_count > 1
+            else {}
+        )
         self.headers = {
             "Accept": "application/json",
             "X-API-Key": runtime_config.db_api_service_token,
         }
 
-    def get_queue(self, path: str, *, limit: int) -> dict[str, Any]:
-        query = urlencode({"limit": limit, "offset": 0})
+    def get_queue(self, path: str, *, limit: int, params: dict[str, Any] | None = None) -> dict[str, Any]:
+        """Read the head of a queue, restricted to this worker's content-id partition."""
+        query = urlencode({"limit": limit, "offset": 0, **self.partition_params, **(params or {})})
         payload = request_json(
             f"{self.base_url}{path}?{query}",
             headers=self.headers,
@@ -159,6 +698,15 @@ class DBAPIClient:
         )
         return payload if isinstance(payload, dict) else {}
 
+    def get(self, path: str, *, params: dict[str, Any] | None = None) -> dict[str, Any]:
+        query = f"?{urlencode(params)}" if params else ""
+        payload = request_json(
+            f"{self.base_url}{path}{query}",
+            headers=self.headers,
+            timeout=self.timeout,
+        )
+        return payload if isinstance(payload, dict) else {}
+
     def post(self, path: str, body: dict[str, Any]) -> dict[str, Any]:
         payload = request_json(
             f"{self.base_url}{path}",
@@ -170,10 +718,328 @@ class DBAPIClient:
         return payload if isinstance(payload, dict) else {}
 
 
+class QueueWakeHook:
+    """Long-polls `GET /v1/queues/{queue}/events` so an idle agent wakes when work arrives.
+
+    The hook remembers the last queue version it saw. Each wait asks the DB API to hold
+    the request until the queue moves past that version, in slices short enough to
+    stay under the request timeout. If the endpoint is missing or failing, the wait
+    falls back to a plain sleep.
+    """
+
+    def __init__(self, db_api: DBAPIClient, queue: str) -> None:
+        self.db_api = db_api
+        self.path = f"/v1/queues/{queue}/events"
+        self.max_poll_seconds = max(1.0, min(25.0, db_api.timeout / 2))
+        self.version: int | None = None
+        self.enabled = True
+
+    def prime(self) -> None:
+        """Remember the queue's current version without waiting."""
+        self._poll({"timeout_seconds": 0})
+
+    def wait(self, timeout_seconds: float) -> bool:
+        """Return True as soon as new work may be waiting, or False after `timeout_seconds`."""
+        deadline = time.monotonic() + timeout_seconds
+        if self.version is None:
+            self.prime()
+        while self.enabled and self.version is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            payload = self._poll(
+                {"since": self.version, "timeout_seconds": round(min(remaining, self.max_poll_seconds), 3)}
+            )
+            if payload is None:
+                break
+            if payload.get("changed"):
+                return True
+        time.sleep(max(0.0, deadline - time.monotonic()))
+        return False
+
+    def _poll(self, params: dict[str, Any]) -> dict[str, Any] | None:
+        try:
+            payload = self.db_api.get(self.path, params=params)
+        except AgentError as exc:
+            if isinstance(exc, HTTPStatusError) and exc.status == 404:
+                self.enabled = False
+            print(f"[warn] queue wake-up unavailable, sleeping instead: {exc}", file=sys.stderr)
+            return None
+        self.version = int(payload.get("version") or 0)
+        return payload
+
+
+def is_item_failure(error: Exception) -> bool:
+    """True when `error` is about one item, not a provider outage, rate limit, or bad credentials."""
+    if isinstance(error, ProviderUnavailableError):
+        return False
+    if isinstance(error, HTTPStatusError):
+        return error.status is not None and error.status not in RETRYABLE_STATUSES | {401, 403}
+    return True
+
+
+def report_item_failure(
+    db_api: DBAPIClient, *, queue: str, item_id: str, error: Exception, actor_label: str
+) -> bool:
+    """Record an item-specific failure so the DB API backs the item off; True once it is quarantined."""
+    if not is_item_failure(error):
+        return False
+    try:
+        payload = db_api.post(
+            f"/v1/queues/{queue}/{item_id}/fail",
+            {"error": f"{type(error).__name__}: {error}", "actor": "agent", "actor_label": actor_label},
+        )
+    except HTTPStatusError as exc:
+        if exc.status != 409:
+            print(f"[warn] could not record failure for {queue} item {item_id}: {exc}", file=sys.stderr)
+        return False
+    except AgentError as exc:
+        print(f"[warn] could not record failure for {queue} item {item_id}: {exc}", file=sys.stderr)
+        return False
+    return bool(payload.get("quarantined"))
+
+
+def llm_cache_key(*, model: str, instructions: str, input_text: str, prompt_version: str | None) -> str:
+    material = json.dumps([model, instructions, input_text, prompt_version or ""], ensure_ascii=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+LLM_CACHE_BUSY_TIMEOUT_SECONDS = 5.0
+
+
+class LLMResponseCache:
+    """SQLite-backed LRU of parsed model outputs keyed by a hash of the full request.
+
+    Supervised workers share one file, so it runs in WAL mode with a busy timeout, and
+    a read or write that still fails is logged and treated as a miss.
+    """
+
+    def __init__(self, path: Path, *, max_entries: int, max_age_seconds: int) -> None:
+        self.max_entries = max(1, max_entries)
+        self.max_age_seconds = max(0, max_age_seconds)
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), timeout=LLM_CACHE_BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        self._db.execute(f"pragma busy_timeout = {int(LLM_CACHE_BUSY_TIMEOUT_SECONDS * 1000)}")
+        self._db.execute("pragma journal_mode = wal")
+        self._db.execute(
+            "create table if not exists llm_responses ("
+            "key text primary key, response text not null, created_at real not null, last_used_at real not null)"
+        )
+        self._db.execute("create index if not exists llm_responses_last_used_idx on llm_responses (last_used_at)")
+        self._db.commit()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._db.execute(
+                    "select response from llm_responses where key = ? and created_at >= ?",
+                    (key, now - self.max_age_seconds),
+                ).fetchone()
+                if row is None:
+                    return None
+                self._db.execute("update llm_responses set last_used_at = ? where key = ?", (now, key))
+                self._db.commit()
+            except sqlite3.Error as exc:
+                self._db.rollback()
+                print(f"[warn] LLM cache read failed; treating as a miss: {exc}", file=sys.stderr)
+                return None
+        return json.loads(row[0])
+
+    def put(self, key: str, response: dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            try:
+                self._db.execute(
+                    "insert or replace into llm_responses (key, response, created_at, last_used_at) "
+                    "values (?, ?, ?, ?)",
+                    (key, json.dumps(response), now, now),
+                )
+                self._db.execute("delete from llm_responses where created_at < ?", (now - self.max_age_seconds,))
+                self._db.execute(
+                    "delete from llm_responses where key in ("
+                    "select key from llm_responses order by last_used_at desc limit -1 offset ?)",
+                    (self.max_entries,),
+                )
+                self._db.commit()
+            except sqlite3.Error as exc:
+                self._db.rollback()
+                print(f"[warn] LLM cache write failed; answer not cached: {exc}", file=sys.stderr)
+
+
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Per-minute budget that refills continuously and blocks callers until it covers them."""
+
+    def __init__(self, per_minute: int) -> None:
+        self.capacity = float(max(1, per_minute))
+        self.level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.capacity / 60)
+        self._updated = now
+
+    def acquire(self, amount: float) -> float:
+        """Take `amount` from the bucket, sleeping as needed; returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                amount = min(amount, self.capacity)
+                if self.level >= amount:
+                    self.level -= amount
+                    return waited
+                delay = (amount - self.level) * 60 / self.capacity
+            time.sleep(delay)
+            waited += delay
+
+    def sync(self, *, limit: int | None, remaining: int | None) -> None:
+        """Adopt the provider's view of the limit and the headroom left, which also counts
+        other processes sharing the same API key."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if limit:
+                self.capacity = float(limit)
+            if remaining is not None:
+                self.level = min(self.capacity, float(remaining))
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive provider failures and stays open for
+    `cooldown_seconds`. After that it is half-open: one thread's call is the probe that
+    closes or reopens it, and every other caller fails fast until the probe reports."""
+
+    def __init__(self, *, failure_threshold: int, cooldown_seconds: float) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_seconds = max(0.0, cooldown_seconds)
+        self._failures = 0
+        self._open_until = 0.0
+        self._probe_thread: int | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return time.monotonic() < self._open_until
+
+    def check(self) -> None:
+        """Raise ProviderUnavailableError unless this thread may call the provider now."""
+        with self._lock:
+            remaining = self._open_until - time.monotonic()
+            if remaining > 0:
+                raise ProviderUnavailableError(
+                    f"Model provider paused for another {remaining:.0f}s after repeated failures"
+                )
+            if not self._open_until:
+                return
+            if self._probe_thread is None:
+                self._probe_thread = threading.get_ident()
+            elif self._probe_thread != threading.get_ident():
+                raise ProviderUnavailableError("Model provider paused while a probe call checks whether it recovered")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._open_until = 0.0
+            self._probe_thread = None
+
+    def record_failure(self) -> bool:
+        """Count a failure; returns True when this failure opened the breaker."""
+        with self._lock:
+            if self._probe_thread is not None:
+                if self._probe_thread != threading.get_ident():
+                    return False
+                # The probe failed: reopen for another cooldown.
+                self._probe_thread = None
+            else:
+                self._failures += 1
+                if self._failures < self.failure_threshold or self._open_until:
+                    return False
+            self._open_until = time.monotonic() + self.cooldown_seconds
+            self._failures = self.failure_threshold - 1
+            return True
+
+    def release(self) -> None:
+        """Give up this thread's probe without a verdict, e.g. after an unrelated error, so another caller probes."""
+        with self._lock:
+            if self._probe_thread == threading.get_ident():
+                self._probe_thread = None
+
+
+def _header_int(headers: dict[str, str], key: str) -> int | None:
+    try:
+        return int(float(headers[key]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def retry_after_seconds(headers: dict[str, str]) -> float | None:
+    """Delay requested by `retry-after-ms` or `retry-after` (seconds or an HTTP date)."""
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
 class OpenAIResponsesClient:
     def __init__(self, runtime_config: AgentRuntimeConfig) -> None:
+        get_http_pool(runtime_config)
         self.api_key = runtime_config.openai_api_key
+        self.base_url = runtime_config.openai_base_url
         self.timeout = runtime_config.request_timeout_seconds
+        self.cache = (
+            LLMResponseCache(
+                Path(runtime_config.llm_cache_path),
+                max_entries=runtime_config.llm_cache_max_entries,
+                max_age_seconds=runtime_config.llm_cache_max_age_seconds,
+            )
+            if runtime_config.llm_cache_path
+            else None
+        )
+        self.max_retries = max(0, runtime_config.llm_max_retries)
+        self.retry_base_seconds = max(0.0, runtime_config.llm_retry_base_seconds)
+        self.retry_max_seconds = max(self.retry_base_seconds, runtime_config.llm_retry_max_seconds)
+        self.request_bucket = TokenBucket(runtime_config.llm_requests_per_minute)
+        self.token_bucket = TokenBucket(runtime_config.llm_tokens_per_minute)
+        self.breaker = CircuitBreaker(
+            failure_threshold=runtime_config.llm_breaker_failure_threshold,
+            cooldown_seconds=runtime_config.llm_breaker_cooldown_seconds,
+        )
+        self.prompt_cache_keys = runtime_config.llm_prompt_cache_keys
+        self._stats_lock = threading.Lock()
+        self._stats: dict[str, int] = {}
+        self._call_log: list[dict[str, Any]] = []
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] = self._stats.get(key, 0) + amount
+
+    def take_stats(self) -> dict[str, Any]:
+        """Return counters and the per-call log accumulated since the last call and reset them."""
+        with self._stats_lock:
+            stats, self._stats = self._stats, {}
+            call_log, self._call_log = self._call_log, []
+        if self.cache is not None:
+            stats = {"llm_cache_hits": 0, "llm_cache_misses": 0, **stats}
+        if call_log:
+            stats["llm_call_log"] = call_log
+        return stats
 
     def json_completion(
         self,
@@ -181,35 +1047,394 @@ class OpenAIResponsesClient:
         model: str,
         instructions: str,
         input_text: str,
-    ) -> dict[str, Any]:
+        prompt_version: str | None = None,
+        use_cache: bool = True,
+        tier: str | None = None,
+        validate: Callable[[dict[str, Any]], Any] | None = None,
+    ) -> Any:
+        """Return the model's JSON output, from the cache when possible.
+
+        With `validate` set, the output is passed through it and its return value is
+        returned instead. An answer is only cached once `validate` accepts it, so a
+        malformed answer is never replayed; a cached answer the validator now rejects
+        counts as a miss. `use_cache=False` skips the cache read but still caches an
+        accepted answer, which is how retries of failed items get a fresh one.
+
+        Every uncached call adds its latency and prompt, cached and completion tokens
+        to the `llm_*` counters and appends one entry to `llm_call_log`. With `tier`
+        set it also adds `<tier>_calls`, `<tier>_latency_ms`, `<tier>_input_tokens`,
+        `<tier>_cached_tokens` and `<tier>_output_tokens`.
+        """
+        cache_key = llm_cache_key(
+            model=model, instructions=instructions, input_text=input_text, prompt_version=prompt_version
+        )
+        if self.cache is not None and use_cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                try:
+                    accepted = validate(cached) if validate is not None else cached
+                except AgentError:
+                    cached = None
+                else:
+                    self._count("llm_cache_hits")
+                    return accepted
+            self._count("llm_cache_misses")
+
+        started = time.monotonic()
+        payload = self._post_responses(
+            responses_request_body(
+                model=model,
+                instructions=instructions,
+                input_text=input_text,
+                prompt_cache_key=(
+                    prompt_cache_key(model=model, instructions=instructions, prompt_version=prompt_version)
+                    if self.prompt_cache_keys
+                    else None
+                ),
+            ),
+            estimated_tokens=estimate_tokens(instructions) + estimate_tokens(input_text) + 256,
+        )
+        self._record_usage(model=model, tier=tier, usage=parse_usage(payload), started=started)
+        result = parse_response_json(payload)
+        accepted = validate(result) if validate is not None else result
+        if self.cache is not None:
+            self.cache.put(cache_key, result)
+        return accepted
+
+    def _record_usage(self, *, model: str, tier: str | None, usage: dict[str, int], started: float) -> None:
+        latency_ms = int((time.monotonic() - started) * 1000)
+        with self._stats_lock:
+            self._call_log.append({"model": model, "tier": tier, **usage, "latency_ms": latency_ms})
+        self._count("llm_calls")
+        self._count("llm_latency_ms", latency_ms)
+        for key, value in usage.items():
+            self._count(f"llm_{key}", value)
+        if tier:
+            self._count(f"{tier}_calls")
+            self._count(f"{tier}_latency_ms", latency_ms)
+            self._count(f"{tier}_input_tokens", usage["prompt_tokens"])
+            self._count(f"{tier}_cached_tokens", usage["cached_tokens"])
+            self._count(f"{tier}_output_tokens", usage["completion_tokens"])
+
+    def _observe_rate_limits(self, headers: dict[str, str]) -> None:
+        headers = {key.lower(): value for key, value in headers.items()}
+        self.request_bucket.sync(
+            limit=_header_int(headers, "x-ratelimit-limit-requests"),
+            remaining=_header_int(headers, "x-ratelimit-remaining-requests"),
+        )
+        self.token_bucket.sync(
+            limit=_header_int(headers, "x-ratelimit-limit-tokens"),
+            remaining=_header_int(headers, "x-ratelimit-remaining-tokens"),
+        )
+
+    def _post_responses(self, body: dict[str, Any], *, estimated_tokens: int) -> Any:
+        """POST to the Responses API within the RPM/TPM budget, retrying transient failures.
+
+        429s, 5xx and network errors are retried with jittered exponential backoff,
+        waiting at least as long as any `Retry-After` header asks. A call that still
+        fails counts toward the circuit breaker.
+        """
+        try:
+            return self._post_responses_with_retries(body, estimated_tokens=estimated_tokens)
+        finally:
+            self.breaker.release()
+
+    def _post_responses_with_retries(self, body: dict[str, Any], *, estimated_tokens: int) -> Any:
+        attempt = 0
+        while True:
+            self.breaker.check()
+            waited = self.request_bucket.acquire(1) + self.token_bucket.acquire(estimated_tokens)
+            if waited:
+                self._count("rate_limit_wait_ms", int(waited * 1000))
+            try:
+                payload = request_json(
+                    f"{self.base_url}/responses",
+                    method="POST",
+                    headers={
+                        "Accept": "application/json",
+                        "Authorization": f"Bearer {self.api_key}",
+                    },
+                    body=body,
+                    timeout=self.timeout,
+                    on_headers=self._observe_rate_limits,
+                )
+            except HTTPStatusError as exc:
+                if exc.status is not None and exc.status not in RETRYABLE_STATUSES:
+                    raise
+                if exc.status == 429:
+                    self._count("llm_rate_limited")
+                    self._observe_rate_limits(exc.headers)
+                if attempt >= self.max_retries:
+                    if self.breaker.record_failure():
+                        self._count("llm_breaker_opened")
+                        print(
+                            f"[warn] model provider degraded; pausing calls for {self.breaker.cooldown_seconds:g}s",
+                            file=sys.stderr,
+                        )
+                    raise
+                backoff = random.uniform(0, min(self.retry_max_seconds, self.retry_base_seconds * 2**attempt))
+                self._count("llm_retries")
+                time.sleep(max(backoff, min(self.retry_max_seconds, retry_after_seconds(exc.headers) or 0.0)))
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return payload
+
+
+JSON_ONLY_SUFFIX = "\n\nReturn valid JSON only."
+
+
+def prompt_cache_key(*, model: str, instructions: str, prompt_version: str | None) -> str:
+    """Stable routing key for the static prompt prefix, so calls sharing it land on the same provider cache."""
+    digest = hashlib.sha256(f"{model}\0{instructions}".encode()).hexdigest()[:16]
+    return f"{prompt_version or 'p'}-{digest}"
+
+
+def responses_request_body(
+    *, model: str, instructions: str, input_text: str, prompt_cache_key: str | None = None
+) -> dict[str, Any]:
+    """Responses API body with every static token ahead of the per-item input.
+
+    Providers cache prompts by exact prefix, so the instructions and the JSON-only
+    reminder come first and never vary between items; only `input` changes.
+    """
+    body = {
+        "model": model,
+        "instructions": instructions + JSON_ONLY_SUFFIX,
+        "input": input_text,
+        "store": False,
+        "text": {"format": {"type": "json_object"}},
+    }
+    if prompt_cache_key:
+        body["prompt_cache_key"] = prompt_cache_key
+    return body
+
+
+def parse_usage(payload: Any) -> dict[str, int]:
+    """Prompt, cached-prompt and completion token counts from a Responses or Chat Completions `usage` block."""
+    usage = payload.get("usage") if isinstance(payload, dict) else None
+    usage = usage if isinstance(usage, dict) else {}
+    details = usage.get("input_tokens_details") or usage.get("prompt_tokens_details") or {}
+    return {
+        "prompt_tokens": int(usage.get("input_tokens") or usage.get("prompt_tokens") or 0),
+        "cached_tokens": int(details.get("cached_tokens") or 0) if isinstance(details, dict) else 0,
+        "completion_tokens": int(usage.get("output_tokens") or usage.get("completion_tokens") or 0),
+    }
+
+
+def parse_response_json(payload: Any) -> dict[str, Any]:
+    if not isinstance(payload, dict):
+        raise AgentError("Unexpected OpenAI response format")
+
+    output_text = payload.get("output_text")
+    if isinstance(output_text, str) and output_text.strip():
+        return json.loads(output_text)
+
+    for item in payload.get("output", []):
+        if item.get("type") != "message":
+            continue
+        for content in item.get("content", []):
+            if content.get("type") == "output_text" and isinstance(content.get("text"), str):
+                return json.loads(content["text"])
+
+    raise AgentError("OpenAI response did not contain JSON output text")
+
+
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+@dataclass(slots=True)
+class BatchRequest:
+    custom_id: str
+    model: str
+    instructions: str
+    input_text: str
+
+
+class OpenAIBatchRunner:
+    """Runs Responses API requests through the asynchronous Batch API.
+
+    Each job is checkpointed under `<batch_dir>/<name>/<job>/`: the JSONL request
+    file, the uploaded file and batch ids, the downloaded output, and the custom ids
+    already handed back to the caller. A run that dies at any step resumes the same
+    batch on the next call instead of submitting (and paying for) it again.
+    """
+
+    def __init__(self, runtime_config: AgentRuntimeConfig, *, name: str) -> None:
+        self.base_url = runtime_config.openai_base_url
+        self.api_key = runtime_config.openai_api_key
+        self.timeout = runtime_config.request_timeout_seconds
+        self.poll_interval_seconds = max(1, runtime_config.batch_poll_interval_seconds)
+        self.max_wait_seconds = runtime_config.batch_max_wait_seconds
+        self.prompt_cache_keys = runtime_config.llm_prompt_cache_keys
+        self.directory = Path(runtime_config.batch_dir) / name
+        self.directory.mkdir(parents=True, exist_ok=True)
+        get_http_pool(runtime_config)
+
+    def run(self, requests: list[BatchRequest]) -> Iterator[tuple[str, dict[str, Any] | None, Exception | None]]:
+        """Yield `(custom_id, parsed_json, error)` for every request, finishing older jobs first.
+
+        A custom id counts as delivered once the caller asks for the next result, so
+        a crash while handling one result replays only that result on resume.
+        """
+        covered: set[str] = set()
+        for job_dir in self._pending_jobs():
+            print(f"[warn] resuming unfinished batch job {job_dir.name}", file=sys.stderr)
+            covered.update(self._custom_ids(job_dir))
+            yield from self._finish(job_dir)
+
+        fresh = [request for request in requests if request.custom_id not in covered]
+        if fresh:
+            yield from self._finish(self._write_job(fresh))
+
+    def _pending_jobs(self) -> list[Path]:
+        jobs = []
+        for job_dir in sorted(path for path in self.directory.iterdir() if path.is_dir()):
+            if (job_dir / "requests.jsonl").exists():
+                jobs.append(job_dir)
+            else:
+                shutil.rmtree(job_dir, ignore_errors=True)
+        return jobs
+
+    def _write_job(self, requests: list[BatchRequest]) -> Path:
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": request.custom_id,
+                    "method": "POST",
+                    "url": "/v1/responses",
+                    "body": responses_request_body(
+                        model=request.model,
+                        instructions=request.instructions,
+                        input_text=request.input_text,
+                        prompt_cache_key=(
+                            prompt_cache_key(model=request.model, instructions=request.instructions, prompt_version=None)
+                            if self.prompt_cache_keys
+                            else None
+                        ),
+                    ),
+                },
+                ensure_ascii=True,
+            )
+            for request in requests
+        ]
+        content = "\n".join(lines) + "\n"
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:12]
+        job_dir = self.directory / f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{digest}"
+        job_dir.mkdir(parents=True, exist_ok=True)
+        _write_atomic(job_dir / "state.json", json.dumps({"created_at": time.time()}))
+        _write_atomic(job_dir / "requests.jsonl", content)
+        return job_dir
+
+    def _finish(self, job_dir: Path) -> Iterator[tuple[str, dict[str, Any] | None, Exception | None]]:
+        state_path = job_dir / "state.json"
+        state = json.loads(state_path.read_text(encoding="utf-8")) if state_path.exists() else {}
+        if not state.get("input_file_id"):
+            state["input_file_id"] = self._upload(job_dir / "requests.jsonl")["id"]
+            _write_atomic(state_path, json.dumps(state))
+        if not state.get("batch_id"):
+            batch = self._request_json(
+                "/batches",
+                method="POST",
+                body={"input_file_id": state["input_file_id"], "endpoint": "/v1/responses", "completion_window": "24h"},
+            )
+            state["batch_id"] = batch["id"]
+            _write_atomic(state_path, json.dumps(state))
+
+        output_path = job_dir / "output.jsonl"
+        if not output_path.exists():
+            batch = self._wait(state["batch_id"])
+            state["status"] = batch.get("status")
+            output = "".join(
+                self._download(batch[key]) for key in ("output_file_id", "error_file_id") if batch.get(key)
+            )
+            _write_atomic(state_path, json.dumps(state))
+            _write_atomic(output_path, output)
+
+        results = self._parse_output(output_path.read_text(encoding="utf-8"))
+        delivered_path = job_dir / "delivered.txt"
+        delivered = set(delivered_path.read_text(encoding="utf-8").split()) if delivered_path.exists() else set()
+        for custom_id in self._custom_ids(job_dir):
+            if custom_id in delivered:
+                continue
+            result, error = results.get(
+                custom_id,
+                (None, AgentError(f"Batch {state['batch_id']} ended {state.get('status')} without a result")),
+            )
+            yield custom_id, result, error
+            with delivered_path.open("a", encoding="utf-8") as handle:
+                handle.write(f"{custom_id}\n")
+        shutil.rmtree(job_dir, ignore_errors=True)
+
+    def _wait(self, batch_id: str) -> dict[str, Any]:
+        deadline = time.monotonic() + self.max_wait_seconds
+        while True:
+            batch = self._request_json(f"/batches/{batch_id}")
+            if batch.get("status") in BATCH_TERMINAL_STATUSES:
+                return batch
+            if time.monotonic() >= deadline:
+                raise AgentError(f"Batch {batch_id} still {batch.get('status')}; rerun with --batch to resume it")
+            time.sleep(self.poll_interval_seconds)
+
+    @staticmethod
+    def _custom_ids(job_dir: Path) -> list[str]:
+        lines = (job_dir / "requests.jsonl").read_text(encoding="utf-8").splitlines()
+        return [json.loads(line)["custom_id"] for line in lines if line.strip()]
+
+    @staticmethod
+    def _parse_output(output: str) -> dict[str, tuple[dict[str, Any] | None, Exception | None]]:
+        results: dict[str, tuple[dict[str, Any] | None, Exception | None]] = {}
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if record.get("error") or int(response.get("status_code") or 0) >= 400:
+                detail = record.get("error") or response.get("body")
+                results[record["custom_id"]] = (None, AgentError(f"Batch request failed: {detail}"))
+                continue
+            try:
+                results[record["custom_id"]] = (parse_response_json(response.get("body")), None)
+            except (AgentError, ValueError) as exc:
+                results[record["custom_id"]] = (None, AgentError(f"Batch response was not JSON: {exc}"))
+        return results
+
+    def _request_json(self, path: str, *, method: str = "GET", body: dict[str, Any] | None = None) -> dict[str, Any]:
         payload = request_json(
-            "https://api.openai.com/v1/responses",
-            method="POST",
-            headers={
-                "Accept": "application/json",
-                "Authorization": f"Bearer {self.api_key}",
-            },
-            body={
-                "model": model,
-                "instructions": instructions,
-                "input": f"Return valid JSON only.\n\n{input_text}",
-                "store": False,
-                "text": {"format": {"type": "json_object"}},
-            },
+            f"{self.base_url}{path}",
+            method=method,
+            headers={"Accept": "application/json", "Authorization": f"Bearer {self.api_key}"},
+            body=body,
             timeout=self.timeout,
         )
         if not isinstance(payload, dict):
-            raise AgentError("Unexpected OpenAI response format")
+            raise AgentError(f"Unexpected batch API response for {path}")
+        return payload
 
-        output_text = payload.get("output_text")
-        if isinstance(output_text, str) and output_text.strip():
-            return json.loads(output_text)
+    def _upload(self, path: Path) -> dict[str, Any]:
+        boundary = uuid.uuid4().hex
+        data = (
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"purpose\"\r\n\r\nbatch\r\n"
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{path.name}\"\r\n"
+            "Content-Type: application/jsonl\r\n\r\n"
+        ).encode() + path.read_bytes() + f"\r\n--{boundary}--\r\n".encode()
+        return json.loads(self._send("/files", method="POST", data=data, content_type=f"multipart/form-data; boundary={boundary}"))
+
+    def _download(self, file_id: str) -> str:
+        content = self._send(f"/files/{file_id}/content")
+        return content if not content or content.endswith("\n") else content + "\n"
+
+    def _send(self, path: str, *, method: str = "GET", data: bytes | None = None, content_type: str | None = None) -> str:
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        if content_type:
+            headers["Content-Type"] = content_type
+        content = http_request(
+            f"{self.base_url}{path}", method=method, headers=headers, data=data, timeout=self.timeout
+        )
+        return content.decode("utf-8")
 
-        for item in payload.get("output", []):
-            if item.get("type") != "message":
-                continue
-            for content in item.get("content", []):
-                if content.get("type") == "output_text" and isinstance(content.get("text"), str):
-                    return json.loads(content["text"])
 
-        raise AgentError("OpenAI response did not contain JSON output text")
+def _write_atomic(path: Path, content: str) -> None:
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_text(content, encoding="utf-8")
+    os.replace(tmp_path, path)
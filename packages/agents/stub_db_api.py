@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+QUEUE_STATES = {"ingested": "ingested", "drafting": "drafting_queue"}
+CLASSIFY_STATES = {"move_to_opportunity_review": "opportunity_review", "trash": "trash"}
+QUARANTINE_AFTER = 5
+
+
+def synthetic_item(index: int, *, state: str) -> dict[str, Any]:
+    return {
+        "id": f"00000000-0000-4000-8000-{index:012d}",
+        "state": state,
+        "source": "reddit",
+        "source_url": f"https://www.reddit.com/r/BenchSub/comments/bench_{index}/",
+        "title": f"Benchmark post {index}: which account type should I open for fees?",
+        "body_text": f"Synthetic body {index} about transfers, fees and account types. " * 10,
+        "raw_payload": {
+            "subreddit": "BenchSub",
+            "score": index % 50,
+            "num_comments": 3,
+            "top_level_comments": [
+                {"author": f"commenter_{n}", "body": f"Synthetic comment {n}", "score": 3 - n} for n in range(3)
+            ],
+        },
+    }
+
+
+class StubQueueState:
+    """In-memory stand-in for the queue endpoints the filter and comment agents call.
+
+    Each item's latency runs from the first queue read that returned it to the write
+    that took it out of its queue. The opportunity_review depth always reads as 0, so
+    filter back-pressure never defers moves during a benchmark.
+    """
+
+    def __init__(self, items: list[dict[str, Any]], *, latency_seconds: float = 0.0) -> None:
+        self.items = {item["id"]: dict(item) for item in items}
+        self.latency_seconds = max(0.0, latency_seconds)
+        self.requests = 0
+        self.first_served: dict[str, float] = {}
+        self.finished: dict[str, float] = {}
+        self.failures: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def read_queue(self, queue: str, *, limit: int, offset: int, deferred: bool) -> list[dict[str, Any]]:
+        state = QUEUE_STATES[queue]
+        now = time.perf_counter()
+        with self._lock:
+            rows = [
+                item
+                for item in self.items.values()
+                if item["state"] == state and bool(item.get("deferred_at")) == deferred
+            ][offset : offset + limit]
+            for item in rows:
+                self.first_served.setdefault(item["id"], now)
+            return [dict(item) for item in rows]
+
+    def finish(self, queue: str, item_id: str, *, state: str | None, deferred: bool = False) -> bool:
+        with self._lock:
+            item = self.items.get(item_id)
+            if item is None or item["state"] != QUEUE_STATES[queue]:
+                return False
+            if deferred:
+                item["deferred_at"] = item.get("deferred_at") or time.time()
+            else:
+                item["state"] = state
+                item["deferred_at"] = None
+            self.finished.setdefault(item_id, time.perf_counter())
+            return True
+
+    def fail(self, queue: str, item_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            item = self.items.get(item_id)
+            if item is None or item["state"] != QUEUE_STATES[queue]:
+                return None
+            self.failures[item_id] = self.failures.get(item_id, 0) + 1
+            quarantined = self.failures[item_id] >= QUARANTINE_AFTER
+            if quarantined:
+                item["state"] = "quarantined"
+                self.finished.setdefault(item_id, time.perf_counter())
+            return {"content_id": item_id, "failure_count": self.failures[item_id], "quarantined": quarantined}
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(item["state"] in QUEUE_STATES.values() and not item.get("deferred_at") for item in self.items.values())
+
+    def item_latencies(self) -> list[float]:
+        with self._lock:
+            return [
+                finished - self.first_served[item_id]
+                for item_id, finished in self.finished.items()
+                if item_id in self.first_served
+            ]
+
+    def state_counts(self) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        with self._lock:
+            for item in self.items.values():
+                counts[item["state"]] = counts.get(item["state"], 0) + 1
+        return counts
+
+
+def make_handler(state: StubQueueState) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, payload: dict[str, Any]) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _begin(self) -> bytes:
+            with state._lock:
+                state.requests += 1
+            if state.latency_seconds:
+                time.sleep(state.latency_seconds)
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def do_GET(self) -> None:
+            self._begin()
+            url = urlsplit(self.path)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            parts = url.path.strip("/").split("/")
+            if parts == ["v1", "queues", "depths"]:
+                self._send(200, {"depths": {"opportunity_review": 0}, "as_of": time.time()})
+            elif parts[:2] == ["v1", "queues"] and len(parts) == 3 and parts[2] in QUEUE_STATES:
+                limit, offset = int(query.get("limit") or 50), int(query.get("offset") or 0)
+                items = state.read_queue(
+                    parts[2], limit=limit, offset=offset, deferred=query.get("deferred") == "true"
+                )
+                self._send(200, {"items": items, "limit": limit, "offset": offset})
+            elif url.path == "/health":
+                self._send(200, {"status": "ok"})
+            else:
+                self._send(404, {"detail": "Not Found"})
+
+        def do_POST(self) -> None:
+            body = json.loads(self._begin() or b"{}")
+            parts = self.path.strip("/").split("/")
+            if len(parts) != 5 or parts[:2] != ["v1", "queues"] or parts[2] not in QUEUE_STATES:
+                self._send(404, {"detail": "Not Found"})
+                return
+            queue, item_id, action = parts[2], parts[3], parts[4]
+            if action == "fail":
+                result = state.fail(queue, item_id)
+                if result is None:
+                    self._send(409, {"detail": "Item is not in that queue"})
+                else:
+                    self._send(200, result)
+                return
+            if queue == "ingested" and action == "classify" and body.get("decision") in {*CLASSIFY_STATES, "defer"}:
+                decision = body["decision"]
+                finished = state.finish(
+                    queue, item_id, state=CLASSIFY_STATES.get(decision), deferred=decision == "defer"
+                )
+            elif queue == "drafting" and action == "generate-comment":
+                finished = state.finish(queue, item_id, state="approval_review")
+            else:
+                self._send(404, {"detail": "Not Found"})
+                return
+            if finished:
+                self._send(200, {"content_id": item_id})
+            else:
+                self._send(409, {"detail": "Item is not in that queue"})
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return
+
+    return Handler
+
+
+def start_stub_db_api(state: StubQueueState, *, port: int = 0) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run an in-memory stub of the agent-facing DB API queues.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--ingested", type=int, default=100, help="Synthetic items to seed into the ingested queue.")
+    parser.add_argument("--drafting", type=int, default=0, help="Synthetic items to seed into the drafting queue.")
+    args = parser.parse_args()
+
+    items = [synthetic_item(index, state="ingested") for index in range(args.ingested)]
+    items += [synthetic_item(args.ingested + index, state="drafting_queue") for index in range(args.drafting)]
+    state = StubQueueState(items, latency_seconds=args.latency_ms / 1000)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(state))
+    print(f"stub db_api listening on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,40 +1,336 @@
 from __future__ import annotations
 
 import json
+import math
 import sys
+import time
+from dataclasses import dataclass, fields
 from pathlib import Path
+from typing import Any
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-from shared_utils import DBAPIClient, load_runtime_config, parse_common_args, run_loop
+from shared_utils import (
+    AgentError,
+    DBAPIClient,
+    HTTPStatusError,
+    get_env_var,
+    load_agent_env,
+    load_runtime_config,
+    parse_common_args,
+    request_json,
+    run_loop,
+)
+
+SETTINGS_PATH = "/v1/settings/triage_manager"
+RATE_SMOOTHING = 0.3
+MAX_RUN_CYCLES = 5
+TERMINAL_JOB_STATUSES = {"succeeded", "failed", "cancelled"}
+
+
+@dataclass(slots=True)
+class ControlSettings:
+    """The `triage_manager` automation setting; fields missing from the stored value keep these defaults."""
+
+    enabled: bool = False
+    target_drain_seconds: float = 600.0
+    max_age_seconds: float = 1800.0
+    min_in_flight: int = 1
+    max_in_flight: int = 8
+    filter_limit: int = 25
+    comment_limit: int = 10
+    scrape_limit: int = 5
+    scrape_min_interval_seconds: float = 120.0
+    scrape_max_interval_seconds: float = 1800.0
+    ingested_high_water: int = 500
+    priority_refresh_seconds: float = 300.0
+
+    @classmethod
+    def from_value(cls, value: Any) -> ControlSettings:
+        settings = cls()
+        if not isinstance(value, dict):
+            return settings
+        for setting in fields(cls):
+            if setting.name not in value:
+                continue
+            default, raw = getattr(settings, setting.name), value[setting.name]
+            try:
+                # bool("false") is True and int(True) is 1, so booleans must match exactly.
+                if isinstance(default, bool) or isinstance(raw, bool):
+                    if not (isinstance(default, bool) and isinstance(raw, bool)):
+                        raise TypeError(setting.name)
+                    setattr(settings, setting.name, raw)
+                else:
+                    setattr(settings, setting.name, type(default)(raw))
+            except (TypeError, ValueError):
+                print(f"[warn] triage_manager ignoring invalid {setting.name}={raw!r}", file=sys.stderr)
+        return settings
+
+
+@dataclass(slots=True)
+class Stage:
+    """What the manager knows about one service between cycles.
+
+    `depth_key` is the `/v1/queues/depths` entry the stage drains; the scraper has none
+    and is paced by how many new posts each run finds instead. `slot_throughput` is
+    items per second per in-flight LLM call, measured over finished runs.
+    """
+
+    name: str
+    base_url: str
+    depth_key: str | None
+    count_key: str
+    limit_setting: str
+    depth: int | None = None
+    sampled_at: float | None = None
+    drained_since_sample: int = 0
+    arrival_rate: float | None = None
+    drain_rate: float | None = None
+    slot_throughput: float | None = None
+    max_in_flight: int | None = None
+    job_id: str | None = None
+    job_in_flight: int = 1
+    interval_seconds: float | None = None
+    next_run_at: float = 0.0
+
+
+def _smooth(previous: float | None, sample: float) -> float:
+    return sample if previous is None else previous + RATE_SMOOTHING * (sample - previous)
+
+
+def _per_minute(rate: float | None) -> float | None:
+    return None if rate is None else round(rate * 60, 2)
+
+
+def queue_backlog(depths: dict[str, Any], depth_key: str) -> int:
+    depth = int(depths.get(depth_key) or 0)
+    if depth_key == "ingested":
+        # Deferred items wait on review capacity, not on the filter agent.
+        depth -= int(depths.get("deferred") or 0)
+    return max(0, depth)
 
 
 def cycle_factory() -> callable:
-    runtime_config = load_runtime_config()
+    runtime_config = load_runtime_config(poll_interval_default=30)
+    env = load_agent_env()
     db_api = DBAPIClient(runtime_config)
-    views = [
-        "ingested",
-        "opportunity_review",
-        "drafting_queue",
-        "approval_review",
-        "ready_to_publish",
+    stages = [
+        Stage(
+            name="scraper_daemon",
+            base_url=get_env_var(env, "SCRAPER_DAEMON_BASE_URL", "http://127.0.0.1:8001").rstrip("/"),
+            depth_key=None,
+            count_key="created",
+            limit_setting="scrape_limit",
+        ),
+        Stage(
+            name="filter_agent",
+            base_url=get_env_var(env, "FILTER_AGENT_BASE_URL", "http://127.0.0.1:8002").rstrip("/"),
+            depth_key="ingested",
+            count_key="processed",
+            limit_setting="filter_limit",
+        ),
+        Stage(
+            name="comment_agent",
+            base_url=get_env_var(env, "COMMENT_AGENT_BASE_URL", "http://127.0.0.1:8003").rstrip("/"),
+            depth_key="drafting_queue",
+            count_key="processed",
+            limit_setting="comment_limit",
+        ),
     ]
+    latency_windows = get_env_var(env, "TRIAGE_LATENCY_WINDOWS", "3600,86400")
+    settings = ControlSettings()
+    next_priority_refresh = 0.0
+
+    def agent_request(stage: Stage, path: str, *, method: str = "GET", body: dict[str, Any] | None = None) -> dict[str, Any]:
+        payload = request_json(
+            f"{stage.base_url}{path}",
+            method=method,
+            headers={"Accept": "application/json"},
+            body=body,
+            timeout=runtime_config.request_timeout_seconds,
+        )
+        return payload if isinstance(payload, dict) else {}
+
+    def load_settings() -> ControlSettings:
+        try:
+            return ControlSettings.from_value(db_api.get(SETTINGS_PATH).get("value"))
+        except HTTPStatusError as exc:
+            if exc.status == 404:
+                return ControlSettings()
+            print(f"[warn] triage_manager could not read its settings; keeping the last ones: {exc}", file=sys.stderr)
+            return settings
+
+    def collect_job(stage: Stage, now: float) -> None:
+        """Fold a finished run into the stage's throughput and, for the scraper, its cadence."""
+        if stage.job_id is None:
+            return
+        try:
+            job = agent_request(stage, f"/jobs/{stage.job_id}")
+        except HTTPStatusError as exc:
+            if exc.status == 404:
+                stage.job_id = None
+                return
+            raise
+        if job.get("status") not in TERMINAL_JOB_STATUSES:
+            return
+        stage.job_id = None
+        results = [result for result in job.get("results") or [] if isinstance(result, dict)]
+        count = sum(int(result.get(stage.count_key) or 0) for result in results)
+        duration = float(job.get("finished_at") or 0) - float(job.get("started_at") or 0)
+        if stage.depth_key is None:
+            seen = sum(int(result.get("posts_seen") or 0) for result in results)
+            interval = stage.interval_seconds or settings.scrape_min_interval_seconds
+            if count == 0:
+                interval *= 2
+            elif count * 2 >= seen:
+                interval /= 2
+            stage.interval_seconds = min(
+                settings.scrape_max_interval_seconds, max(settings.scrape_min_interval_seconds, interval)
+            )
+            stage.next_run_at = now + stage.interval_seconds
+            return
+        stage.drained_since_sample += count
+        if count and duration > 0:
+            stage.slot_throughput = _smooth(stage.slot_throughput, count / duration / max(1, stage.job_in_flight))
+
+    def observe(stage: Stage, backlog: int, now: float) -> None:
+        if stage.depth is not None and stage.sampled_at is not None and now > stage.sampled_at:
+            elapsed = now - stage.sampled_at
+            drained = stage.drained_since_sample
+            stage.drain_rate = _smooth(stage.drain_rate, drained / elapsed)
+            stage.arrival_rate = _smooth(stage.arrival_rate, max(0, backlog - stage.depth + drained) / elapsed)
+        stage.depth, stage.sampled_at, stage.drained_since_sample = backlog, now, 0
+
+    def target_in_flight(stage: Stage, backlog: int, age: float) -> int:
+        """Enough concurrent LLM calls to clear the backlog within the target time while keeping up with arrivals."""
+        current = stage.max_in_flight or settings.min_in_flight
+        if backlog == 0:
+            target = settings.min_in_flight
+        elif stage.slot_throughput:
+            needed = backlog / max(1.0, settings.target_drain_seconds) + (stage.arrival_rate or 0.0)
+            target = math.ceil(needed / stage.slot_throughput)
+        else:
+            target = current
+        if backlog and age > settings.max_age_seconds:
+            target = max(target, current + 1)
+        return min(settings.max_in_flight, max(settings.min_in_flight, target))
+
+    def control_agent(stage: Stage, backlog: int, age: float) -> list[str]:
+        actions = []
+        if stage.max_in_flight is None:
+            stage.max_in_flight = int(agent_request(stage, "/settings").get("max_in_flight") or 1)
+        target = target_in_flight(stage, backlog, age)
+        if target != stage.max_in_flight:
+            updated = agent_request(stage, "/settings", method="PATCH", body={"max_in_flight": target})
+            actions.append(f"max_in_flight {stage.max_in_flight}->{updated.get('max_in_flight', target)}")
+            stage.max_in_flight = int(updated.get("max_in_flight") or target)
+        if backlog and stage.job_id is None:
+            limit = max(1, getattr(settings, stage.limit_setting))
+            cycles = min(MAX_RUN_CYCLES, math.ceil(backlog / limit))
+            job = agent_request(stage, "/run", method="POST", body={"cycles": cycles, "limit": limit})
+            stage.job_id = job.get("job_id")
+            stage.job_in_flight = stage.max_in_flight
+            actions.append(f"run {cycles}x{limit}")
+        return actions
+
+    def control_scraper(stage: Stage, ingested_backlog: int, now: float) -> list[str]:
+        if stage.job_id is not None or now < stage.next_run_at:
+            return []
+        if ingested_backlog >= settings.ingested_high_water:
+            return ["held: ingested above high water"]
+        job = agent_request(stage, "/run", method="POST", body={"cycles": 1, "limit": max(1, settings.scrape_limit)})
+        stage.job_id = job.get("job_id")
+        return [f"run 1x{max(1, settings.scrape_limit)}"]
+
+    def read_latency() -> dict[str, Any]:
+        """Per-stage time-in-state summary, reduced to what the cycle report needs."""
+        try:
+            payload = db_api.get("/v1/metrics/stage-latency", params={"windows": latency_windows})
+        except AgentError as exc:
+            print(f"[warn] triage_manager could not read stage latency: {exc}", file=sys.stderr)
+            return {"error": str(exc)}
+        windows = {
+            window: {
+                "slowest_state": summary.get("slowest_state"),
+                "stages": {
+                    state: stage
+                    for state, stage in (summary.get("stages") or {}).items()
+                    if stage.get("exits")
+                },
+            }
+            for window, summary in (payload.get("windows") or {}).items()
+        }
+        return {"windows": windows, "caught_up": (payload.get("ledger") or {}).get("caught_up")}
+
+    def refresh_priorities(now: float) -> dict[str, Any] | None:
+        """Re-score waiting items as they age; a derived value, so this runs in observe mode too."""
+        nonlocal next_priority_refresh
+        if settings.priority_refresh_seconds <= 0 or now < next_priority_refresh:
+            return None
+        next_priority_refresh = now + settings.priority_refresh_seconds
+        try:
+            return db_api.post("/v1/priority/refresh", {})
+        except AgentError as exc:
+            print(f"[warn] triage_manager could not refresh priorities: {exc}", file=sys.stderr)
+            return {"error": str(exc)}
 
-    def cycle(*, limit: int) -> None:
-        counts: dict[str, int | str] = {"mode": "read_only"}
-        for view in views:
+    def cycle(*, limit: int) -> dict[str, Any]:
+        nonlocal settings
+        settings = load_settings()
+        now = time.monotonic()
+        try:
+            queue_depths = db_api.get("/v1/queues/depths")
+        except AgentError as exc:
+            print(f"[warn] triage_manager could not read queue depths: {exc}", file=sys.stderr)
+            report = {"mode": "control" if settings.enabled else "observe", "error": str(exc)}
+            print(json.dumps(report))
+            return report
+        depths = queue_depths.get("depths") or {}
+        ages = queue_depths.get("oldest_age_seconds") or {}
+        report: dict[str, Any] = {
+            "mode": "control" if settings.enabled else "observe",
+            "depths": depths,
+            "oldest_age_seconds": ages,
+            "stages": {},
+            "latency": read_latency(),
+            "priority_refresh": refresh_priorities(now),
+        }
+        for stage in stages:
+            entry: dict[str, Any] = {}
             try:
-                payload = db_api.get_queue(f"/v1/views/{view}", limit=limit)
-                counts[view] = int(payload.get("count", 0))
-            except Exception as exc:
-                counts[f"{view}_error"] = str(exc)
-        print(json.dumps(counts))
+                collect_job(stage, now)
+                if stage.depth_key is None:
+                    backlog = queue_backlog(depths, "ingested")
+                    actions = control_scraper(stage, backlog, now) if settings.enabled else []
+                    entry["interval_seconds"] = stage.interval_seconds
+                else:
+                    backlog = queue_backlog(depths, stage.depth_key)
+                    observe(stage, backlog, now)
+                    age = float(ages.get(stage.depth_key) or 0)
+                    actions = control_agent(stage, backlog, age) if settings.enabled else []
+                    entry.update(
+                        {
+                            "backlog": backlog,
+                            "arrival_per_min": _per_minute(stage.arrival_rate),
+                            "drain_per_min": _per_minute(stage.drain_rate),
+                            "slot_throughput_per_min": _per_minute(stage.slot_throughput),
+                            "max_in_flight": stage.max_in_flight,
+                        }
+                    )
+                entry["actions"] = actions
+            except AgentError as exc:
+                entry["error"] = str(exc)
+                print(f"[warn] triage_manager {stage.name}: {exc}", file=sys.stderr)
+            entry["job_id"] = stage.job_id
+            report["stages"][stage.name] = entry
+        print(json.dumps(report))
+        return report
 
     return runtime_config, cycle
 
 
 def main() -> int:
-    args = parse_common_args("Monitor queue health and print queue summaries.")
+    args = parse_common_args("Watch queue depths and ages and steer agent concurrency and run cadence.")
     runtime_config, cycle = cycle_factory()
     return run_loop(args=args, runtime_config=runtime_config, cycle_fn=cycle)
 
@@ -0,0 +1,45 @@
+import { NextRequest, NextResponse } from 'next/server';
+import type { ActorId } from '@/lib/actors';
+import { AGENT_BASE_URLS } from '@/lib/agentServer';
+import { validateDashboardKey } from '@/lib/serverAuth';
+
+async function proxyJob(
+  req: NextRequest,
+  params: { agent: string; jobId: string },
+  method: 'GET' | 'DELETE',
+) {
+  const auth = validateDashboardKey(req);
+  if (!auth.ok) {
+    return NextResponse.json({ detail: auth.message }, { status: 401 });
+  }
+
+  const baseUrl = AGENT_BASE_URLS[params.agent as ActorId];
+  if (!baseUrl) {
+    return NextResponse.json({ detail: 'Unknown agent' }, { status: 400 });
+  }
+
+  const upstream = await fetch(`${baseUrl}/jobs/${encodeURIComponent(params.jobId)}`, {
+    method,
+    cache: 'no-store',
+  });
+
+  const text = await upstream.text();
+  return new NextResponse(text, {
+    status: upstream.status,
+    headers: { 'content-type': 'application/json' },
+  });
+}
+
+export async function GET(
+  req: NextRequest,
+  { params }: { params: { agent: string; jobId: string } },
+) {
+  return proxyJob(req, params, 'GET');
+}
+
+export async function DELETE(
+  req: NextRequest,
+  { params }: { params: { agent: string; jobId: string } },
+) {
+  return proxyJob(req, params, 'DELETE');
+}
@@ -1,13 +1,8 @@
 import { NextRequest, NextResponse } from 'next/server';
 import type { ActorId } from '@/lib/actors';
+import { AGENT_BASE_URLS } from '@/lib/agentServer';
 import { validateDashboardKey } from '@/lib/serverAuth';
 
-const AGENT_BASE_URLS: Record<ActorId, string> = {
-  scraper_daemon: process.env.SCRAPER_DAEMON_BASE_URL || 'http://127.0.0.1:8001',
-  filter_agent: process.env.FILTER_AGENT_BASE_URL || 'http://127.0.0.1:8002',
-  comment_agent: process.env.COMMENT_AGENT_BASE_URL || 'http://127.0.0.1:8003',
-};
-
 export async function POST(
   req: NextRequest,
   { params }: { params: { agent: string } },
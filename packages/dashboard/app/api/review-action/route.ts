@@ -1,7 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { validateDashboardKey } from '@/lib/serverAuth';
 
-type TargetState = 'opportunity_review' | 'drafting_queue' | 'ready_to_publish' | 'trash';
+type TargetState = 'opportunity_review' | 'drafting_queue' | 'ready_to_publish' | 'trash' | 'release';
 
 export async function POST(req: NextRequest) {
   const auth = validateDashboardKey(req);
@@ -32,14 +32,15 @@ export async function POST(req: NextRequest) {
 
   const results = [];
   for (const contentId of contentIds) {
-    const upstream = await fetch(`${baseUrl}/v1/content/${contentId}/move`, {
+    const isRelease = targetState === 'release';
+    const upstream = await fetch(`${baseUrl}/v1/content/${contentId}/${isRelease ? 'release' : 'move'}`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
         'X-API-Key': token,
       },
       body: JSON.stringify({
-        target_state: targetState,
+        ...(isRelease ? {} : { target_state: targetState }),
         actor: 'user',
         actor_label: 'dashboard-review',
       }),
@@ -9,6 +9,7 @@ const VALID_VIEWS = new Set<QueueView>([
   'approval_review',
   'ready_to_publish',
   'trash',
+  'quarantined',
 ]);
 
 export async function GET(
@@ -4,7 +4,13 @@ import type { ReactNode } from 'react';
 import { useEffect, useRef, useState, type MouseEvent as ReactMouseEvent } from 'react';
 import type { QueueResponse, QueueView } from '@/lib/types';
 import { QUEUE_VIEWS } from '@/lib/types';
-import { ACTORS, type ActorId, type ActorRunResponse } from '@/lib/actors';
+import {
+  ACTIVE_JOB_STATUSES,
+  ACTORS,
+  JOB_POLL_INTERVAL_MS,
+  type ActorId,
+  type ActorRunResponse,
+} from '@/lib/actors';
 import {
   clearStoredDashboardKey,
   getStoredDashboardKey,
@@ -274,11 +280,22 @@ export default function QueueDashboard() {
         },
         body: JSON.stringify({ cycles, limit: 1 }),
       });
-      const payload = await response.json();
+      let payload = await response.json();
       setActorResults((current) => ({ ...current, [actor]: payload }));
       if (!response.ok) {
         throw new Error(payload.detail || `Failed (${response.status})`);
       }
+      while (ACTIVE_JOB_STATUSES.includes((payload as ActorRunResponse).status)) {
+        await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+        const jobResponse = await fetch(`/api/agents/${actor}/jobs/${payload.job_id}`, {
+          headers: { 'x-dashboard-key': dashboardKey },
+        });
+        payload = await jobResponse.json();
+        setActorResults((current) => ({ ...current, [actor]: payload }));
+        if (!jobResponse.ok) {
+          throw new Error(payload.detail || `Failed (${jobResponse.status})`);
+        }
+      }
       await load();
     } catch (err) {
       setActorResults((current) => ({
@@ -577,6 +594,10 @@ export default function QueueDashboard() {
     ],
     ready_to_publish: [{ value: 'trash', label: 'Trash' }],
     trash: [],
+    quarantined: [
+      { value: 'release', label: 'Release To Queue' },
+      { value: 'trash', label: 'Trash' },
+    ],
   };
 
   const bulkOptions = bulkOptionsByView[selected];
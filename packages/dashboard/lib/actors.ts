@@ -1,11 +1,21 @@
 export type ActorId = 'scraper_daemon' | 'filter_agent' | 'comment_agent';
 
+export type ActorJobStatus = 'queued' | 'running' | 'succeeded' | 'failed' | 'cancelled';
+
 export type ActorRunResponse = {
+  job_id: string;
   agent: ActorId;
+  status: ActorJobStatus;
   cycles_requested: number;
+  cycles_completed: number;
   results: Record<string, unknown>[];
+  error: string | null;
+  deduplicated?: boolean;
 };
 
+export const ACTIVE_JOB_STATUSES: ActorJobStatus[] = ['queued', 'running'];
+export const JOB_POLL_INTERVAL_MS = 2000;
+
 export const ACTORS: { id: ActorId; label: string; description: string }[] = [
   {
     id: 'scraper_daemon',
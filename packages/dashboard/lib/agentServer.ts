@@ -0,0 +1,7 @@
+import type { ActorId } from '@/lib/actors';
+
+export const AGENT_BASE_URLS: Record<ActorId, string> = {
+  scraper_daemon: process.env.SCRAPER_DAEMON_BASE_URL || 'http://127.0.0.1:8001',
+  filter_agent: process.env.FILTER_AGENT_BASE_URL || 'http://127.0.0.1:8002',
+  comment_agent: process.env.COMMENT_AGENT_BASE_URL || 'http://127.0.0.1:8003',
+};
@@ -4,7 +4,8 @@ export type QueueView =
   | 'drafting_queue'
   | 'approval_review'
   | 'ready_to_publish'
-  | 'trash';
+  | 'trash'
+  | 'quarantined';
 
 export type QueueResponse = {
   items: Record<string, unknown>[];
@@ -20,4 +21,5 @@ export const QUEUE_VIEWS: QueueView[] = [
   'approval_review',
   'ready_to_publish',
   'trash',
+  'quarantined',
 ];
@@ -83,6 +83,30 @@ class SupabaseClient:
         payload = self._request("GET", relation, params=params)
         return payload if isinstance(payload, list) else []
 
+    def count_rows(self, relation: str, *, filters: dict[str, str] | None = None) -> int:
+        """Exact row count from PostgREST's `Content-Range` header, without fetching any rows."""
+        params = {"select": "*", **(filters or {})}
+        request = Request(
+            url=f"{self.project_url}/rest/v1/{relation}?{urlencode(params, doseq=True)}",
+            method="HEAD",
+            headers={
+                "apikey": self.api_key,
+                "Authorization": f"Bearer {self.api_key}",
+                "Prefer": "count=exact",
+            },
+        )
+        try:
+            with urlopen(request, timeout=30) as response:
+                content_range = response.headers.get("Content-Range") or ""
+        except HTTPError as exc:
+            raise SupabaseAPIError(f"Supabase HTTP error {exc.code}", status_code=exc.code) from exc
+        except URLError as exc:
+            raise SupabaseAPIError(f"Supabase network error: {exc.reason}", status_code=502) from exc
+        total = content_range.rpartition("/")[2]
+        if not total.isdigit():
+            raise SupabaseAPIError("Supabase response has no exact count", status_code=502)
+        return int(total)
+
     def get_one(
         self,
         relation: str,
@@ -107,14 +131,18 @@ class SupabaseClient:
             return payload
         raise SupabaseAPIError("Insert returned empty payload", status_code=502)
 
-    def insert_many(self, table: str, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    def insert_many(
+        self, table: str, rows: list[dict[str, Any]], *, ignore_duplicates: bool = False
+    ) -> list[dict[str, Any]]:
+        """Insert rows; with `ignore_duplicates`, rows whose primary key exists are skipped and not returned."""
         normalized_rows = _normalize_rows(rows)
+        prefer = "return=representation,resolution=ignore-duplicates" if ignore_duplicates else "return=representation"
         payload = self._request(
             "POST",
             table,
             params={"select": "*"},
             body=normalized_rows,
-            extra_headers={"Prefer": "return=representation"},
+            extra_headers={"Prefer": prefer},
         )
         if isinstance(payload, list):
             return payload
@@ -1,17 +1,24 @@
 from __future__ import annotations
 
+import hashlib
 import json
-from datetime import datetime, timezone
+from collections.abc import Iterable
+from contextlib import nullcontext
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
 from typing import Any, Literal
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from fastapi import Depends, FastAPI, Header, HTTPException, Query
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field, ValidationError
 
 from api_db import SupabaseAPIError, SupabaseClient
 from api_transactions import log_transactions, tx_row
+from near_duplicates import NearDuplicateIndex, content_signature, hamming_distance
+from priority import PriorityWeights, content_priority, parse_thresholds
+from queue_events import QueueEvents
+from stage_latency import PIPELINE_STATES, StageLatencyTracker
 from utils.dotenv_utils import load_dotenv
 from utils.supabase_reader import get_env_var, require_project_url
 
@@ -29,8 +36,12 @@ class IngestRequest(BaseModel):
     actor_label: str = "scraper-daemon"
 
 
+class IngestBatchRequest(BaseModel):
+    items: list[dict[str, Any]] = Field(default_factory=list)
+
+
 class ClassifyRequest(BaseModel):
-    decision: Literal["move_to_opportunity_review", "trash"]
+    decision: Literal["move_to_opportunity_review", "trash", "defer"]
     actor: Literal["system", "agent", "user"] = "agent"
     actor_label: str = "scraper-subagent"
     details: dict[str, Any] = Field(default_factory=dict)
@@ -58,6 +69,24 @@ class ManualMoveRequest(HumanReviewMoveRequest):
     target_state: Literal["opportunity_review", "drafting_queue", "ready_to_publish", "trash"]
 
 
+class ItemFailureRequest(BaseModel):
+    error: str
+    actor: Literal["system", "agent", "user"] = "agent"
+    actor_label: str = "agent"
+
+
+class CommentEnrichmentRequest(BaseModel):
+    status: Literal["done", "failed", "pending"] = "done"
+    top_level_comments: list[dict[str, Any]] = Field(default_factory=list)
+    comment_summary: dict[str, Any] = Field(default_factory=dict)
+    error: str | None = None
+
+
+class AutomationSettingRequest(BaseModel):
+    value: dict[str, Any] = Field(default_factory=dict)
+    actor_label: str = "dashboard"
+
+
 class ExtensionStatusRequest(BaseModel):
     status: Literal["submitted", "deleted"]
     generated_comment_id: UUID | None = None
@@ -84,6 +113,15 @@ if not SERVICE_TOKEN:
     raise RuntimeError("Missing DB_API_SERVICE_TOKEN (or API_SERVICE_TOKEN) in db_api/.env")
 
 client = SupabaseClient(project_url=PROJECT_URL, api_key=SUPABASE_KEY)
+NEAR_DUPLICATES_ENABLED = (get_env_var(ENV, "NEAR_DUPLICATE_DETECTION") or "true").lower() != "false"
+NEAR_DUPLICATES = NearDuplicateIndex(
+    max_distance=int(get_env_var(ENV, "NEAR_DUPLICATE_MAX_DISTANCE") or "6"),
+    window_seconds=float(get_env_var(ENV, "NEAR_DUPLICATE_WINDOW_HOURS") or "72") * 3600,
+    max_entries=int(get_env_var(ENV, "NEAR_DUPLICATE_MAX_ENTRIES") or "20000"),
+)
+_near_duplicates_primed = False
+QUEUE_EVENTS = QueueEvents()
+STAGE_LATENCY = StageLatencyTracker(client)
 app = FastAPI(title="WS DB API", version="0.1.0")
 
 VIEW_MAP: dict[str, str] = {
@@ -93,11 +131,66 @@ VIEW_MAP: dict[str, str] = {
     "approval_review": "v_approval_review",
     "ready_to_publish": "v_ready_to_publish",
     "trash": "v_trashed",
+    "quarantined": "v_quarantined",
+}
+
+AGENT_QUEUE_STATES: dict[str, str] = {
+    "ingested": "ingested",
+    "drafting": "drafting_queue",
+}
+QUEUE_HOLD_RESET: dict[str, Any] = {
+    "failure_count": 0,
+    "next_attempt_at": None,
+    "last_error": None,
+    "quarantined_at": None,
+    "deferred_at": None,
+}
+DEPTH_FILTERS: dict[str, dict[str, str]] = {
+    **{
+        state: {"state": f"eq.{state}", "is_trashed": "eq.false", "quarantined_at": "is.null"}
+        for state in PIPELINE_STATES
+    },
+    "deferred": {"state": "eq.ingested", "is_trashed": "eq.false", "deferred_at": "not.is.null"},
+    "trash": {"is_trashed": "eq.true"},
+    "quarantined": {"quarantined_at": "not.is.null", "is_trashed": "eq.false"},
+}
+AUTOMATION_SETTING_KEYS = {"triage_manager"}
+DEFERRED_ORDER = "priority.asc,ai_confidence.desc.nullslast,deferred_at.asc"
+QUEUE_MAX_ATTEMPTS = max(1, int(get_env_var(ENV, "QUEUE_MAX_ATTEMPTS") or "5"))
+QUEUE_RETRY_BASE_SECONDS = float(get_env_var(ENV, "QUEUE_RETRY_BASE_SECONDS") or "60")
+QUEUE_RETRY_MAX_SECONDS = float(get_env_var(ENV, "QUEUE_RETRY_MAX_SECONDS") or "3600")
+COMMENT_ENRICHMENT_MAX_ATTEMPTS = max(1, int(get_env_var(ENV, "COMMENT_ENRICHMENT_MAX_ATTEMPTS") or "5"))
+PRIORITY_WEIGHTS = PriorityWeights(
+    score=float(get_env_var(ENV, "PRIORITY_SCORE_WEIGHT") or "1"),
+    comments=float(get_env_var(ENV, "PRIORITY_COMMENTS_WEIGHT") or "2"),
+    half_life_hours=float(get_env_var(ENV, "PRIORITY_HALF_LIFE_HOURS") or "12"),
+    thresholds=parse_thresholds(get_env_var(ENV, "PRIORITY_THRESHOLDS")),
+)
+# Matches content_state_state_priority_idx, so queue heads come straight off the index.
+QUEUE_ORDER = "priority.asc,last_transition_at.asc"
+PRIORITY_REFRESH_STATES = ("ingested", "opportunity_review", "drafting_queue", "approval_review")
+
+MAX_INGEST_BATCH = 200
+MAX_QUEUE_WAIT_SECONDS = 30
+MAX_QUEUE_PARTITIONS = 64
+# Items whose comments were left for later, most urgent first: drafting needs them now,
+# reviewers next, and deferred items have already passed the filter.
+COMMENT_ENRICHMENT_SOURCES: tuple[tuple[str, dict[str, str]], ...] = (
+    ("v_drafting_queue", {}),
+    ("v_opportunity_review", {}),
+    ("v_ingested", {"deferred_at": "not.is.null"}),
+)
+
+DEFINED_LIST_KEYS: dict[str, str] = {
+    "subreddit": "subreddits",
+    "keyword": "keywords",
+    "account": "accounts",
+    "channel": "channels",
 }
 
 
 def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    return datetime.now(UTC).isoformat()
 
 
 def _to_eq(value: str) -> str:
@@ -112,11 +205,228 @@ def _to_payload(model: BaseModel) -> dict[str, Any]:
     return model.dict(exclude_none=True)  # fallback
 
 
+def _in_list(values: list[str]) -> str:
+    """PostgREST `in.(...)` filter with each value quoted and its backslashes and quotes escaped.
+
+    Scraped ids are untrusted, so a comma, parenthesis or quote must not end the value early.
+    """
+    quoted = ",".join('"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"' for value in values)
+    return f"in.({quoted})"
+
+
+def _content_row(request: IngestRequest) -> dict[str, Any]:
+    payload = _to_payload(request)
+    payload.pop("actor", None)
+    payload.pop("actor_label", None)
+    return payload
+
+
+def _prime_near_duplicates() -> None:
+    """Seed the in-memory index with recent canonical content after a restart.
+
+    Runs under the index lock, so concurrent ingests wait for the seed instead of
+    checking against a half-filled index. If the read fails, the next ingest retries.
+    """
+    global _near_duplicates_primed
+    with NEAR_DUPLICATES.lock:
+        if _near_duplicates_primed:
+            return
+        cutoff = datetime.now(UTC) - timedelta(seconds=NEAR_DUPLICATES.window_seconds)
+        try:
+            rows = client.list_rows(
+                "content",
+                limit=min(NEAR_DUPLICATES.max_entries, 1000),
+                offset=0,
+                filters={
+                    "scraped_at": f"gte.{cutoff.isoformat()}",
+                    "raw_payload->near_duplicate_of": "is.null",
+                    "order": "scraped_at.desc",
+                },
+                columns="id,source_content_id,title,body_text,scraped_at",
+            )
+        except SupabaseAPIError:
+            return
+
+        for row in reversed(rows):
+            signature = content_signature(row.get("title"), row.get("body_text"))
+            if signature is None or not row.get("id"):
+                continue
+            try:
+                indexed_at = datetime.fromisoformat(str(row.get("scraped_at"))).timestamp()
+            except ValueError:
+                indexed_at = None
+            NEAR_DUPLICATES.add(str(row["id"]), str(row.get("source_content_id")), signature, indexed_at=indexed_at)
+        _near_duplicates_primed = True
+
+
+def _insert_new_content(requests: list[IngestRequest]) -> list[dict[str, Any]]:
+    """Insert content, state and ledger rows for items not yet in the database.
+
+    Items that are near-duplicates of recent content (including earlier items in the
+    same call) are stored with `raw_payload.near_duplicate_of` and trashed immediately
+    so they skip classification; one whose canonical item was not stored is stored as new
+    content instead. Results are returned in input order.
+    """
+    signatures = [
+        content_signature(request.title, request.body_text) if NEAR_DUPLICATES_ENABLED else None
+        for request in requests
+    ]
+    detecting = any(signature is not None for signature in signatures)
+    if detecting:
+        _prime_near_duplicates()
+
+    canonical: list[int] = []
+    links: dict[int, dict[str, Any]] = {}
+    local_links: dict[int, tuple[int, int]] = {}
+    contents: dict[int, dict[str, Any]] = {}
+    canonical_rows: dict[int, dict[str, Any]] = {}
+    reserved: list[str] = []
+    index_by_key = {(request.source, request.source_content_id): index for index, request in enumerate(requests)}
+    # Look up and reserve under the index lock, so two requests carrying the same story
+    # cannot both miss each other. Canonical rows get their id up front for the
+    # reservation; the insert itself runs outside the lock.
+    with NEAR_DUPLICATES.lock if detecting else nullcontext():
+        for index, signature in enumerate(signatures):
+            if signature is None:
+                canonical.append(index)
+                continue
+            match = NEAR_DUPLICATES.find(signature)
+            if match:
+                entry, distance = match
+                links[index] = {
+                    "content_id": entry.content_id,
+                    "source_content_id": entry.source_content_id,
+                    "distance": distance,
+                }
+                continue
+            local_match = min(
+                (
+                    (hamming_distance(signature, signatures[other]), other)
+                    for other in canonical
+                    if signatures[other] is not None
+                ),
+                default=None,
+            )
+            if local_match and local_match[0] <= NEAR_DUPLICATES.max_distance:
+                local_links[index] = local_match
+                continue
+            canonical.append(index)
+
+        for index in canonical:
+            canonical_rows[index] = {**_content_row(requests[index]), "id": str(uuid4())}
+            if signatures[index] is not None:
+                content_id = canonical_rows[index]["id"]
+                NEAR_DUPLICATES.add(content_id, requests[index].source_content_id, signatures[index])
+                reserved.append(content_id)
+
+    inserted: list[dict[str, Any]] = []
+    try:
+        if canonical_rows:
+            inserted = client.insert_many("content", list(canonical_rows.values()))
+    finally:
+        stored = {str(row["id"]) for row in inserted}
+        NEAR_DUPLICATES.discard(content_id for content_id in reserved if content_id not in stored)
+    for row in inserted:
+        contents[index_by_key[(row["source"], row["source_content_id"])]] = row
+
+    # A local duplicate whose canonical was not stored is stored as new content instead.
+    orphans = [index for index, (_, other) in local_links.items() if other not in contents]
+    for index, (distance, other) in local_links.items():
+        if other in contents:
+            links[index] = {
+                "content_id": contents[other]["id"],
+                "source_content_id": contents[other]["source_content_id"],
+                "distance": distance,
+            }
+    second_rows = [_content_row(requests[index]) for index in orphans]
+    for index in sorted(links):
+        row = _content_row(requests[index])
+        row["raw_payload"] = {**row.get("raw_payload", {}), "near_duplicate_of": links[index]}
+        second_rows.append(row)
+    if second_rows:
+        for row in client.insert_many("content", second_rows):
+            index = index_by_key[(row["source"], row["source_content_id"])]
+            contents[index] = row
+            if index in orphans and signatures[index] is not None:
+                NEAR_DUPLICATES.add(str(row["id"]), row["source_content_id"], signatures[index])
+
+    current = datetime.now(UTC)
+    now = current.isoformat()
+    state_rows = []
+    txs = []
+    for index, content in sorted(contents.items()):
+        request = requests[index]
+        link = links.get(index)
+        state_rows.append(
+            {
+                "content_id": content["id"],
+                "state": "ingested",
+                "priority": content_priority(
+                    request.raw_payload, request.source_created_at, now=current, weights=PRIORITY_WEIGHTS
+                ),
+                "is_trashed": link is not None,
+                "trashed_at": now if link else None,
+                "trashed_reason": "near_duplicate" if link else None,
+                "last_transition_at": now,
+            }
+        )
+        txs.append(
+            tx_row(
+                content_id=content["id"],
+                action="ingested",
+                actor=request.actor,
+                actor_label=request.actor_label,
+                details={"source": request.source},
+            )
+        )
+        if link:
+            txs.append(
+                tx_row(
+                    content_id=content["id"],
+                    action="trashed",
+                    actor="system",
+                    actor_label="near-duplicate-detector",
+                    from_state="ingested",
+                    details={"reason": "near_duplicate", "near_duplicate_of": link},
+                )
+            )
+    states = {row["content_id"]: row for row in client.insert_many("content_state", state_rows)} if state_rows else {}
+    log_transactions(client, txs)
+    if len(links) < len(contents):
+        QUEUE_EVENTS.notify("ingested")
+
+    return [
+        {
+            "content": contents.get(index),
+            "content_state": states.get(contents[index]["id"]) if index in contents else None,
+            "near_duplicate_of": links.get(index),
+        }
+        for index in range(len(requests))
+    ]
+
+
 def _require_auth(x_api_key: str | None = Header(default=None, alias="X-API-Key")) -> None:
     if not x_api_key or x_api_key != SERVICE_TOKEN:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
 
+def _oldest_ages(now: datetime, states: Iterable[str] = PIPELINE_STATES) -> dict[str, float | None]:
+    """Seconds the longest-waiting item of each pipeline state has been there, or None when empty."""
+    ages: dict[str, float | None] = {}
+    for state in states:
+        oldest = client.get_one(
+            "content_state",
+            filters={**DEPTH_FILTERS[state], "order": "last_transition_at.asc"},
+            columns="last_transition_at",
+        )
+        ages[state] = (
+            round((now - datetime.fromisoformat(str(oldest["last_transition_at"]))).total_seconds(), 1)
+            if oldest and oldest.get("last_transition_at")
+            else None
+        )
+    return ages
+
+
 def _read_state_or_404(content_id: str) -> dict[str, Any]:
     state = client.get_one("content_state", filters={"content_id": _to_eq(content_id)})
     if not state:
@@ -153,6 +463,7 @@ def _manual_move_content(content_id_str: str, request: ManualMoveRequest) -> dic
                 "trashed_at": _now_iso(),
                 "trashed_reason": "manual_dashboard_move",
                 "last_transition_at": _now_iso(),
+                **QUEUE_HOLD_RESET,
             },
         )
         logged = log_transactions(
@@ -178,6 +489,7 @@ def _manual_move_content(content_id_str: str, request: ManualMoveRequest) -> dic
                 "trashed_at": None,
                 "trashed_reason": None,
                 "last_transition_at": _now_iso(),
+                **QUEUE_HOLD_RESET,
             },
         )
         logged = log_transactions(
@@ -194,13 +506,45 @@ def _manual_move_content(content_id_str: str, request: ManualMoveRequest) -> dic
                 )
             ],
         )
+        if request.target_state == "drafting_queue":
+            QUEUE_EVENTS.notify("drafting")
 
     return {"content_state": updated[0] if updated else None, "transactions": logged}
 
 
-def _queue_response(relation: str, *, limit: int, offset: int) -> dict[str, Any]:
+def _defined_lists_version(rows: list[dict[str, Any]]) -> str:
+    fingerprint = sorted(
+        (str(row.get("list_type")), str(row.get("value")), str(row.get("updated_at"))) for row in rows
+    )
+    return hashlib.sha256(json.dumps(fingerprint).encode("utf-8")).hexdigest()[:16]
+
+
+def _due_filters() -> dict[str, str]:
+    """Skip items whose retry backoff has not expired, so failing items cannot block a queue head."""
+    return {"or": f"(next_attempt_at.is.null,next_attempt_at.lte.{_now_iso()})"}
+
+
+def _partition_filters(partition: int, partitions: int) -> dict[str, str]:
+    """Restrict a queue read to worker `partition` of `partitions` by content id.
+
+    Content ids are random v4 UUIDs, so N equal slices of the UUID space split the
+    queue evenly and disjointly, like `hash(id) % N`, and still use the primary key.
+    """
+    if partitions <= 1:
+        return {}
+    if partition >= partitions:
+        raise HTTPException(status_code=422, detail="partition must be less than partitions")
+    bounds = [f"content_id.gte.{UUID(int=(partition << 128) // partitions)}"]
+    if partition < partitions - 1:
+        bounds.append(f"content_id.lt.{UUID(int=((partition + 1) << 128) // partitions)}")
+    return {"and": f"({','.join(bounds)})"}
+
+
+def _queue_response(
+    relation: str, *, limit: int, offset: int, filters: dict[str, str] | None = None
+) -> dict[str, Any]:
     try:
-        items = client.list_rows(relation, limit=limit, offset=offset)
+        items = client.list_rows(relation, limit=limit, offset=offset, filters=filters)
         if relation in {"v_approval_review", "v_ready_to_publish"}:
             items = _enrich_selected_comment_items(items)
         return {"items": items, "limit": limit, "offset": offset, "count": len(items)}
@@ -213,17 +557,22 @@ def _queue_response(relation: str, *, limit: int, offset: int) -> dict[str, Any]
             "v_approval_review",
             "v_ready_to_publish",
             "v_trashed",
+            "v_quarantined",
         }:
-            items = _queue_fallback(relation=relation, limit=limit, offset=offset)
+            items = _queue_fallback(relation=relation, limit=limit, offset=offset, filters=filters)
             if relation in {"v_approval_review", "v_ready_to_publish"}:
                 items = _enrich_selected_comment_items(items)
             return {"items": items, "limit": limit, "offset": offset, "count": len(items)}
         raise
 
 
-def _queue_fallback(*, relation: str, limit: int, offset: int) -> list[dict[str, Any]]:
+def _queue_fallback(
+    *, relation: str, limit: int, offset: int, filters: dict[str, str] | None = None
+) -> list[dict[str, Any]]:
     if relation == "v_trashed":
         state_filters = {"is_trashed": "eq.true"}
+    elif relation == "v_quarantined":
+        state_filters = {"quarantined_at": "not.is.null", "is_trashed": "eq.false"}
     else:
         state_by_relation = {
             "v_ingested": "ingested",
@@ -235,13 +584,13 @@ def _queue_fallback(*, relation: str, limit: int, offset: int) -> list[dict[str,
         state = state_by_relation.get(relation)
         if not state:
             return []
-        state_filters = {"state": f"eq.{state}", "is_trashed": "eq.false"}
+        state_filters = {"state": f"eq.{state}", "is_trashed": "eq.false", "quarantined_at": "is.null"}
 
     state_rows = client.list_rows(
         "content_state",
         limit=limit,
         offset=offset,
-        filters=state_filters,
+        filters={**state_filters, **(filters or {})},
     )
     if not state_rows:
         return []
@@ -337,34 +686,303 @@ def ingest_content(request: IngestRequest) -> dict[str, Any]:
         state = _read_state_or_404(existing["id"])
         return {"created": False, "content": existing, "content_state": state}
 
-    payload = _to_payload(request)
-    payload.pop("actor", None)
-    payload.pop("actor_label", None)
-    content = client.insert_one("content", payload)
-    content_id = content["id"]
-    state = client.insert_one("content_state", {"content_id": content_id, "state": "ingested"})
+    inserted = _insert_new_content([request])[0]
+    return {"created": True, **inserted}
+
+
+@app.post("/v1/content/ingest/batch", dependencies=[Depends(_require_auth)])
+def ingest_content_batch(request: IngestBatchRequest) -> dict[str, Any]:
+    if len(request.items) > MAX_INGEST_BATCH:
+        raise HTTPException(status_code=422, detail=f"Batch exceeds {MAX_INGEST_BATCH} items")
+
+    results: list[dict[str, Any]] = [{} for _ in request.items]
+    parsed_by_key: dict[tuple[str, str], list[tuple[int, IngestRequest]]] = {}
+    for index, raw_item in enumerate(request.items):
+        try:
+            item = IngestRequest(**raw_item)
+        except ValidationError as exc:
+            results[index] = {"created": False, "error": "invalid_ingest_item", "detail": str(exc)}
+            continue
+        parsed_by_key.setdefault((item.source, item.source_content_id), []).append((index, item))
+
+    content_ids: dict[tuple[str, str], str] = {}
+    for source in {key[0] for key in parsed_by_key}:
+        source_content_ids = [key[1] for key in parsed_by_key if key[0] == source]
+        existing_rows = client.list_rows(
+            "content",
+            limit=len(source_content_ids),
+            offset=0,
+            filters={"source": _to_eq(source), "source_content_id": _in_list(source_content_ids)},
+            columns="id,source,source_content_id",
+        )
+        for row in existing_rows:
+            content_ids[(row["source"], row["source_content_id"])] = row["id"]
+
+    new_keys = [key for key in parsed_by_key if key not in content_ids]
+    created_keys: set[tuple[str, str]] = set()
+    duplicate_links: dict[tuple[str, str], dict[str, Any]] = {}
+    if new_keys:
+        inserted = _insert_new_content([parsed_by_key[key][0][1] for key in new_keys])
+        for key, item in zip(new_keys, inserted):
+            if not item["content"]:
+                for index, _ in parsed_by_key[key]:
+                    results[index] = {"created": False, "content_id": None, "error": "not_stored"}
+                continue
+            content_ids[key] = item["content"]["id"]
+            created_keys.add(key)
+            if item["near_duplicate_of"]:
+                duplicate_links[key] = item["near_duplicate_of"]
+
+    for key, entries in parsed_by_key.items():
+        if key not in content_ids:
+            continue
+        for position, (index, _) in enumerate(entries):
+            results[index] = {
+                "created": key in created_keys and position == 0,
+                "content_id": content_ids.get(key),
+            }
+            if key in duplicate_links:
+                results[index]["near_duplicate_of"] = duplicate_links[key]
 
-    log_transactions(
-        client,
-        [
-            tx_row(
-                content_id=content_id,
-                action="ingested",
-                actor=request.actor,
-                actor_label=request.actor_label,
-                details={"source": request.source},
+    return {
+        "results": results,
+        "created": sum(1 for result in results if result.get("created")),
+        "count": len(results),
+    }
+
+
+@app.get("/v1/defined-lists", dependencies=[Depends(_require_auth)])
+def read_defined_lists(
+    response: Response,
+    source: Literal["reddit", "x", "youtube"] = Query(default="reddit"),
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+) -> Any:
+    rows = client.list_rows(
+        "defined_lists",
+        limit=1000,
+        offset=0,
+        filters={"source": _to_eq(source), "is_active": "eq.true"},
+        columns="list_type,value,updated_at",
+    )
+    version = _defined_lists_version(rows)
+    etag = f'"{version}"'
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    lists: dict[str, list[str]] = {key: [] for key in DEFINED_LIST_KEYS.values()}
+    for row in sorted(rows, key=lambda row: str(row.get("value"))):
+        key = DEFINED_LIST_KEYS.get(str(row.get("list_type")))
+        value = str(row.get("value") or "").strip()
+        if key and value:
+            lists[key].append(value)
+    return {"source": source, "version": version, **lists}
+
+
+@app.get("/v1/settings/{key}", dependencies=[Depends(_require_auth)])
+def read_automation_setting(key: str) -> dict[str, Any]:
+    if key not in AUTOMATION_SETTING_KEYS:
+        raise HTTPException(status_code=404, detail="Unknown setting")
+    row = client.get_one("automation_settings", filters={"key": _to_eq(key)})
+    if row is None:
+        raise HTTPException(status_code=404, detail="Setting has not been saved yet")
+    return row
+
+
+@app.put("/v1/settings/{key}", dependencies=[Depends(_require_auth)])
+def write_automation_setting(key: str, request: AutomationSettingRequest) -> dict[str, Any]:
+    """Replace the JSON value of an automation setting, creating the row on first write."""
+    if key not in AUTOMATION_SETTING_KEYS:
+        raise HTTPException(status_code=404, detail="Unknown setting")
+    changes = {"value": request.value, "updated_by": request.actor_label, "updated_at": _now_iso()}
+    updated = client.update_rows("automation_settings", filters={"key": _to_eq(key)}, changes=changes)
+    if updated:
+        return updated[0]
+    return client.insert_one("automation_settings", {"key": key, **changes})
+
+
+@app.get("/v1/enrichment/comments", dependencies=[Depends(_require_auth)])
+def read_comment_enrichment_queue(limit: int = Query(default=10, ge=1, le=100)) -> dict[str, Any]:
+    """Items ingested without comments that have since passed the filter, oldest first within each stage."""
+    items: list[dict[str, Any]] = []
+    for relation, filters in COMMENT_ENRICHMENT_SOURCES:
+        if len(items) >= limit:
+            break
+        items.extend(
+            client.list_rows(
+                relation,
+                limit=limit - len(items),
+                filters={
+                    "raw_payload->>comment_enrichment": "eq.pending",
+                    "order": "last_transition_at.asc",
+                    **filters,
+                },
+                columns="content_id,state,source,source_url,permalink:raw_payload->>permalink",
             )
-        ],
+        )
+    return {"items": items, "limit": limit, "count": len(items)}
+
+
+@app.patch("/v1/content/{content_id}/comments", dependencies=[Depends(_require_auth)])
+def attach_content_comments(content_id: UUID, request: CommentEnrichmentRequest) -> dict[str, Any]:
+    """Store comments fetched after ingest in `raw_payload` and clear the pending flag.
+
+    `pending` reports a transient fetch error: the item stays queued with its attempt
+    counted until `COMMENT_ENRICHMENT_MAX_ATTEMPTS`, when it is marked `failed`.
+    """
+    content_id_str = str(content_id)
+    existing = client.get_one("content", filters={"id": _to_eq(content_id_str)}, columns="id,raw_payload")
+    if not existing:
+        raise HTTPException(status_code=404, detail="content_id not found")
+
+    raw_payload = dict(existing.get("raw_payload") or {})
+    status = request.status
+    if status == "pending":
+        attempts = int(raw_payload.get("comment_enrichment_attempts") or 0) + 1
+        raw_payload["comment_enrichment_attempts"] = attempts
+        if attempts >= COMMENT_ENRICHMENT_MAX_ATTEMPTS:
+            status = "failed"
+    raw_payload["comment_enrichment"] = status
+    if status == "done":
+        raw_payload["top_level_comments"] = request.top_level_comments
+        raw_payload["comment_summary"] = request.comment_summary
+        raw_payload.pop("comment_enrichment_error", None)
+    else:
+        raw_payload["comment_enrichment_error"] = request.error
+    updated = client.update_rows(
+        "content", filters={"id": _to_eq(content_id_str)}, changes={"raw_payload": raw_payload}
     )
-    return {"created": True, "content": content, "content_state": state}
+    return {
+        "content_id": content_id_str,
+        "comment_enrichment": status,
+        "content": updated[0] if updated else None,
+    }
 
 
 @app.get("/v1/queues/ingested", dependencies=[Depends(_require_auth)])
 def read_ingested(
     limit: int = Query(default=50, ge=1, le=200),
     offset: int = Query(default=0, ge=0),
+    deferred: bool = Query(default=False),
+    partition: int = Query(default=0, ge=0),
+    partitions: int = Query(default=1, ge=1, le=MAX_QUEUE_PARTITIONS),
+) -> dict[str, Any]:
+    """Unclassified items by priority, or with `deferred=true` items held back by the filter, best first."""
+    filters = {**_due_filters(), **_partition_filters(partition, partitions)}
+    if deferred:
+        filters.update({"deferred_at": "not.is.null", "order": DEFERRED_ORDER})
+    else:
+        filters.update({"deferred_at": "is.null", "order": QUEUE_ORDER})
+    return _queue_response("v_ingested", limit=limit, offset=offset, filters=filters)
+
+
+@app.get("/v1/queues/depths", dependencies=[Depends(_require_auth)])
+def read_queue_depths(
+    states: str | None = Query(default=None, description="Comma-separated depth keys; all of them when omitted"),
+) -> dict[str, Any]:
+    """Exact item counts per pipeline view, plus deferred items still held in `ingested`.
+
+    Also reports how long the oldest item of each pipeline state has been waiting.
+    `states` limits both to the listed keys, so a caller watching one queue pays two
+    PostgREST round trips instead of one per view.
+    """
+    names = list(DEPTH_FILTERS) if states is None else [name.strip() for name in states.split(",") if name.strip()]
+    unknown = sorted(set(names) - set(DEPTH_FILTERS))
+    if not names or unknown:
+        raise HTTPException(status_code=422, detail=f"states must be among {', '.join(DEPTH_FILTERS)}")
+    depths = {name: client.count_rows("content_state", filters=DEPTH_FILTERS[name]) for name in names}
+    now = datetime.now(UTC)
+    return {
+        "depths": depths,
+        "oldest_age_seconds": _oldest_ages(now, [name for name in names if name in PIPELINE_STATES]),
+        "as_of": now.isoformat(),
+    }
+
+
+@app.get("/v1/metrics/stage-latency", dependencies=[Depends(_require_auth)])
+def read_stage_latency(
+    windows: str = Query(default="3600,86400", description="Comma-separated trailing windows in seconds"),
 ) -> dict[str, Any]:
-    return _queue_response("v_ingested", limit=limit, offset=offset)
+    """Time-in-state p50/p95 and exits per pipeline state over trailing windows.
+
+    Each call first folds ledger rows past the stored watermark into `state_durations`,
+    so the summaries never rescan `transactions`. `ledger.caught_up` is false while a
+    large backlog is still being folded in over several calls.
+    """
+    try:
+        windows_seconds = sorted({int(window) for window in windows.split(",") if window.strip()})
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail="windows must be comma-separated integers") from exc
+    if not windows_seconds or not all(60 <= window <= 30 * 86400 for window in windows_seconds):
+        raise HTTPException(status_code=422, detail="Each window must be between 60 seconds and 30 days")
+    ledger = STAGE_LATENCY.advance()
+    now = datetime.now(UTC)
+    return {
+        "oldest_age_seconds": _oldest_ages(now),
+        **STAGE_LATENCY.summary(windows_seconds),
+        "ledger": ledger,
+        "as_of": now.isoformat(),
+    }
+
+
+@app.post("/v1/priority/refresh", dependencies=[Depends(_require_auth)])
+def refresh_priorities(limit: int = Query(default=5000, ge=1, le=50000)) -> dict[str, Any]:
+    """Recompute `priority` for up to `limit` items still waiting in a queue.
+
+    Scores decay with post age, so priorities set at ingest go stale. Only items whose
+    priority changed are written, one update per new priority value and id chunk.
+    """
+    now = datetime.now(UTC)
+    changed: dict[int, list[str]] = {}
+    scanned = 0
+    for state in PRIORITY_REFRESH_STATES:
+        offset = 0
+        while scanned < limit:
+            rows = client.list_rows(
+                VIEW_MAP[state],
+                limit=min(1000, limit - scanned),
+                offset=offset,
+                filters={"order": "content_id.asc"},
+                columns="content_id,priority,source_created_at,"
+                "score:raw_payload->score,num_comments:raw_payload->num_comments",
+            )
+            for row in rows:
+                priority = content_priority(row, row.get("source_created_at"), now=now, weights=PRIORITY_WEIGHTS)
+                if priority != row.get("priority"):
+                    changed.setdefault(priority, []).append(str(row["content_id"]))
+            scanned += len(rows)
+            offset += len(rows)
+            if len(rows) < 1000:
+                break
+
+    for priority, content_ids in changed.items():
+        for start in range(0, len(content_ids), 200):
+            client.update_rows(
+                "content_state",
+                filters={"content_id": _in_list(content_ids[start : start + 200])},
+                changes={"priority": priority},
+            )
+    return {
+        "scanned": scanned,
+        "updated": sum(len(content_ids) for content_ids in changed.values()),
+        "updated_by_priority": {str(priority): len(content_ids) for priority, content_ids in sorted(changed.items())},
+        "truncated": scanned >= limit,
+        "as_of": now.isoformat(),
+    }
+
+
+@app.get("/v1/queues/{queue_name}/events", dependencies=[Depends(_require_auth)])
+async def wait_for_queue_events(
+    queue_name: Literal["ingested", "drafting"],
+    since: int | None = Query(default=None, ge=0),
+    timeout_seconds: float = Query(default=25, ge=0, le=MAX_QUEUE_WAIT_SECONDS),
+) -> dict[str, Any]:
+    """Long-poll until items enter `queue_name` after version `since`, or the timeout passes.
+
+    Runs on the event loop, so idle waiters do not hold threadpool workers.
+    """
+    version, changed = await QUEUE_EVENTS.wait(queue_name, since=since, timeout_seconds=timeout_seconds)
+    return {"queue": queue_name, "version": version, "changed": changed}
 
 
 @app.post("/v1/queues/ingested/{content_id}/classify", dependencies=[Depends(_require_auth)])
@@ -386,7 +1004,20 @@ def classify_ingested(content_id: UUID, request: ClassifyRequest) -> dict[str, A
         )
     ]
 
-    if request.decision == "move_to_opportunity_review":
+    if request.decision == "defer":
+        updated = client.update_rows(
+            "content_state",
+            filters={"content_id": _to_eq(content_id_str)},
+            changes={
+                "deferred_at": current_state.get("deferred_at") or _now_iso(),
+                "ai_confidence": request.details.get("confidence"),
+                "agent_summary": request.details.get("summary"),
+                "failure_count": 0,
+                "next_attempt_at": None,
+                "last_error": None,
+            },
+        )
+    elif request.decision == "move_to_opportunity_review":
         updated = client.update_rows(
             "content_state",
             filters={"content_id": _to_eq(content_id_str)},
@@ -395,6 +1026,7 @@ def classify_ingested(content_id: UUID, request: ClassifyRequest) -> dict[str, A
                 "last_transition_at": _now_iso(),
                 "ai_confidence": request.details.get("confidence"),
                 "agent_summary": request.details.get("summary"),
+                **QUEUE_HOLD_RESET,
             },
         )
         txs.append(
@@ -419,6 +1051,7 @@ def classify_ingested(content_id: UUID, request: ClassifyRequest) -> dict[str, A
                 "ai_confidence": request.details.get("confidence"),
                 "agent_summary": request.details.get("summary"),
                 "last_transition_at": _now_iso(),
+                **QUEUE_HOLD_RESET,
             },
         )
         txs.append(
@@ -458,8 +1091,11 @@ def move_ingested_to_drafting(content_id: UUID, request: HumanReviewMoveRequest)
 def read_drafting_queue(
     limit: int = Query(default=50, ge=1, le=200),
     offset: int = Query(default=0, ge=0),
+    partition: int = Query(default=0, ge=0),
+    partitions: int = Query(default=1, ge=1, le=MAX_QUEUE_PARTITIONS),
 ) -> dict[str, Any]:
-    return _queue_response("v_drafting_queue", limit=limit, offset=offset)
+    filters = {**_due_filters(), **_partition_filters(partition, partitions), "order": QUEUE_ORDER}
+    return _queue_response("v_drafting_queue", limit=limit, offset=offset, filters=filters)
 
 
 @app.post("/v1/queues/opportunity-review/{content_id}/move-to-drafting", dependencies=[Depends(_require_auth)])
@@ -495,7 +1131,7 @@ def generate_comment(content_id: UUID, request: GenerateCommentRequest) -> dict[
     updated = client.update_rows(
         "content_state",
         filters={"content_id": _to_eq(content_id_str)},
-        changes={"state": "approval_review", "last_transition_at": _now_iso()},
+        changes={"state": "approval_review", "last_transition_at": _now_iso(), **QUEUE_HOLD_RESET},
     )
 
     log_transactions(
@@ -522,6 +1158,93 @@ def generate_comment(content_id: UUID, request: GenerateCommentRequest) -> dict[
     return {"generated_comment": comment, "content_state": updated[0] if updated else None}
 
 
+@app.post("/v1/queues/{queue_name}/{content_id}/fail", dependencies=[Depends(_require_auth)])
+def record_item_failure(
+    queue_name: Literal["ingested", "drafting"], content_id: UUID, request: ItemFailureRequest
+) -> dict[str, Any]:
+    """Count a failed agent attempt and hold the item back with exponential backoff.
+
+    After `QUEUE_MAX_ATTEMPTS` failures the item is quarantined: it leaves the agent
+    queue and shows up in the `quarantined` view until a human releases or trashes it.
+    """
+    content_id_str = str(content_id)
+    current_state = _read_state_or_404(content_id_str)
+    if current_state.get("is_trashed") or current_state.get("quarantined_at"):
+        raise HTTPException(status_code=409, detail="Content is trashed or already quarantined")
+    if current_state.get("state") != AGENT_QUEUE_STATES[queue_name]:
+        raise HTTPException(status_code=409, detail=f"Content is not in the {queue_name} queue")
+
+    failure_count = int(current_state.get("failure_count") or 0) + 1
+    error = request.error[:2000]
+    now = datetime.now(UTC)
+    if failure_count >= QUEUE_MAX_ATTEMPTS:
+        changes = {
+            "failure_count": failure_count,
+            "last_error": error,
+            "next_attempt_at": None,
+            "quarantined_at": now.isoformat(),
+        }
+    else:
+        delay = min(QUEUE_RETRY_MAX_SECONDS, QUEUE_RETRY_BASE_SECONDS * 2 ** (failure_count - 1))
+        changes = {
+            "failure_count": failure_count,
+            "last_error": error,
+            "next_attempt_at": (now + timedelta(seconds=delay)).isoformat(),
+        }
+    updated = client.update_rows("content_state", filters={"content_id": _to_eq(content_id_str)}, changes=changes)
+    if "quarantined_at" in changes:
+        log_transactions(
+            client,
+            [
+                tx_row(
+                    content_id=content_id_str,
+                    action="quarantined",
+                    actor=request.actor,
+                    actor_label=request.actor_label,
+                    details={"queue": queue_name, "failure_count": failure_count, "error": error},
+                )
+            ],
+        )
+    return {
+        "content_state": updated[0] if updated else None,
+        "failure_count": failure_count,
+        "quarantined": "quarantined_at" in changes,
+    }
+
+
+@app.post("/v1/content/{content_id}/release", dependencies=[Depends(_require_auth)])
+def release_quarantined_content(content_id: UUID, request: HumanReviewMoveRequest) -> dict[str, Any]:
+    """Return a quarantined item to its queue with a clean failure count."""
+    content_id_str = str(content_id)
+    current_state = _read_state_or_404(content_id_str)
+    if not current_state.get("quarantined_at") or current_state.get("is_trashed"):
+        raise HTTPException(status_code=409, detail="Content is not quarantined")
+
+    updated = client.update_rows(
+        "content_state", filters={"content_id": _to_eq(content_id_str)}, changes=dict(QUEUE_HOLD_RESET)
+    )
+    logged = log_transactions(
+        client,
+        [
+            tx_row(
+                content_id=content_id_str,
+                action="released",
+                actor=request.actor,
+                actor_label=request.actor_label,
+                details={
+                    "failure_count": current_state.get("failure_count"),
+                    "last_error": current_state.get("last_error"),
+                    **request.details,
+                },
+            )
+        ],
+    )
+    for queue_name, state in AGENT_QUEUE_STATES.items():
+        if current_state.get("state") == state:
+            QUEUE_EVENTS.notify(queue_name)
+    return {"content_state": updated[0] if updated else None, "transactions": logged}
+
+
 @app.post("/v1/queues/approval-review/{content_id}/move-to-ready", dependencies=[Depends(_require_auth)])
 def move_approval_review_to_ready(content_id: UUID, request: HumanReviewMoveRequest) -> dict[str, Any]:
     return _manual_move_content(
@@ -544,7 +1267,93 @@ def read_view(
     relation = VIEW_MAP.get(view_name)
     if not relation:
         raise HTTPException(status_code=404, detail="Unknown view")
-    return _queue_response(relation, limit=limit, offset=offset)
+    filters = {"order": QUEUE_ORDER} if view_name in PIPELINE_STATES else None
+    return _queue_response(relation, limit=limit, offset=offset, filters=filters)
+
+
+def _is_move_limit_trash(details: dict[str, Any]) -> bool:
+    """True for a trash the filter made only because its per-cycle move limit was used up.
+
+    Older filter versions did this before back-pressure deferred such items instead;
+    those rows say nothing about relevance.
+    """
+    tags = details.get("tags") if isinstance(details.get("tags"), list) else []
+    return str(details.get("reason") or "").startswith("move_limit_reached_for_cycle") or "move-limit-reached" in tags
+
+
+@app.get("/v1/transactions/classified", dependencies=[Depends(_require_auth)])
+def read_classified_transactions(
+    limit: int = Query(default=200, ge=1, le=1000),
+    after_id: int = Query(default=0, ge=0),
+    newest_first: bool = Query(default=False),
+    before_id: int | None = Query(default=None, ge=1),
+) -> dict[str, Any]:
+    """Classification history joined with the classified text, for offline model training.
+
+    Paged by transaction id: pass `next_after_id` as `after_id` for the next page. With
+    `newest_first`, pages run backwards instead: pass `next_before_id` as `before_id`.
+    Trashes caused by the old per-cycle move limit are left out of `items`.
+    """
+    filters = {"action": "eq.classified"}
+    if newest_first:
+        filters["order"] = "id.desc"
+        if before_id is not None:
+            filters["id"] = f"lt.{before_id}"
+    else:
+        filters.update({"id": f"gt.{after_id}", "order": "id.asc"})
+    txs = client.list_rows(
+        "transactions",
+        limit=limit,
+        offset=0,
+        filters=filters,
+        columns="id,content_id,actor,actor_label,details,created_at",
+    )
+    content_ids = sorted({str(tx["content_id"]) for tx in txs})
+    contents = {
+        str(row["id"]): row
+        for row in (
+            client.list_rows(
+                "content",
+                limit=len(content_ids),
+                offset=0,
+                filters={"id": _in_list(content_ids)},
+                columns="id,source,title,body_text,raw_payload",
+            )
+            if content_ids
+            else []
+        )
+    }
+    items = []
+    for tx in txs:
+        content = contents.get(str(tx["content_id"]))
+        details = tx.get("details") or {}
+        if content is None or details.get("decision") not in {"move_to_opportunity_review", "trash"}:
+            continue
+        if _is_move_limit_trash(details):
+            continue
+        items.append(
+            {
+                "id": tx["id"],
+                "content_id": tx["content_id"],
+                "decision": details["decision"],
+                "confidence": details.get("confidence"),
+                "actor": tx.get("actor"),
+                "actor_label": tx.get("actor_label"),
+                "created_at": tx.get("created_at"),
+                "source": content.get("source"),
+                "title": content.get("title"),
+                "body_text": content.get("body_text"),
+                "subreddit": (content.get("raw_payload") or {}).get("subreddit"),
+            }
+        )
+    return {
+        "items": items,
+        "limit": limit,
+        "after_id": after_id,
+        "next_after_id": txs[-1]["id"] if txs and not newest_first else None,
+        "next_before_id": txs[-1]["id"] if txs and newest_first else None,
+        "count": len(items),
+    }
 
 
 @app.get("/v1/queues/ready-to-publish", dependencies=[Depends(_require_auth)])
@@ -552,7 +1361,7 @@ def read_ready_to_publish(
     limit: int = Query(default=50, ge=1, le=200),
     offset: int = Query(default=0, ge=0),
 ) -> dict[str, Any]:
-    return _queue_response("v_ready_to_publish", limit=limit, offset=offset)
+    return _queue_response("v_ready_to_publish", limit=limit, offset=offset, filters={"order": QUEUE_ORDER})
 
 
 @app.post("/v1/extension/tasks/{content_id}/status", dependencies=[Depends(_require_auth)])
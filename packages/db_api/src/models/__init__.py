@@ -1,22 +1,27 @@
+from .automation_setting import AutomationSetting
 from .content import Content
 from .content_state import ContentState
 from .defined_list import DefinedList
 from .enums import ActionType, ActorType, ContentSource, ListType, PipelineState, PostingStatus
 from .generated_comment import GeneratedComment
 from .posting_event import PostingEvent
+from .state_duration import LedgerWatermark, StateDuration
 from .transaction import Transaction
 
 __all__ = [
     "ActionType",
     "ActorType",
+    "AutomationSetting",
     "Content",
     "ContentSource",
     "ContentState",
     "DefinedList",
     "GeneratedComment",
+    "LedgerWatermark",
     "ListType",
     "PipelineState",
     "PostingEvent",
     "PostingStatus",
+    "StateDuration",
     "Transaction",
 ]
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+
+@dataclass(slots=True, kw_only=True)
+class AutomationSetting:
+    key: str
+    value: dict[str, Any] = field(default_factory=dict)
+    updated_by: str | None = None
+    updated_at: datetime | None = None
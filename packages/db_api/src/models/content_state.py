@@ -20,6 +20,11 @@ class ContentState:
     priority: int = 3
     ai_confidence: Decimal | None = None
     last_transition_at: datetime | None = None
+    failure_count: int = 0
+    next_attempt_at: datetime | None = None
+    last_error: str | None = None
+    quarantined_at: datetime | None = None
+    deferred_at: datetime | None = None
     updated_at: datetime | None = None
 
     def __post_init__(self) -> None:
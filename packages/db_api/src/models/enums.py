@@ -39,6 +39,8 @@ class ActionType(StrEnum):
     REJECTED = "rejected"
     POSTED = "posted"
     TRASHED = "trashed"
+    QUARANTINED = "quarantined"
+    RELEASED = "released"
 
 
 class ActorType(StrEnum):
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from .enums import ActionType, PipelineState
+from .types import UUID
+
+
+@dataclass(slots=True, kw_only=True)
+class StateDuration:
+    transaction_id: int
+    content_id: UUID
+    state: PipelineState
+    entered_at: datetime
+    exited_at: datetime
+    duration_seconds: float
+    exit_action: ActionType
+
+
+@dataclass(slots=True, kw_only=True)
+class LedgerWatermark:
+    name: str
+    last_transaction_id: int = 0
+    updated_at: datetime | None = None
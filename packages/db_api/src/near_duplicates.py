@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+SIGNATURE_BITS = 64
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str, *, shingle_size: int = 1, min_tokens: int = 8) -> int | None:
+    """64-bit SimHash over word shingles, or None when the text is too short to compare.
+
+    Single-word shingles are the default because Reddit posts are short: a one-word
+    edit perturbs only one feature, while reworded posts still land 10+ bits apart.
+    """
+    tokens = _tokens(text)
+    if len(tokens) < min_tokens:
+        return None
+
+    weights = [0] * SIGNATURE_BITS
+    shingles = {" ".join(tokens[index : index + shingle_size]) for index in range(len(tokens) - shingle_size + 1)}
+    for shingle in shingles:
+        feature = _feature_hash(shingle)
+        for bit in range(SIGNATURE_BITS):
+            weights[bit] += 1 if feature >> bit & 1 else -1
+
+    signature = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            signature |= 1 << bit
+    return signature
+
+
+def content_signature(title: str | None, body_text: str | None) -> int | None:
+    return simhash(f"{title or ''}\n{body_text or ''}")
+
+
+def hamming_distance(left: int, right: int) -> int:
+    return (left ^ right).bit_count()
+
+
+@dataclass(slots=True)
+class IndexedContent:
+    content_id: str
+    source_content_id: str
+    signature: int
+    indexed_at: float
+
+
+class NearDuplicateIndex:
+    """Banded LSH index over SimHash signatures of recently ingested content.
+
+    Signatures are split into ``max_distance + 1`` bands, so any pair within
+    ``max_distance`` bits shares at least one band exactly. Entries expire after
+    ``window_seconds`` and the oldest are evicted beyond ``max_entries``.
+
+    Every method takes ``lock``. Callers hold ``lock`` across a lookup and the ``add``
+    that reserves the new item under its future id, so a concurrent near-duplicate
+    cannot slip in between, and ``discard`` the reservation if the item is not stored.
+    """
+
+    def __init__(self, *, max_distance: int = 6, window_seconds: float = 72 * 3600, max_entries: int = 20000) -> None:
+        self.max_distance = max(0, min(max_distance, SIGNATURE_BITS // 2 - 1))
+        self.bands = self.max_distance + 1
+        self.band_bits = SIGNATURE_BITS // self.bands
+        self.window_seconds = window_seconds
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[str, IndexedContent] = OrderedDict()
+        self._buckets: dict[tuple[int, int], set[str]] = {}
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self._entries)
+
+    def _band_keys(self, signature: int) -> list[tuple[int, int]]:
+        mask = (1 << self.band_bits) - 1
+        return [(band, signature >> (band * self.band_bits) & mask) for band in range(self.bands)]
+
+    def find(self, signature: int, *, now: float | None = None) -> tuple[IndexedContent, int] | None:
+        with self.lock:
+            self._evict(time.time() if now is None else now)
+            best: tuple[IndexedContent, int] | None = None
+            for band_key in self._band_keys(signature):
+                for content_id in self._buckets.get(band_key, ()):
+                    entry = self._entries[content_id]
+                    distance = hamming_distance(signature, entry.signature)
+                    if distance <= self.max_distance and (best is None or distance < best[1]):
+                        best = (entry, distance)
+            return best
+
+    def add(
+        self,
+        content_id: str,
+        source_content_id: str,
+        signature: int,
+        *,
+        indexed_at: float | None = None,
+    ) -> None:
+        with self.lock:
+            if content_id in self._entries:
+                return
+            entry = IndexedContent(
+                content_id=content_id,
+                source_content_id=source_content_id,
+                signature=signature,
+                indexed_at=time.time() if indexed_at is None else indexed_at,
+            )
+            self._entries[content_id] = entry
+            for band_key in self._band_keys(signature):
+                self._buckets.setdefault(band_key, set()).add(content_id)
+            self._evict(time.time())
+
+    def discard(self, content_ids: Iterable[str]) -> None:
+        """Drop entries, e.g. reservations whose insert failed; unknown ids are ignored."""
+        with self.lock:
+            for content_id in content_ids:
+                if content_id in self._entries:
+                    self._remove(content_id)
+
+    def _remove(self, content_id: str) -> None:
+        entry = self._entries.pop(content_id)
+        for band_key in self._band_keys(entry.signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is None:
+                continue
+            bucket.discard(content_id)
+            if not bucket:
+                del self._buckets[band_key]
+
+    def _evict(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while self._entries:
+            oldest_id, oldest = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_entries and oldest.indexed_at >= cutoff:
+                break
+            self._remove(oldest_id)
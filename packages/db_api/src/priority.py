@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+# content_state.priority runs from 1 (reply first) to 5; these are the lowest
+# scores that still earn priorities 1 to 4.
+DEFAULT_THRESHOLDS = (8.0, 4.0, 1.0, 0.25)
+
+
+@dataclass(slots=True)
+class PriorityWeights:
+    score: float = 1.0
+    comments: float = 2.0
+    half_life_hours: float = 12.0
+    thresholds: tuple[float, ...] = DEFAULT_THRESHOLDS
+
+
+def parse_thresholds(value: str | None) -> tuple[float, ...]:
+    if not value:
+        return DEFAULT_THRESHOLDS
+    thresholds = tuple(sorted((float(part) for part in value.split(",") if part.strip()), reverse=True))
+    if len(thresholds) != 4:
+        raise ValueError("PRIORITY_THRESHOLDS needs four comma-separated numbers")
+    return thresholds
+
+
+def _count(value: Any) -> float:
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def priority_score(
+    raw_payload: dict[str, Any] | None,
+    source_created_at: datetime | str | None,
+    *,
+    now: datetime,
+    weights: PriorityWeights,
+) -> float:
+    """Engagement on a log scale, halved every `half_life_hours` since the post was made.
+
+    A post with no votes, no comments and no known age scores 1.0. Votes and comments
+    are as of the scrape, so a refresh only moves the score through its age.
+    """
+    payload = raw_payload or {}
+    engagement = weights.score * math.log1p(_count(payload.get("score")))
+    engagement += weights.comments * math.log1p(_count(payload.get("num_comments")))
+    freshness = 1.0
+    if source_created_at and weights.half_life_hours > 0:
+        created = (
+            datetime.fromisoformat(source_created_at) if isinstance(source_created_at, str) else source_created_at
+        )
+        if created.tzinfo is None:
+            created = created.replace(tzinfo=UTC)
+        age_hours = max(0.0, (now - created).total_seconds() / 3600)
+        freshness = 0.5 ** (age_hours / weights.half_life_hours)
+    return (1.0 + engagement) * freshness
+
+
+def priority_bucket(score: float, thresholds: tuple[float, ...] = DEFAULT_THRESHOLDS) -> int:
+    for priority, threshold in enumerate(thresholds, start=1):
+        if score >= threshold:
+            return priority
+    return len(thresholds) + 1
+
+
+def content_priority(
+    raw_payload: dict[str, Any] | None,
+    source_created_at: datetime | str | None,
+    *,
+    now: datetime,
+    weights: PriorityWeights,
+) -> int:
+    return priority_bucket(priority_score(raw_payload, source_created_at, now=now, weights=weights), weights.thresholds)
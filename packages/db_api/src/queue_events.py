@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+
+class QueueEvents:
+    """Per-queue change counters that workers can long-poll instead of re-reading an idle queue.
+
+    Counters live in this process only. They start at 0 when the API starts, and
+    `wait` only blocks while the caller's version is at least the current one. So a
+    restart or a second API worker degrades to a plain timeout instead of a busy loop.
+
+    `notify` is called from threadpool endpoints while `wait` runs on the event loop,
+    so a waiter costs a coroutine rather than a worker thread.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._versions: dict[str, int] = {}
+        self._waiters: dict[str, set[tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+
+    def version(self, queue: str) -> int:
+        with self._lock:
+            return self._versions.get(queue, 0)
+
+    def notify(self, queue: str) -> None:
+        with self._lock:
+            self._versions[queue] = self._versions.get(queue, 0) + 1
+            waiters = list(self._waiters.get(queue, ()))
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # The waiter's loop has closed; nobody is left to wake.
+                continue
+
+    async def wait(self, queue: str, *, since: int | None, timeout_seconds: float) -> tuple[int, bool]:
+        """Wait until `queue` moves past `since` or the timeout passes; returns (version, changed)."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            version = self._versions.get(queue, 0)
+            if since is None or version > since:
+                return version, since is not None
+            self._waiters.setdefault(queue, set()).add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout_seconds)
+        except TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                self._waiters[queue].discard(waiter)
+        version = self.version(queue)
+        return version, version > since
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from api_db import SupabaseAPIError, SupabaseClient
+
+PIPELINE_STATES = ("ingested", "opportunity_review", "drafting_queue", "approval_review", "ready_to_publish")
+WATERMARK_NAME = "state_durations"
+LEDGER_COLUMNS = "id,content_id,action,from_state,to_state,details,created_at"
+ENTRY_LOOKUP_CHUNK = 100
+
+
+def _parse_time(value: Any) -> datetime:
+    return datetime.fromisoformat(str(value))
+
+
+def entered_state(row: dict[str, Any]) -> str | None:
+    """The state a ledger row puts its item into; ingestion rows carry no `to_state`."""
+    if row.get("action") == "ingested":
+        return "ingested"
+    return row.get("to_state")
+
+
+def exited_state(row: dict[str, Any]) -> str | None:
+    """The state a ledger row takes its item out of, or None when it does not end a stay.
+
+    Posting leaves `ready_to_publish` without a `from_state`. Near-duplicates are trashed
+    in the same request that ingests them, so they never waited and are skipped.
+    """
+    if row.get("action") == "posted":
+        return "ready_to_publish"
+    if (row.get("details") or {}).get("reason") == "near_duplicate":
+        return None
+    return row.get("from_state")
+
+
+def percentile(ordered: list[float], fraction: float) -> float | None:
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 1)
+
+
+class StageLatencyTracker:
+    """Folds the `transactions` ledger into one `state_durations` row per completed stay.
+
+    Each `advance` reads only ledger rows past the watermark stored in
+    `ledger_watermarks`. It writes their stays first, ignoring rows already recorded
+    (`transaction_id` is the primary key), and only then moves the watermark with a
+    compare-and-set. A failed write leaves the watermark where it was, so the range is
+    retried, and two API processes racing over one range record each stay once.
+
+    Sequence ids can become visible out of order, because a lower id may commit after
+    a higher one. The watermark therefore stops short of ledger rows younger than
+    `settle_seconds`; this holds as long as no ledger write stays open for longer.
+    """
+
+    def __init__(
+        self, client: SupabaseClient, *, page_size: int = 500, max_pages: int = 10, settle_seconds: float = 10.0
+    ) -> None:
+        self.client = client
+        self.page_size = max(1, page_size)
+        self.max_pages = max(1, max_pages)
+        self.settle_seconds = max(0.0, settle_seconds)
+
+    def watermark(self) -> int:
+        filters = {"name": f"eq.{WATERMARK_NAME}"}
+        row = self.client.get_one("ledger_watermarks", filters=filters)
+        if row is None:
+            try:
+                row = self.client.insert_one("ledger_watermarks", {"name": WATERMARK_NAME, "last_transaction_id": 0})
+            except SupabaseAPIError as exc:
+                if exc.status_code != 409:
+                    raise
+                row = self.client.get_one("ledger_watermarks", filters=filters) or {}
+        return int(row.get("last_transaction_id") or 0)
+
+    def advance(self) -> dict[str, Any]:
+        """Process up to `max_pages` pages of settled ledger rows; returns the watermark and whether it caught up."""
+        watermark = self.watermark()
+        recorded = 0
+        for _ in range(self.max_pages):
+            page = self.client.list_rows(
+                "transactions",
+                limit=self.page_size,
+                filters={"id": f"gt.{watermark}", "order": "id.asc"},
+                columns=LEDGER_COLUMNS,
+            )
+            settled_before = datetime.now(UTC) - timedelta(seconds=self.settle_seconds)
+            rows = []
+            for row in page:
+                if _parse_time(row["created_at"]) > settled_before:
+                    break
+                rows.append(row)
+            if not rows:
+                return {"watermark": watermark, "recorded": recorded, "caught_up": True}
+            last_id = int(rows[-1]["id"])
+            samples = self._durations(rows)
+            if samples:
+                recorded += len(self.client.insert_many("state_durations", samples, ignore_duplicates=True))
+            claimed = self.client.update_rows(
+                "ledger_watermarks",
+                filters={"name": f"eq.{WATERMARK_NAME}", "last_transaction_id": f"eq.{watermark}"},
+                changes={"last_transaction_id": last_id, "updated_at": datetime.now(UTC).isoformat()},
+            )
+            # Losing the compare-and-set means another process moved on; continue from wherever it stopped.
+            watermark = last_id if claimed else self.watermark()
+            if len(rows) < self.page_size:
+                return {"watermark": watermark, "recorded": recorded, "caught_up": True}
+        return {"watermark": watermark, "recorded": recorded, "caught_up": False}
+
+    def _durations(self, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        exits = [(row, state) for row in rows if (state := exited_state(row)) in PIPELINE_STATES]
+        if not exits:
+            return []
+        entries = self._entries({str(row["content_id"]) for row, _ in exits}, before_id=int(exits[-1][0]["id"]))
+        samples = []
+        for row, state in exits:
+            content_id, exit_id = str(row["content_id"]), int(row["id"])
+            entered_at = None
+            for entry in entries.get(content_id, []):
+                if int(entry["id"]) >= exit_id:
+                    break
+                if entered_state(entry) == state:
+                    entered_at = _parse_time(entry["created_at"])
+            if entered_at is None:
+                continue
+            exited_at = _parse_time(row["created_at"])
+            samples.append(
+                {
+                    "transaction_id": exit_id,
+                    "content_id": content_id,
+                    "state": state,
+                    "entered_at": entered_at.isoformat(),
+                    "exited_at": exited_at.isoformat(),
+                    "duration_seconds": max(0.0, (exited_at - entered_at).total_seconds()),
+                    "exit_action": row.get("action"),
+                }
+            )
+        return samples
+
+    def _entries(self, content_ids: set[str], *, before_id: int) -> dict[str, list[dict[str, Any]]]:
+        """Ledger rows that put each item into a state, oldest first."""
+        entries: dict[str, list[dict[str, Any]]] = {}
+        ordered_ids = sorted(content_ids)
+        for start in range(0, len(ordered_ids), ENTRY_LOOKUP_CHUNK):
+            chunk = ordered_ids[start : start + ENTRY_LOOKUP_CHUNK]
+            offset = 0
+            while True:
+                rows = self.client.list_rows(
+                    "transactions",
+                    limit=1000,
+                    offset=offset,
+                    filters={
+                        "content_id": f"in.({','.join(chunk)})",
+                        "id": f"lt.{before_id}",
+                        "or": "(action.eq.ingested,to_state.not.is.null)",
+                        "order": "id.asc",
+                    },
+                    columns="id,content_id,action,to_state,created_at",
+                )
+                for row in rows:
+                    entries.setdefault(str(row["content_id"]), []).append(row)
+                if len(rows) < 1000:
+                    break
+                offset += len(rows)
+        return entries
+
+    def summary(self, windows_seconds: list[int], *, max_rows: int = 20000) -> dict[str, Any]:
+        """Time-in-state percentiles and exits per stage for each trailing window."""
+        now = datetime.now(UTC)
+        cutoff = now - timedelta(seconds=max(windows_seconds))
+        rows: list[dict[str, Any]] = []
+        while len(rows) < max_rows:
+            page = self.client.list_rows(
+                "state_durations",
+                limit=min(1000, max_rows - len(rows)),
+                offset=len(rows),
+                filters={"exited_at": f"gte.{cutoff.isoformat()}", "order": "exited_at.desc"},
+                columns="state,exited_at,duration_seconds",
+            )
+            rows.extend(page)
+            if len(page) < 1000:
+                break
+
+        windows = {}
+        for window in sorted(windows_seconds):
+            window_cutoff = now - timedelta(seconds=window)
+            durations: dict[str, list[float]] = {state: [] for state in PIPELINE_STATES}
+            for row in rows:
+                if row.get("state") in durations and _parse_time(row["exited_at"]) >= window_cutoff:
+                    durations[row["state"]].append(float(row["duration_seconds"]))
+            stages = {}
+            for state, values in durations.items():
+                values.sort()
+                stages[state] = {
+                    "exits": len(values),
+                    "exits_per_hour": round(len(values) * 3600 / window, 2),
+                    "p50_seconds": percentile(values, 0.5),
+                    "p95_seconds": percentile(values, 0.95),
+                }
+            measured = {state: stage for state, stage in stages.items() if stage["p95_seconds"] is not None}
+            windows[str(window)] = {
+                "stages": stages,
+                "slowest_state": max(measured, key=lambda state: measured[state]["p95_seconds"]) if measured else None,
+            }
+        return {"windows": windows, "truncated": len(rows) >= max_rows}
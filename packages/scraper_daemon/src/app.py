@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from typing import Any
 
 from fastapi import FastAPI
 from pydantic import BaseModel, Field
 
+from src.job_runner import JobRunner, job_routes
 from src.reddit_scraper import load_config, run_once
 
 
@@ -13,8 +16,16 @@ class RunRequest(BaseModel):
     limit: int = Field(default=1, ge=1, le=5)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    yield
+    jobs.shutdown()
+
+
 config = load_config()
-app = FastAPI(title="Scraper Daemon API", version="0.1.0")
+jobs = JobRunner()
+app = FastAPI(title="Scraper Daemon API", version="0.1.0", lifespan=lifespan)
+app.include_router(job_routes(jobs))
 
 
 @app.get("/health")
@@ -22,13 +33,13 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
-@app.post("/run")
+@app.post("/run", status_code=202)
 def run_scraper(request: RunRequest) -> dict[str, Any]:
-    results: list[dict[str, int]] = []
-    for _ in range(request.cycles):
-        results.append(run_once(config, max_items=request.limit))
-    return {
-        "agent": "scraper_daemon",
-        "cycles_requested": request.cycles,
-        "results": results,
-    }
+    job, created = jobs.submit(
+        "scraper_daemon",
+        lambda: run_once(config, max_items=request.limit),
+        cycles=request.cycles,
+        params=request.model_dump(),
+    )
+    return {**job, "deduplicated": not created}
+
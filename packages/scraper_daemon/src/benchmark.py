@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import reddit_scraper as scraper
+from http_replay import FixtureStore
+from stub_db_api import StubDBAPIState, start_stub_db_api
+
+
+def synthetic_post(subreddit: str, index: int, *, created_utc: float) -> dict[str, Any]:
+    post_id = f"bench_{subreddit.lower()}_{index}"
+    return {
+        "name": f"t3_{post_id}",
+        "id": post_id,
+        "subreddit": subreddit,
+        "title": f"Benchmark post {index} in r/{subreddit}",
+        "selftext": f"Synthetic body {index} for r/{subreddit} " * 20,
+        "author": f"author_{index}",
+        "permalink": f"/r/{subreddit}/comments/{post_id}/benchmark_post/",
+        "url": f"https://www.reddit.com/r/{subreddit}/comments/{post_id}/",
+        "created_utc": created_utc,
+        "score": index,
+        "num_comments": 5,
+        "is_self": True,
+        "over_18": False,
+        "domain": f"self.{subreddit}",
+    }
+
+
+def write_synthetic_corpus(
+    store: FixtureStore,
+    config: scraper.ScraperConfig,
+    *,
+    posts_per_subreddit: int,
+    comments_per_post: int,
+) -> None:
+    now = time.time()
+    for subreddit in config.subreddits:
+        posts = [
+            synthetic_post(subreddit, index, created_utc=now - index * 60) for index in range(posts_per_subreddit)
+        ]
+        listing_url = scraper.reddit_listing_url(subreddit, sort=config.reddit_sort, limit=config.reddit_limit)
+        store.save(listing_url, {"data": {"after": None, "children": [{"kind": "t3", "data": post} for post in posts]}})
+        for post in posts:
+            comments = [
+                {
+                    "kind": "t1",
+                    "data": {
+                        "name": f"t1_{post['id']}_{index}",
+                        "author": f"commenter_{index}",
+                        "body": f"Synthetic comment {index}",
+                        "score": comments_per_post - index,
+                        "created_utc": post["created_utc"] + index,
+                        "permalink": f"{post['permalink']}c{index}/",
+                        "parent_id": post["name"],
+                        "is_submitter": False,
+                    },
+                }
+                for index in range(comments_per_post)
+            ]
+            comments_url = scraper.reddit_comments_url(post["permalink"], limit=config.comment_sample_limit)
+            store.save(comments_url, [{"data": {"children": []}}, {"data": {"children": comments}}])
+
+
+class StageTimer:
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = {}
+
+    def wrap(self, stage: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.samples.setdefault(stage, []).append(time.perf_counter() - started)
+
+        return timed
+
+    def report(self) -> dict[str, dict[str, float]]:
+        report: dict[str, dict[str, float]] = {}
+        for stage, samples in self.samples.items():
+            ordered = sorted(samples)
+            report[stage] = {
+                "count": len(ordered),
+                "total_s": round(sum(ordered), 4),
+                "p50_ms": round(statistics.median(ordered) * 1000, 2),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+            }
+        return report
+
+
+def instrument(timer: StageTimer) -> None:
+    scraper.fetch_subreddit_posts = timer.wrap("listing_fetch", scraper.fetch_subreddit_posts)
+    scraper.fetch_post_comments = timer.wrap("comment_fetch", scraper.fetch_post_comments)
+    scraper.ingest_post = timer.wrap("spool_append", scraper.ingest_post)
+    scraper.ingest_batch = timer.wrap("ingest_batch", scraper.ingest_batch)
+    scraper.request_json = timer.wrap("reddit_request", scraper.request_json)
+    scraper.db_api_request = timer.wrap("db_api_request", scraper.db_api_request)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay a Reddit corpus through the scraper against a stub DB API.")
+    parser.add_argument("--subreddits", type=int, default=4, help="Number of synthetic subreddits (N).")
+    parser.add_argument("--posts", type=int, default=25, help="Posts per subreddit (M).")
+    parser.add_argument("--comments", type=int, default=5, help="Top-level comments per synthetic post.")
+    parser.add_argument("--fixtures", type=str, default=None, help="Replay a recorded corpus instead of a synthetic one.")
+    parser.add_argument("--subreddit", action="append", default=None, help="Subreddit names to replay with --fixtures.")
+    parser.add_argument("--reddit-latency-ms", type=float, default=150.0)
+    parser.add_argument("--db-latency-ms", type=float, default=30.0)
+    parser.add_argument("--request-delay-seconds", type=float, default=0.0, help="Pacer delay to apply during replay.")
+    parser.add_argument("--batch-size", type=int, default=25)
+    parser.add_argument("--cycles", type=int, default=1)
+    parser.add_argument("--comment-enrichment", choices=scraper.COMMENT_ENRICHMENT_MODES, default="eager")
+    parser.add_argument(
+        "--pass-rate", type=float, default=0.5, help="Share of lazily ingested posts the stub treats as filter passes."
+    )
+    parser.add_argument("--enrichment-batch-size", type=int, default=10, help="Comment fetches per lazy cycle.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    work_dir = Path(tempfile.mkdtemp(prefix="scraper-bench-"))
+    if args.fixtures:
+        subreddits = args.subreddit or scraper.load_defined_lists_file(
+            Path(__file__).resolve().parents[1] / "defined_lists.json"
+        ).subreddits
+    else:
+        subreddits = [f"BenchSub{index}" for index in range(args.subreddits)]
+
+    stub_state = StubDBAPIState(
+        subreddits=subreddits, latency_seconds=args.db_latency_ms / 1000, pass_rate=args.pass_rate
+    )
+    stub_server = start_stub_db_api(stub_state)
+    config = scraper.ScraperConfig(
+        db_api_base_url=f"http://127.0.0.1:{stub_server.server_port}",
+        db_api_service_token="benchmark",
+        subreddits=subreddits,
+        reddit_limit=max(args.posts, 1),
+        outbox_dir=str(work_dir / "outbox"),
+        outbox_batch_size=args.batch_size,
+        comment_enrichment=args.comment_enrichment,
+        enrichment_batch_size=args.enrichment_batch_size,
+    )
+
+    fixtures_dir = Path(args.fixtures) if args.fixtures else work_dir / "fixtures"
+    store = FixtureStore(fixtures_dir, mode="replay", latency_seconds=args.reddit_latency_ms / 1000)
+    if not args.fixtures:
+        write_synthetic_corpus(store, config, posts_per_subreddit=args.posts, comments_per_post=args.comments)
+
+    scraper.HTTP_FIXTURES = store
+    scraper.PACER = scraper.RequestPacer(args.request_delay_seconds)
+    timer = StageTimer()
+    instrument(timer)
+
+    totals: dict[str, int] = {}
+    started = time.perf_counter()
+    for _ in range(args.cycles):
+        for key, value in scraper.run_once(config).items():
+            totals[key] = totals.get(key, 0) + value
+    elapsed = time.perf_counter() - started
+    stub_server.shutdown()
+
+    posts = totals.get("posts_seen", 0)
+    reddit_requests = len(timer.samples.get("reddit_request", []))
+    db_api_requests = stub_state.requests
+    print(
+        json.dumps(
+            {
+                "subreddits": len(subreddits),
+                "cycles": args.cycles,
+                "comment_enrichment": args.comment_enrichment,
+                "posts": posts,
+                "elapsed_s": round(elapsed, 3),
+                "posts_per_sec": round(posts / elapsed, 2) if elapsed else None,
+                "reddit_requests": reddit_requests,
+                "reddit_requests_per_cycle": round(reddit_requests / args.cycles, 2) if args.cycles else None,
+                "db_api_requests": db_api_requests,
+                "requests_per_post": round((reddit_requests + db_api_requests) / posts, 3) if posts else None,
+                "pacing_s": round(scraper.PACER.waited_seconds, 3),
+                "stages": timer.report(),
+                "scraper_stats": totals,
+            },
+            indent=2,
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
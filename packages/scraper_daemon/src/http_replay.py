@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+FIXTURE_MODES = {"record", "replay"}
+
+
+class FixtureMissingError(LookupError):
+    pass
+
+
+def fixture_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:24]
+
+
+class FixtureStore:
+    """Stores Reddit JSON responses on disk, one file per request URL.
+
+    In ``record`` mode the scraper saves every successful GET it makes. In ``replay``
+    mode it serves those files instead of touching the network, optionally sleeping
+    ``latency_seconds`` per request to stand in for round-trip time.
+    """
+
+    def __init__(self, directory: Path, *, mode: str, latency_seconds: float = 0.0) -> None:
+        if mode not in FIXTURE_MODES:
+            raise ValueError(f"Unknown fixture mode: {mode}")
+        self.directory = directory
+        self.mode = mode
+        self.latency_seconds = max(0.0, latency_seconds)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, url: str) -> Path:
+        return self.directory / f"{fixture_key(url)}.json"
+
+    def load(self, url: str) -> Any:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        path = self.path_for(url)
+        if not path.exists():
+            raise FixtureMissingError(f"No recorded fixture for {url}")
+        return json.loads(path.read_text(encoding="utf-8"))["body"]
+
+    def save(self, url: str, body: Any) -> None:
+        path = self.path_for(url)
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps({"url": url, "body": body}, ensure_ascii=True), encoding="utf-8")
+        tmp_path.replace(path)
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+SEGMENT_GLOB = "segment-*.ndjson"
+DEAD_LETTER_NAME = "dead-letter.ndjson"
+
+
+@dataclass(slots=True)
+class DrainResult:
+    results: list[dict[str, Any]] = field(default_factory=list)
+    sent: int = 0
+    batches: int = 0
+    error: str | None = None
+    skipped_for_backoff: bool = False
+    dead_lettered: int = 0
+
+
+class IngestOutbox:
+    """Append-only NDJSON spool for ingest payloads.
+
+    Payloads are appended to numbered segment files. Each segment has a sidecar
+    ``.ack`` file holding how many of its lines the DB API has acknowledged, so a
+    crash between send and ack replays at most one batch (ingest is idempotent on
+    ``source + source_content_id``). Fully acknowledged segments are deleted.
+
+    Only ``retry_errors`` raised by ``send_batch`` are retried. A batch the DB API
+    answered with an error status (the exception has a non-None ``status``)
+    ``max_batch_attempts`` times in a row is appended to ``dead-letter.ndjson`` and
+    acknowledged, so one poison batch cannot hold up the rest of the spool.
+    Network failures carry no status and are retried with backoff indefinitely.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        segment_max_bytes: int = 1_000_000,
+        max_total_bytes: int = 64_000_000,
+        backoff_base_seconds: float = 5.0,
+        backoff_max_seconds: float = 300.0,
+        max_batch_attempts: int = 8,
+        retry_errors: tuple[type[Exception], ...] = (OSError,),
+    ) -> None:
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = max(1, segment_max_bytes)
+        self.max_total_bytes = max(self.segment_max_bytes, max_total_bytes)
+        self.backoff_base_seconds = max(0.0, backoff_base_seconds)
+        self.backoff_max_seconds = max(self.backoff_base_seconds, backoff_max_seconds)
+        self.max_batch_attempts = max(1, max_batch_attempts)
+        self.retry_errors = retry_errors
+        self.dropped = 0
+        self._batch_attempts: dict[str, int] = {}
+        self._failures = 0
+        self._retry_at = 0.0
+        self._pending = sum(
+            len(self._read_records(segment)) - self._read_ack(segment) for segment in self._segments()
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def append(self, payload: dict[str, Any]) -> None:
+        segment = self._writable_segment()
+        line = json.dumps(payload, ensure_ascii=True, separators=(",", ":")) + "\n"
+        with segment.open("a+b") as handle:
+            handle.seek(0, os.SEEK_END)
+            if handle.tell() > 0:
+                handle.seek(-1, os.SEEK_END)
+                if handle.read(1) != b"\n":
+                    # Terminate a line torn by a crash so it is skipped, not merged.
+                    handle.write(b"\n")
+            handle.write(line.encode("utf-8"))
+            handle.flush()
+            os.fsync(handle.fileno())
+        self._pending += 1
+        self._enforce_cap()
+
+    def drain(
+        self,
+        send_batch: Callable[[list[dict[str, Any]]], list[dict[str, Any]]],
+        *,
+        batch_size: int,
+        max_batches: int | None = None,
+    ) -> DrainResult:
+        result = DrainResult()
+        if time.monotonic() < self._retry_at:
+            result.skipped_for_backoff = True
+            return result
+
+        batch_size = max(1, batch_size)
+        for segment in self._segments():
+            records = self._read_records(segment)
+            acked = self._read_ack(segment)
+            while acked < len(records):
+                if max_batches is not None and result.batches >= max_batches:
+                    return result
+                chunk = records[acked : acked + batch_size]
+                payloads = [record for record in chunk if record is not None]
+                if payloads:
+                    try:
+                        result.results.extend(send_batch(payloads))
+                    except self.retry_errors as exc:
+                        if not self._give_up(segment, acked, payloads, exc):
+                            result.error = str(exc)
+                            self._schedule_retry()
+                            return result
+                        result.dead_lettered += len(payloads)
+                    else:
+                        result.sent += len(payloads)
+                        result.batches += 1
+                    self._failures = 0
+                    self._batch_attempts.pop(segment.name, None)
+                acked += len(chunk)
+                self._pending -= len(chunk)
+                self._write_ack(segment, acked)
+
+            self._remove_segment(segment)
+        return result
+
+    def _give_up(self, segment: Path, acked: int, payloads: list[dict[str, Any]], error: Exception) -> bool:
+        """Count a rejected batch; once it hits `max_batch_attempts`, dead-letter it and return True."""
+        if getattr(error, "status", None) is None:
+            return False
+        attempts = self._batch_attempts.get(segment.name, 0) + 1
+        self._batch_attempts[segment.name] = attempts
+        if attempts < self.max_batch_attempts:
+            return False
+        dead_letter = self.directory / DEAD_LETTER_NAME
+        with dead_letter.open("ab") as handle:
+            for payload in payloads:
+                handle.write((json.dumps(payload, ensure_ascii=True, separators=(",", ":")) + "\n").encode("utf-8"))
+            handle.flush()
+            os.fsync(handle.fileno())
+        print(
+            f"[warn] outbox moved {len(payloads)} ingests from {segment.name} line {acked + 1} to {dead_letter} "
+            f"after {attempts} rejected attempts: {error}",
+            file=sys.stderr,
+        )
+        return True
+
+    def _schedule_retry(self) -> None:
+        self._failures += 1
+        delay = min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** (self._failures - 1))
+        self._retry_at = time.monotonic() + delay * random.uniform(0.5, 1.0)
+
+    def _segments(self) -> list[Path]:
+        return sorted(self.directory.glob(SEGMENT_GLOB))
+
+    def _writable_segment(self) -> Path:
+        segments = self._segments()
+        if segments and segments[-1].stat().st_size < self.segment_max_bytes:
+            return segments[-1]
+        next_sequence = int(segments[-1].stem.split("-")[1]) + 1 if segments else 1
+        return self.directory / f"segment-{next_sequence:08d}.ndjson"
+
+    def _read_records(self, segment: Path) -> list[dict[str, Any] | None]:
+        records: list[dict[str, Any] | None] = []
+        for line in segment.read_bytes().splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            records.append(record if isinstance(record, dict) else None)
+        return records
+
+    @staticmethod
+    def _ack_path(segment: Path) -> Path:
+        return segment.with_suffix(".ack")
+
+    def _read_ack(self, segment: Path) -> int:
+        try:
+            return int(self._ack_path(segment).read_text(encoding="utf-8").strip() or "0")
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _write_ack(self, segment: Path, acked: int) -> None:
+        ack_path = self._ack_path(segment)
+        tmp_path = ack_path.with_suffix(".ack.tmp")
+        tmp_path.write_text(str(acked), encoding="utf-8")
+        os.replace(tmp_path, ack_path)
+
+    def _remove_segment(self, segment: Path) -> None:
+        segment.unlink(missing_ok=True)
+        self._ack_path(segment).unlink(missing_ok=True)
+
+    def _enforce_cap(self) -> None:
+        segments = self._segments()
+        total_bytes = sum(segment.stat().st_size for segment in segments)
+        while total_bytes > self.max_total_bytes and len(segments) > 1:
+            oldest = segments.pop(0)
+            lost = len(self._read_records(oldest)) - self._read_ack(oldest)
+            total_bytes -= oldest.stat().st_size
+            self._remove_segment(oldest)
+            self._pending -= lost
+            self.dropped += lost
+            print(f"[warn] outbox over {self.max_total_bytes} bytes; dropped {lost} spooled ingests", file=sys.stderr)
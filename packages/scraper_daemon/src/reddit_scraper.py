@@ -5,8 +5,8 @@ import json
 import os
 import sys
 import time
-from dataclasses import dataclass
-from datetime import datetime, timezone
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
 from itertools import zip_longest
 from pathlib import Path
 from typing import Any
@@ -14,6 +14,11 @@ from urllib.error import HTTPError, URLError
 from urllib.parse import urlencode
 from urllib.request import Request, urlopen
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from http_replay import FixtureMissingError, FixtureStore
+from outbox import IngestOutbox
+
 
 def load_dotenv(dotenv_path: Path) -> dict[str, str]:
     env: dict[str, str] = {}
@@ -37,7 +42,13 @@ def get_env_var(env: dict[str, str], key: str, default: str | None = None) -> st
 
 
 class ScraperError(RuntimeError):
-    pass
+    def __init__(self, message: str, *, status: int | None = None) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+COMMENT_ENRICHMENT_MODES = ("eager", "lazy")
+PERMANENT_ENRICHMENT_STATUSES = frozenset({403, 404})
 
 
 @dataclass(slots=True)
@@ -45,13 +56,44 @@ class ScraperConfig:
     db_api_base_url: str
     db_api_service_token: str
     subreddits: list[str]
+    keywords: list[str] = field(default_factory=list)
     reddit_sort: str = "new"
     reddit_limit: int = 25
     poll_interval_seconds: int = 300
     actor_label: str = "scraper-daemon"
     user_agent: str = "ws-submission-scraper/0.1"
     comment_sample_limit: int = 5
+    comment_enrichment: str = "eager"
+    enrichment_batch_size: int = 10
     request_delay_seconds: float = 15.0
+    defined_lists_refresh_seconds: int = 60
+    outbox_dir: str = ".outbox"
+    outbox_batch_size: int = 25
+    outbox_max_bytes: int = 64_000_000
+    backfill_request_delay_seconds: float = 30.0
+    backfill_page_limit: int = 100
+
+
+@dataclass(slots=True)
+class DefinedLists:
+    subreddits: list[str]
+    keywords: list[str] = field(default_factory=list)
+    version: str | None = None
+    origin: str = "file"
+
+
+def clean_list(values: Any) -> list[str]:
+    if not isinstance(values, list):
+        return []
+    return [str(item).strip() for item in values if str(item).strip()]
+
+
+def load_defined_lists_file(defined_lists_path: Path) -> DefinedLists:
+    defined_lists = json.loads(defined_lists_path.read_text(encoding="utf-8"))
+    subreddits = clean_list(defined_lists.get("subreddits"))
+    if not subreddits:
+        raise ScraperError("defined_lists.json must contain a non-empty 'subreddits' list")
+    return DefinedLists(subreddits=subreddits, keywords=clean_list(defined_lists.get("keywords")))
 
 
 def load_config() -> ScraperConfig:
@@ -64,16 +106,17 @@ def load_config() -> ScraperConfig:
     if not db_api_service_token:
         raise ScraperError("Missing DB_API_SERVICE_TOKEN in scraper_daemon/.env")
 
-    defined_lists_path = package_dir / "defined_lists.json"
-    defined_lists = json.loads(defined_lists_path.read_text(encoding="utf-8"))
-    subreddits = defined_lists.get("subreddits", [])
-    if not isinstance(subreddits, list) or not subreddits:
-        raise ScraperError("defined_lists.json must contain a non-empty 'subreddits' list")
+    comment_enrichment = (get_env_var(env, "REDDIT_COMMENT_ENRICHMENT", "eager") or "eager").lower()
+    if comment_enrichment not in COMMENT_ENRICHMENT_MODES:
+        raise ScraperError(f"REDDIT_COMMENT_ENRICHMENT must be one of {', '.join(COMMENT_ENRICHMENT_MODES)}")
+
+    defined_lists = load_defined_lists_file(package_dir / "defined_lists.json")
 
     return ScraperConfig(
         db_api_base_url=db_api_base_url.rstrip("/"),
         db_api_service_token=db_api_service_token,
-        subreddits=[str(item).strip() for item in subreddits if str(item).strip()],
+        subreddits=defined_lists.subreddits,
+        keywords=defined_lists.keywords,
         reddit_sort=get_env_var(env, "REDDIT_SORT", "new") or "new",
         reddit_limit=int(get_env_var(env, "REDDIT_FETCH_LIMIT", "25") or "25"),
         poll_interval_seconds=int(get_env_var(env, "SCRAPER_POLL_INTERVAL_SECONDS", "300") or "300"),
@@ -81,7 +124,20 @@ def load_config() -> ScraperConfig:
         user_agent=get_env_var(env, "REDDIT_USER_AGENT", "ws-submission-scraper/0.1")
         or "ws-submission-scraper/0.1",
         comment_sample_limit=int(get_env_var(env, "REDDIT_COMMENT_SAMPLE_LIMIT", "5") or "5"),
+        comment_enrichment=comment_enrichment,
+        enrichment_batch_size=int(get_env_var(env, "REDDIT_ENRICHMENT_BATCH_SIZE", "10") or "10"),
         request_delay_seconds=float(get_env_var(env, "REQUEST_DELAY_SECONDS", "15") or "15"),
+        defined_lists_refresh_seconds=int(
+            get_env_var(env, "DEFINED_LISTS_REFRESH_SECONDS", "60") or "60"
+        ),
+        outbox_dir=get_env_var(env, "SCRAPER_OUTBOX_DIR", str(package_dir / ".outbox"))
+        or str(package_dir / ".outbox"),
+        outbox_batch_size=int(get_env_var(env, "SCRAPER_OUTBOX_BATCH_SIZE", "25") or "25"),
+        outbox_max_bytes=int(get_env_var(env, "SCRAPER_OUTBOX_MAX_BYTES", "64000000") or "64000000"),
+        backfill_request_delay_seconds=float(
+            get_env_var(env, "BACKFILL_REQUEST_DELAY_SECONDS", "30") or "30"
+        ),
+        backfill_page_limit=int(get_env_var(env, "BACKFILL_PAGE_LIMIT", "100") or "100"),
     )
 
 
@@ -89,6 +145,7 @@ class RequestPacer:
     def __init__(self, delay_seconds: float) -> None:
         self.delay_seconds = max(0.0, delay_seconds)
         self._last_request_at: float | None = None
+        self.waited_seconds = 0.0
 
     def wait(self) -> None:
         if self._last_request_at is None:
@@ -99,32 +156,50 @@ class RequestPacer:
         remaining = self.delay_seconds - elapsed
         if remaining > 0:
             time.sleep(remaining)
+            self.waited_seconds += remaining
         self._last_request_at = time.monotonic()
 
 
 PACER = RequestPacer(0.0)
+HTTP_FIXTURES: FixtureStore | None = None
 
 
-def request_json(url: str, *, headers: dict[str, str]) -> dict[str, Any]:
-    PACER.wait()
+def request_json(url: str, *, headers: dict[str, str], pacer: RequestPacer | None = None) -> dict[str, Any]:
+    (pacer or PACER).wait()
+    if HTTP_FIXTURES is not None and HTTP_FIXTURES.mode == "replay":
+        try:
+            return HTTP_FIXTURES.load(url)
+        except FixtureMissingError as exc:
+            raise ScraperError(str(exc)) from exc
+
     request = Request(url=url, method="GET", headers=headers)
     try:
         with urlopen(request, timeout=30) as response:
-            return json.loads(response.read().decode("utf-8"))
+            payload = json.loads(response.read().decode("utf-8"))
     except HTTPError as exc:
         body = exc.read().decode("utf-8", errors="replace")
-        raise ScraperError(f"HTTP {exc.code} for {url}: {body}") from exc
+        raise ScraperError(f"HTTP {exc.code} for {url}: {body}", status=exc.code) from exc
     except URLError as exc:
         raise ScraperError(f"Network error for {url}: {exc.reason}") from exc
 
+    if HTTP_FIXTURES is not None and HTTP_FIXTURES.mode == "record":
+        HTTP_FIXTURES.save(url, payload)
+    return payload
 
-def post_json(url: str, *, headers: dict[str, str], body: dict[str, Any]) -> dict[str, Any]:
-    PACER.wait()
+
+def db_api_request(
+    config: ScraperConfig, path: str, *, method: str = "GET", body: dict[str, Any] | None = None
+) -> dict[str, Any]:
+    """Unpaced DB API call; the pacer only exists to keep Reddit happy."""
     request = Request(
-        url=url,
-        method="POST",
-        headers={"Content-Type": "application/json", **headers},
-        data=json.dumps(body).encode("utf-8"),
+        url=f"{config.db_api_base_url}{path}",
+        method=method,
+        headers={
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            "X-API-Key": config.db_api_service_token,
+        },
+        data=json.dumps(body).encode("utf-8") if body is not None else None,
     )
     try:
         with urlopen(request, timeout=30) as response:
@@ -132,13 +207,96 @@ def post_json(url: str, *, headers: dict[str, str], body: dict[str, Any]) -> dic
             return json.loads(payload) if payload else {}
     except HTTPError as exc:
         body_text = exc.read().decode("utf-8", errors="replace")
-        raise ScraperError(f"HTTP {exc.code} for {url}: {body_text}") from exc
+        raise ScraperError(f"HTTP {exc.code} for {path}: {body_text}", status=exc.code) from exc
     except URLError as exc:
-        raise ScraperError(f"Network error for {url}: {exc.reason}") from exc
+        raise ScraperError(f"Network error for {path}: {exc.reason}") from exc
+    except ValueError as exc:
+        raise ScraperError(f"Invalid JSON from {path}: {exc}") from exc
+
+
+class DefinedListsCache:
+    """In-memory copy of the DB-backed defined lists, revalidated with an ETag."""
+
+    def __init__(self, fallback: DefinedLists, *, refresh_seconds: float) -> None:
+        self.fallback = fallback
+        self.current = fallback
+        self.refresh_seconds = max(0.0, refresh_seconds)
+        self._etag: str | None = None
+        self._checked_at: float | None = None
+
+    def refresh(self, config: ScraperConfig) -> DefinedLists:
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.refresh_seconds:
+            return self.current
+        self._checked_at = now
+
+        headers = {
+            "Accept": "application/json",
+            "X-API-Key": config.db_api_service_token,
+        }
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+        request = Request(
+            url=f"{config.db_api_base_url}/v1/defined-lists?{urlencode({'source': 'reddit'})}",
+            method="GET",
+            headers=headers,
+        )
+        try:
+            with urlopen(request, timeout=10) as response:
+                payload = json.loads(response.read().decode("utf-8"))
+                etag = response.headers.get("ETag")
+        except HTTPError as exc:
+            if exc.code == 304:
+                return self.current
+            print(f"[warn] defined lists HTTP {exc.code}; using {self.current.origin} lists", file=sys.stderr)
+            return self.current
+        except (URLError, TimeoutError, ValueError) as exc:
+            print(f"[warn] defined lists unavailable ({exc}); using {self.current.origin} lists", file=sys.stderr)
+            return self.current
+
+        subreddits = clean_list(payload.get("subreddits"))
+        if not subreddits:
+            # An empty DB list should not silence the scraper; keep the file lists.
+            self.current = self.fallback
+            self._etag = etag
+            return self.current
+
+        self.current = DefinedLists(
+            subreddits=subreddits,
+            keywords=clean_list(payload.get("keywords")),
+            version=str(payload.get("version") or etag or ""),
+            origin="db_api",
+        )
+        self._etag = etag
+        return self.current
+
+
+DEFINED_LISTS: DefinedListsCache | None = None
+
+
+def refresh_defined_lists(config: ScraperConfig) -> DefinedLists:
+    global DEFINED_LISTS
+    if DEFINED_LISTS is None:
+        DEFINED_LISTS = DefinedListsCache(
+            DefinedLists(subreddits=list(config.subreddits), keywords=list(config.keywords)),
+            refresh_seconds=config.defined_lists_refresh_seconds,
+        )
+    defined_lists = DEFINED_LISTS.refresh(config)
+    config.subreddits = defined_lists.subreddits
+    config.keywords = defined_lists.keywords
+    return defined_lists
+
 
+def matched_keywords(keywords: list[str], *texts: str) -> list[str]:
+    haystack = " ".join(texts).lower()
+    return [keyword for keyword in keywords if keyword.lower() in haystack]
 
-def reddit_listing_url(subreddit: str, *, sort: str, limit: int) -> str:
-    query = urlencode({"limit": limit, "raw_json": 1})
+
+def reddit_listing_url(subreddit: str, *, sort: str, limit: int, after: str | None = None) -> str:
+    params: dict[str, Any] = {"limit": limit, "raw_json": 1}
+    if after:
+        params["after"] = after
+    query = urlencode(params)
     return f"https://www.reddit.com/r/{subreddit}/{sort}.json?{query}"
 
 
@@ -217,20 +375,24 @@ def comment_summary(comments: list[dict[str, Any]]) -> dict[str, Any]:
     }
 
 
-def reddit_post_to_ingest_payload(config: ScraperConfig, post: dict[str, Any]) -> dict[str, Any]:
+def reddit_post_to_ingest_payload(
+    config: ScraperConfig, post: dict[str, Any], *, fetch_comments: bool = True
+) -> dict[str, Any]:
     permalink = post.get("permalink") or ""
     source_url = f"https://www.reddit.com{permalink}" if permalink.startswith("/") else post.get("url")
     created_utc = post.get("created_utc")
     source_created_at = None
     if isinstance(created_utc, (int, float)):
-        source_created_at = datetime.fromtimestamp(created_utc, tz=timezone.utc).isoformat()
-    try:
-        comments = fetch_post_comments(config, permalink)
-    except ScraperError:
-        comments = []
-    compact_comments = [compact_comment(comment) for comment in comments[: config.comment_sample_limit]]
+        source_created_at = datetime.fromtimestamp(created_utc, tz=UTC).isoformat()
+    comments: list[dict[str, Any]] | None = None
+    if fetch_comments:
+        try:
+            comments = fetch_post_comments(config, permalink)
+        except ScraperError:
+            comments = None
+    compact_comments = [compact_comment(comment) for comment in (comments or [])[: config.comment_sample_limit]]
 
-    return {
+    payload = {
         "source": "reddit",
         "source_content_id": post.get("name") or post.get("id"),
         "source_url": source_url,
@@ -247,23 +409,128 @@ def reddit_post_to_ingest_payload(config: ScraperConfig, post: dict[str, Any]) -
             "is_self": post.get("is_self"),
             "domain": post.get("domain"),
             "outbound_url": post.get("url"),
+            "matched_keywords": matched_keywords(
+                config.keywords, post.get("title") or "", post.get("selftext") or ""
+            ),
             "comment_summary": comment_summary(compact_comments),
             "top_level_comments": compact_comments,
         },
         "actor": "system",
         "actor_label": config.actor_label,
     }
+    if comments is None:
+        # Picked up by enrich_pending_comments once the item looks worth replying to.
+        payload["raw_payload"]["comment_enrichment"] = "pending"
+    return payload
 
 
-def ingest_post(config: ScraperConfig, payload: dict[str, Any]) -> dict[str, Any]:
-    return post_json(
-        f"{config.db_api_base_url}/v1/content/ingest",
-        headers={
-            "Accept": "application/json",
-            "X-API-Key": config.db_api_service_token,
-        },
-        body=payload,
+def enrich_pending_comments(config: ScraperConfig, stats: dict[str, int]) -> None:
+    """Fetch comments for items ingested without them that have since passed the filter.
+
+    Only a 403 or 404 from Reddit marks an item `failed`. Rate limits, server errors and
+    network errors leave it `pending` with the attempt counted, so the DB API retries it
+    next cycle until `COMMENT_ENRICHMENT_MAX_ATTEMPTS`. A 429 also ends this cycle's pass.
+    """
+    if config.enrichment_batch_size <= 0:
+        return
+    try:
+        query = urlencode({"limit": config.enrichment_batch_size})
+        pending = db_api_request(config, f"/v1/enrichment/comments?{query}")
+    except ScraperError as exc:
+        stats["errors"] += 1
+        print(f"[error] read enrichment queue: {exc}", file=sys.stderr)
+        return
+
+    for item in pending.get("items") or []:
+        content_id = item.get("content_id")
+        if not content_id:
+            continue
+        fetch_status = None
+        try:
+            stats["comment_fetches"] += 1
+            comments = fetch_post_comments(config, item.get("permalink") or "")
+            compact_comments = [compact_comment(comment) for comment in comments[: config.comment_sample_limit]]
+            body: dict[str, Any] = {
+                "status": "done",
+                "top_level_comments": compact_comments,
+                "comment_summary": comment_summary(compact_comments),
+            }
+        except ScraperError as exc:
+            # A deleted or private post would fail forever; anything else may clear up.
+            fetch_status = exc.status
+            status = "failed" if fetch_status in PERMANENT_ENRICHMENT_STATUSES else "pending"
+            body = {"status": status, "error": str(exc)}
+        try:
+            result = db_api_request(config, f"/v1/content/{content_id}/comments", method="PATCH", body=body)
+        except ScraperError as exc:
+            stats["errors"] += 1
+            print(f"[error] attach comments {content_id}: {exc}", file=sys.stderr)
+            continue
+        outcome = result.get("comment_enrichment", body["status"])
+        stats[{"done": "enriched", "failed": "enrichment_failed"}.get(outcome, "enrichment_retried")] += 1
+        if fetch_status == 429:
+            print("[warn] comment enrichment rate limited; resuming next cycle", file=sys.stderr)
+            break
+
+
+OUTBOX: IngestOutbox | None = None
+OUTBOX_RETRY_ERRORS = (ScraperError, OSError)
+
+
+def get_outbox(config: ScraperConfig) -> IngestOutbox:
+    global OUTBOX
+    if OUTBOX is None:
+        OUTBOX = IngestOutbox(
+            Path(config.outbox_dir), max_total_bytes=config.outbox_max_bytes, retry_errors=OUTBOX_RETRY_ERRORS
+        )
+    return OUTBOX
+
+
+def ingest_post(config: ScraperConfig, payload: dict[str, Any]) -> None:
+    get_outbox(config).append(payload)
+
+
+def ingest_batch(config: ScraperConfig, payloads: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    response = db_api_request(config, "/v1/content/ingest/batch", method="POST", body={"items": payloads})
+    results = response.get("results")
+    if not isinstance(results, list) or len(results) != len(payloads):
+        raise ScraperError("Unexpected batch ingest response from DB API")
+    return results
+
+
+def drain_spool(
+    config: ScraperConfig,
+    outbox: IngestOutbox,
+    stats: dict[str, int],
+    *,
+    full_batches_only: bool = False,
+) -> None:
+    if full_batches_only and outbox.pending < config.outbox_batch_size:
+        return
+    max_batches = outbox.pending // config.outbox_batch_size if full_batches_only else None
+    drained = outbox.drain(
+        lambda batch: ingest_batch(config, batch),
+        batch_size=config.outbox_batch_size,
+        max_batches=max_batches,
     )
+    for result in drained.results:
+        if result.get("error"):
+            stats["errors"] += 1
+            print(f"[error] ingest rejected: {result.get('detail') or result['error']}", file=sys.stderr)
+        elif result.get("created"):
+            stats["created"] += 1
+        else:
+            stats["duplicates"] += 1
+    if drained.dead_lettered:
+        stats["errors"] += 1
+        stats["dead_lettered"] += drained.dead_lettered
+    if drained.error:
+        stats["errors"] += 1
+        print(f"[error] ingest batch deferred, {outbox.pending} spooled: {drained.error}", file=sys.stderr)
+
+
+def drain_outbox(config: ScraperConfig, stats: dict[str, int], *, full_batches_only: bool = False) -> None:
+    drain_spool(config, get_outbox(config), stats, full_batches_only=full_batches_only)
 
 
 def run_once(config: ScraperConfig, *, max_items: int | None = None) -> dict[str, int]:
@@ -273,8 +540,16 @@ def run_once(config: ScraperConfig, *, max_items: int | None = None) -> dict[str
         "created": 0,
         "duplicates": 0,
         "errors": 0,
+        "spooled": 0,
+        "comment_fetches": 0,
+        "enriched": 0,
+        "enrichment_failed": 0,
+        "enrichment_retried": 0,
+        "dead_lettered": 0,
     }
     processed_items = 0
+    fetch_comments = config.comment_enrichment == "eager"
+    refresh_defined_lists(config)
 
     posts_by_subreddit: dict[str, list[dict[str, Any]]] = {}
 
@@ -288,38 +563,236 @@ def run_once(config: ScraperConfig, *, max_items: int | None = None) -> dict[str
             print(f"[error] fetch r/{subreddit}: {exc}", file=sys.stderr)
 
     for round_posts in zip_longest(*(posts_by_subreddit[subreddit] for subreddit in config.subreddits)):
+        if max_items is not None and processed_items >= max_items:
+            break
         for subreddit, post in zip(config.subreddits, round_posts):
             if max_items is not None and processed_items >= max_items:
-                return stats
+                break
             if post is None:
                 continue
 
             stats["posts_seen"] += 1
             processed_items += 1
-            payload = reddit_post_to_ingest_payload(config, post)
+            payload = reddit_post_to_ingest_payload(config, post, fetch_comments=fetch_comments)
+            stats["comment_fetches"] += int(fetch_comments)
             if not payload.get("source_content_id") or not payload.get("source_url"):
                 stats["errors"] += 1
                 print(f"[error] skipped malformed post in r/{subreddit}", file=sys.stderr)
                 continue
 
             try:
-                result = ingest_post(config, payload)
-            except ScraperError as exc:
+                ingest_post(config, payload)
+            except OSError as exc:
                 stats["errors"] += 1
                 identifier = payload.get("source_content_id")
-                print(f"[error] ingest {identifier}: {exc}", file=sys.stderr)
+                print(f"[error] spool {identifier}: {exc}", file=sys.stderr)
+                continue
+            stats["spooled"] += 1
+            drain_outbox(config, stats, full_batches_only=True)
+
+    drain_outbox(config, stats)
+    enrich_pending_comments(config, stats)
+    outbox = get_outbox(config)
+    stats["spool_pending"] = outbox.pending
+    stats["spool_dropped"] = outbox.dropped
+    return stats
+
+
+@dataclass(slots=True)
+class BackfillCheckpoint:
+    subreddit: str
+    until_utc: float
+    after: str | None = None
+    oldest_created_utc: float | None = None
+    pages: int = 0
+    posts: int = 0
+    done: bool = False
+    exhausted: bool = False
+
+
+def backfill_checkpoint_path(checkpoint_dir: Path, subreddit: str) -> Path:
+    return checkpoint_dir / f"{subreddit.lower()}.json"
+
+
+def load_backfill_checkpoint(path: Path, subreddit: str, until_utc: float) -> BackfillCheckpoint:
+    if not path.exists():
+        return BackfillCheckpoint(subreddit=subreddit, until_utc=until_utc)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    checkpoint = BackfillCheckpoint(
+        subreddit=subreddit,
+        until_utc=float(data.get("until_utc", until_utc)),
+        after=data.get("after"),
+        oldest_created_utc=data.get("oldest_created_utc"),
+        pages=int(data.get("pages", 0)),
+        posts=int(data.get("posts", 0)),
+        done=bool(data.get("done", False)),
+        exhausted=bool(data.get("exhausted", False)),
+    )
+    if until_utc < checkpoint.until_utc and checkpoint.after:
+        # A deeper target resumes from the saved cursor instead of starting over.
+        checkpoint.done = False
+    checkpoint.until_utc = until_utc
+    return checkpoint
+
+
+def save_backfill_checkpoint(path: Path, checkpoint: BackfillCheckpoint) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    tmp_path.write_text(
+        json.dumps(
+            {
+                "subreddit": checkpoint.subreddit,
+                "until_utc": checkpoint.until_utc,
+                "after": checkpoint.after,
+                "oldest_created_utc": checkpoint.oldest_created_utc,
+                "pages": checkpoint.pages,
+                "posts": checkpoint.posts,
+                "done": checkpoint.done,
+                "exhausted": checkpoint.exhausted,
+            },
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    os.replace(tmp_path, path)
+
+
+def fetch_backfill_page(
+    config: ScraperConfig, subreddit: str, *, after: str | None, pacer: RequestPacer
+) -> tuple[list[dict[str, Any]], str | None]:
+    url = reddit_listing_url(subreddit, sort="new", limit=config.backfill_page_limit, after=after)
+    payload = request_json(
+        url,
+        headers={
+            "Accept": "application/json",
+            "User-Agent": config.user_agent,
+        },
+        pacer=pacer,
+    )
+    data = payload.get("data", {})
+    posts = [
+        child["data"]
+        for child in data.get("children", [])
+        if child.get("kind") == "t3" and isinstance(child.get("data"), dict)
+    ]
+    return posts, data.get("after")
+
+
+def backfill_subreddit(
+    config: ScraperConfig,
+    subreddit: str,
+    *,
+    until_utc: float,
+    checkpoint_dir: Path,
+    pacer: RequestPacer,
+    outbox: IngestOutbox,
+    stats: dict[str, int],
+) -> None:
+    path = backfill_checkpoint_path(checkpoint_dir, subreddit)
+    checkpoint = load_backfill_checkpoint(path, subreddit, until_utc)
+    while not checkpoint.done:
+        last_fullname = checkpoint.after
+        posts, next_after = fetch_backfill_page(config, subreddit, after=checkpoint.after, pacer=pacer)
+        stats["pages"] += 1
+        reached_until = spool_failed = False
+        for post in posts:
+            created_utc = post.get("created_utc")
+            if isinstance(created_utc, (int, float)) and created_utc < until_utc:
+                # Resume a deeper backfill from the last post taken, not the end of this page.
+                next_after = last_fullname
+                reached_until = True
+                break
+            fullname = post.get("name") or (f"t3_{post['id']}" if post.get("id") else last_fullname)
+            payload = reddit_post_to_ingest_payload(config, post, fetch_comments=False)
+            if not payload.get("source_content_id") or not payload.get("source_url"):
+                stats["errors"] += 1
+                last_fullname = fullname
                 continue
+            payload["raw_payload"]["backfill"] = True
+            try:
+                outbox.append(payload)
+            except OSError as exc:
+                # Checkpoint before this post so a rerun picks it up once the spool is writable.
+                stats["errors"] += 1
+                print(f"[error] spool {payload['source_content_id']}: {exc}", file=sys.stderr)
+                next_after = last_fullname
+                spool_failed = True
+                break
+            last_fullname = fullname
+            stats["spooled"] += 1
+            checkpoint.posts += 1
+            if isinstance(created_utc, (int, float)):
+                checkpoint.oldest_created_utc = created_utc
+
+        checkpoint.pages += 1
+        if reached_until:
+            checkpoint.done = True
+        elif not spool_failed and (not next_after or not posts):
+            # Listings stop paging after about 1,000 posts, usually well short of a deep `--until`.
+            checkpoint.done = checkpoint.exhausted = True
+            stats["listing_exhausted"] += 1
+            print(
+                f"[warn] r/{subreddit}: listing exhausted before until; oldest post {checkpoint.oldest_created_utc}",
+                file=sys.stderr,
+            )
+        checkpoint.after = next_after
+        save_backfill_checkpoint(path, checkpoint)
+        print(
+            f"[backfill] r/{subreddit} page {checkpoint.pages}: {checkpoint.posts} posts, "
+            f"oldest {checkpoint.oldest_created_utc}",
+            file=sys.stderr,
+        )
+        if spool_failed:
+            return
+        drain_spool(config, outbox, stats, full_batches_only=True)
 
-            if result.get("created"):
-                stats["created"] += 1
-            else:
-                stats["duplicates"] += 1
 
+def run_backfill(
+    config: ScraperConfig,
+    *,
+    until: datetime,
+    subreddits: list[str] | None = None,
+    checkpoint_dir: Path,
+) -> dict[str, int]:
+    stats = {
+        "subreddits_checked": 0,
+        "pages": 0,
+        "spooled": 0,
+        "created": 0,
+        "duplicates": 0,
+        "errors": 0,
+        "dead_lettered": 0,
+        "listing_exhausted": 0,
+    }
+    pacer = RequestPacer(config.backfill_request_delay_seconds)
+    outbox = IngestOutbox(
+        Path(config.outbox_dir) / "backfill",
+        max_total_bytes=config.outbox_max_bytes,
+        retry_errors=OUTBOX_RETRY_ERRORS,
+    )
+    for subreddit in subreddits or config.subreddits:
+        stats["subreddits_checked"] += 1
+        try:
+            backfill_subreddit(
+                config,
+                subreddit,
+                until_utc=until.timestamp(),
+                checkpoint_dir=checkpoint_dir,
+                pacer=pacer,
+                outbox=outbox,
+                stats=stats,
+            )
+        except ScraperError as exc:
+            stats["errors"] += 1
+            print(f"[error] backfill r/{subreddit}: {exc}", file=sys.stderr)
+
+    drain_spool(config, outbox, stats)
+    stats["spool_pending"] = outbox.pending
     return stats
 
 
 def print_stats(stats: dict[str, int]) -> None:
-    timestamp = datetime.now(timezone.utc).isoformat()
+    timestamp = datetime.now(UTC).isoformat()
     print(
         json.dumps(
             {
@@ -348,11 +821,47 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Run indefinitely instead of stopping after the default maximum number of cycles.",
     )
+    fixtures = parser.add_mutually_exclusive_group()
+    fixtures.add_argument(
+        "--record-fixtures",
+        type=str,
+        default=None,
+        help="Save every Reddit JSON response under this directory for later offline replay.",
+    )
+    fixtures.add_argument(
+        "--replay-fixtures",
+        type=str,
+        default=None,
+        help="Serve Reddit requests from fixtures recorded under this directory instead of the network.",
+    )
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="Page back through subreddit history to --until, resuming from saved checkpoints, then exit.",
+    )
+    parser.add_argument(
+        "--until",
+        type=str,
+        default=None,
+        help="Backfill target date (ISO 8601, UTC if no offset), e.g. 2026-01-01.",
+    )
+    parser.add_argument(
+        "--subreddit",
+        action="append",
+        default=None,
+        help="Subreddit to backfill; repeat for several. Defaults to the configured list.",
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        type=str,
+        default=None,
+        help="Directory for backfill checkpoints. Defaults to scraper_daemon/.backfill.",
+    )
     return parser.parse_args()
 
 
 def main() -> int:
-    global PACER
+    global HTTP_FIXTURES, PACER
     args = parse_args()
     try:
         config = load_config()
@@ -361,6 +870,27 @@ def main() -> int:
         return 1
 
     PACER = RequestPacer(config.request_delay_seconds)
+    if args.record_fixtures:
+        HTTP_FIXTURES = FixtureStore(Path(args.record_fixtures), mode="record")
+    elif args.replay_fixtures:
+        HTTP_FIXTURES = FixtureStore(Path(args.replay_fixtures), mode="replay")
+        PACER = RequestPacer(0.0)
+
+    if args.backfill:
+        if not args.until:
+            print("[fatal] --backfill requires --until", file=sys.stderr)
+            return 1
+        try:
+            until = datetime.fromisoformat(args.until)
+        except ValueError:
+            print(f"[fatal] --until must be an ISO date or datetime, got {args.until!r}", file=sys.stderr)
+            return 1
+        if until.tzinfo is None:
+            until = until.replace(tzinfo=UTC)
+        refresh_defined_lists(config)
+        checkpoint_dir = Path(args.checkpoint_dir) if args.checkpoint_dir else Path(__file__).resolve().parents[1] / ".backfill"
+        print_stats(run_backfill(config, until=until, subreddits=args.subreddit, checkpoint_dir=checkpoint_dir))
+        return 0
 
     if args.once:
         print_stats(run_once(config))
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+
+class StubDBAPIState:
+    """In-memory stand-in for the DB API endpoints the scraper calls.
+
+    Items ingested with comments pending count as passing the filter for a stable
+    `pass_rate` share of their ids; only those are offered for comment enrichment.
+    """
+
+    def __init__(self, *, subreddits: list[str], latency_seconds: float = 0.0, pass_rate: float = 0.5) -> None:
+        self.subreddits = subreddits
+        self.latency_seconds = max(0.0, latency_seconds)
+        self.pass_rate = min(1.0, max(0.0, pass_rate))
+        self.content_ids: dict[tuple[str, str], str] = {}
+        self.pending_comments: dict[str, str] = {}
+        self.enriched: set[str] = set()
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def ingest(self, item: dict[str, Any]) -> dict[str, Any]:
+        source = item.get("source")
+        source_content_id = item.get("source_content_id")
+        if not source or not source_content_id or not item.get("source_url"):
+            return {"created": False, "error": "invalid_ingest_item"}
+        key = (str(source), str(source_content_id))
+        with self._lock:
+            if key in self.content_ids:
+                return {"created": False, "content_id": self.content_ids[key]}
+            content_id = self.content_ids[key] = str(uuid.uuid4())
+            raw_payload = item.get("raw_payload") or {}
+            passes = zlib.crc32(key[1].encode("utf-8")) % 1000 < self.pass_rate * 1000
+            if raw_payload.get("comment_enrichment") == "pending" and passes:
+                self.pending_comments[content_id] = str(raw_payload.get("permalink") or "")
+            return {"created": True, "content_id": content_id}
+
+    def enrichment_queue(self, limit: int) -> list[dict[str, Any]]:
+        with self._lock:
+            return [
+                {"content_id": content_id, "state": "opportunity_review", "permalink": permalink}
+                for content_id, permalink in list(self.pending_comments.items())[:limit]
+            ]
+
+    def attach_comments(self, content_id: str, status: str) -> bool:
+        with self._lock:
+            if content_id not in self.pending_comments:
+                return False
+            if status != "pending":
+                del self.pending_comments[content_id]
+                self.enriched.add(content_id)
+            return True
+
+
+def make_handler(state: StubDBAPIState) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload: dict[str, Any] | None = None) -> None:
+            body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _begin(self) -> None:
+            with state._lock:
+                state.requests += 1
+            if state.latency_seconds:
+                time.sleep(state.latency_seconds)
+
+        def do_GET(self) -> None:
+            self._begin()
+            url = urlsplit(self.path)
+            if url.path == "/v1/enrichment/comments":
+                limit = int(parse_qs(url.query).get("limit", ["10"])[-1])
+                items = state.enrichment_queue(limit)
+                self._send(200, {"items": items, "limit": limit, "count": len(items)})
+            elif self.path.startswith("/v1/defined-lists"):
+                self._send(200, {"source": "reddit", "version": "stub", "subreddits": state.subreddits, "keywords": []})
+            elif self.path == "/health":
+                self._send(200, {"status": "ok"})
+            else:
+                self._send(404, {"detail": "Not Found"})
+
+        def do_POST(self) -> None:
+            self._begin()
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if self.path == "/v1/content/ingest/batch":
+                results = [state.ingest(item) for item in body.get("items", [])]
+                self._send(200, {"results": results, "count": len(results)})
+            elif self.path == "/v1/content/ingest":
+                self._send(200, state.ingest(body))
+            else:
+                self._send(404, {"detail": "Not Found"})
+
+        def do_PATCH(self) -> None:
+            self._begin()
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            parts = self.path.strip("/").split("/")
+            if len(parts) == 4 and parts[:2] == ["v1", "content"] and parts[3] == "comments":
+                status = str(body.get("status") or "done")
+                if state.attach_comments(parts[2], status):
+                    self._send(200, {"content_id": parts[2], "comment_enrichment": status})
+                else:
+                    self._send(404, {"detail": "content_id not found"})
+            else:
+                self._send(404, {"detail": "Not Found"})
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return
+
+    return Handler
+
+
+def start_stub_db_api(state: StubDBAPIState, *, port: int = 0) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run an in-memory stub of the scraper-facing DB API.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--subreddit", action="append", default=None)
+    args = parser.parse_args()
+
+    state = StubDBAPIState(subreddits=args.subreddit or [], latency_seconds=args.latency_ms / 1000)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(state))
+    print(f"stub db_api listening on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())